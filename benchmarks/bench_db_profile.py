@@ -0,0 +1,99 @@
+# benchmarks/bench_db_profile.py
+"""Commit throughput and read latency of DatabaseManager with and without the tuned profile.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_db_profile --commits 2000 --readers 8
+
+Each run uses a fresh database file in a temporary directory. Readers query
+continuously while the writer commits one small transaction at a time, which
+mirrors chat activity during a raid.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import text
+
+from database.engine_profile import EngineProfile
+from database.manager import DatabaseManager
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+
+async def run(profile: EngineProfile, path: str, commits: int, readers: int):
+    db = DatabaseManager(f"sqlite+aiosqlite:///{path}", profile=profile)
+    async with db.session_scope() as session:
+        await session.execute(text(
+            'CREATE TABLE user_points (user_id TEXT PRIMARY KEY, points INTEGER DEFAULT 0)'
+        ))
+        await session.execute(
+            text('INSERT INTO user_points (user_id, points) VALUES (:id, 0)'),
+            [{'id': str(i)} for i in range(1000)]
+        )
+
+    read_latencies = []
+    errors = 0
+    done = asyncio.Event()
+
+    async def writer():
+        nonlocal errors
+        for i in range(commits):
+            try:
+                async with db.session_scope() as session:
+                    await session.execute(
+                        text('UPDATE user_points SET points = points + 1 WHERE user_id = :id'),
+                        {'id': str(i % 1000)}
+                    )
+            except Exception:
+                errors += 1
+        done.set()
+
+    async def reader(offset: int):
+        nonlocal errors
+        i = offset
+        while not done.is_set():
+            start = time.perf_counter()
+            try:
+                async with db.session_scope(readonly=True) as session:
+                    await session.execute(
+                        text('SELECT points FROM user_points WHERE user_id = :id'),
+                        {'id': str(i % 1000)}
+                    )
+                read_latencies.append((time.perf_counter() - start) * 1000)
+            except Exception:
+                errors += 1
+            i += 7
+
+    start = time.perf_counter()
+    await asyncio.gather(writer(), *(reader(i) for i in range(readers)))
+    elapsed = time.perf_counter() - start
+    await db.close()
+
+    print(
+        f"profile={profile.name:<8} commits/s={commits / elapsed:8.0f} "
+        f"reads={len(read_latencies):<7} read p50={percentile(read_latencies, 50):7.2f}ms "
+        f"p95={percentile(read_latencies, 95):7.2f}ms p99={percentile(read_latencies, 99):7.2f}ms "
+        f"errors={errors}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--commits', type=int, default=2000)
+    parser.add_argument('--readers', type=int, default=8)
+    args = parser.parse_args()
+
+    for profile in (EngineProfile.default(), EngineProfile()):
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(run(profile, os.path.join(directory, 'bench.db'), args.commits, args.readers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_phrase_matcher.py
+"""Banned-phrase checks per second with PhraseMatcher against the old substring scan.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_phrase_matcher --phrases 10000 --messages 100000
+
+Phrases and messages are drawn from the same random vocabulary, so some
+messages match. The old any(phrase in content) scan is slow enough that it
+only runs on a sample and is reported per message.
+"""
+import argparse
+import random
+import string
+import time
+
+from features.moderation.phrase_matcher import PhraseMatcher
+
+
+def vocabulary(rng, size):
+    return [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--phrases', type=int, default=10000)
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--naive-sample', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = vocabulary(rng, args.phrases * 3)
+    phrases = set()
+    while len(phrases) < args.phrases:
+        phrases.add(' '.join(rng.sample(words, rng.randint(1, 3))))
+    phrases = list(phrases)
+    messages = [' '.join(rng.choices(words, k=rng.randint(3, 15))) for _ in range(args.messages)]
+
+    start = time.perf_counter()
+    matcher = PhraseMatcher(phrases)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    matcher.add('a brand new phrase')
+    matcher._root.regex()
+    source_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    matcher.compile()
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    hits = sum(1 for message in messages if matcher.search(message))
+    matched_s = time.perf_counter() - start
+
+    sample = messages[:args.naive_sample]
+    start = time.perf_counter()
+    naive_hits = sum(1 for message in sample if any(phrase in message for phrase in phrases))
+    naive_s = time.perf_counter() - start
+    sample_hits = sum(1 for message in sample if matcher.search(message))
+
+    print(f"phrases={len(matcher)} messages={len(messages)}")
+    print(f"initial build={build_ms:.0f}ms, one add: regex source={source_ms:.2f}ms compile={compile_ms:.0f}ms")
+    print(
+        f"matcher: {len(messages) / matched_s:9.0f} msgs/s {matched_s / len(messages) * 1e6:7.1f}us/msg "
+        f"hits={hits}"
+    )
+    print(
+        f"naive:   {len(sample) / naive_s:9.0f} msgs/s {naive_s / len(sample) * 1e6:7.1f}us/msg "
+        f"(sample of {len(sample)}, hits agree={naive_hits == sample_hits})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_raid_journal.py
+"""Append latency of the raid journal, one event per commit and batched like group-committed joins.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_raid_journal --appends 2000 --batch 100
+
+Each run uses a fresh database file in a temporary directory, once with
+the default SQLite settings and once with the tuned engine profile.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from core.raid_journal import RaidJournal
+from database.engine_profile import EngineProfile
+from database.manager import DatabaseManager, initialize_database
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+
+class JournalBot:
+    def __init__(self, db):
+        self.db = db
+
+
+async def run(profile: EngineProfile, path: str, appends: int, batch: int):
+    url = f"sqlite+aiosqlite:///{path}"
+    await initialize_database(url)
+    db = DatabaseManager(url, profile=profile)
+    journal = RaidJournal(JournalBot(db))
+
+    single = []
+    start = time.perf_counter()
+    for i in range(appends):
+        begin = time.perf_counter()
+        await journal.append('bench', 'join', str(i), 100, username=f"user{i}")
+        single.append((time.perf_counter() - begin) * 1000)
+    single_rate = appends / (time.perf_counter() - start)
+
+    batched = []
+    start = time.perf_counter()
+    for offset in range(0, appends, batch):
+        entries = [
+            journal.entry('bench', 'join', str(i), 100, username=f"user{i}")
+            for i in range(offset, min(offset + batch, appends))
+        ]
+        begin = time.perf_counter()
+        async with db.session_scope() as session:
+            await journal.append_in_session(session, entries)
+        batched.append((time.perf_counter() - begin) * 1000)
+    batched_rate = appends / (time.perf_counter() - start)
+    await db.close()
+
+    print(
+        f"profile={profile.name:<8} single: {single_rate:7.0f}/s p50={percentile(single, 50):6.2f}ms "
+        f"p95={percentile(single, 95):6.2f}ms p99={percentile(single, 99):6.2f}ms | "
+        f"batch of {batch}: {batched_rate:8.0f}/s p50={percentile(batched, 50):6.2f}ms "
+        f"p95={percentile(batched, 95):6.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--appends', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=100)
+    args = parser.parse_args()
+
+    for profile in (EngineProfile.default(), EngineProfile()):
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(run(profile, os.path.join(directory, 'journal.db'), args.appends, args.batch))
+
+
+if __name__ == "__main__":
+    main()
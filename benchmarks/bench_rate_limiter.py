@@ -0,0 +1,135 @@
+# benchmarks/bench_rate_limiter.py
+"""Decisions per second of RateLimiter with many tracked keys, against the previous scanning limiter.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_rate_limiter --keys 100000 --decisions 500000
+
+The limiter is first filled with --keys live (command, user) keys, then
+random users from a pool of twice as many keys run commands, so half the
+decisions land on a live key and half add a new one. A churn pass uses
+short cooldowns on a fast clock so keys expire as fast as they arrive.
+The previous limiter rescanned every key on each call, so it is timed
+on far fewer decisions.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from utils.rate_limiter import RateLimiter
+
+COMMANDS = ['points', 'raid', 'invest', 'hug', 'lurk', 'so', 'uptime', 'followage', 'top', 'gamble']
+
+
+class ScanningRateLimiter:
+    """The previous can_execute, datetime cooldowns in nested dicts cleaned up on every call"""
+
+    def __init__(self):
+        self.command_cooldowns = {}
+        self.global_cooldowns = {}
+        self._lock = asyncio.Lock()
+
+    async def can_execute(self, command_name, user_id, cooldown=3, global_cooldown=1):
+        now = datetime.now(timezone.utc)
+        command_key = command_name.lower()
+        async with self._lock:
+            cutoff = now - timedelta(minutes=5)
+            for cmd in [cmd for cmd, at in self.global_cooldowns.items() if at <= cutoff]:
+                del self.global_cooldowns[cmd]
+            for cmd in list(self.command_cooldowns):
+                for user in [user for user, at in self.command_cooldowns[cmd].items() if at <= cutoff]:
+                    del self.command_cooldowns[cmd][user]
+                if not self.command_cooldowns[cmd]:
+                    del self.command_cooldowns[cmd]
+
+            if global_cooldown > 0 and command_key in self.global_cooldowns:
+                if (now - self.global_cooldowns[command_key]).total_seconds() < global_cooldown:
+                    return False, None
+            users = self.command_cooldowns.setdefault(command_key, {})
+            if cooldown > 0 and user_id in users:
+                if (now - users[user_id]).total_seconds() < cooldown:
+                    return False, None
+            if global_cooldown > 0:
+                self.global_cooldowns[command_key] = now
+            if cooldown > 0:
+                users[user_id] = now
+            return True, None
+
+
+def workload(keys, decisions, seed):
+    rng = random.Random(seed)
+    users = [f"user{i}" for i in range(keys // len(COMMANDS) * 2)]
+    warmup = [(COMMANDS[i % len(COMMANDS)], users[i // len(COMMANDS)]) for i in range(keys)]
+    calls = [(rng.choice(COMMANDS), rng.choice(users)) for _ in range(decisions)]
+    return warmup, calls
+
+
+async def time_limiter(limiter, warmup, calls, cooldown):
+    for command, user in warmup:
+        await limiter.can_execute(command, user, cooldown, 0)
+    allowed = 0
+    start = time.perf_counter()
+    for command, user in calls:
+        ok, _ = await limiter.can_execute(command, user, cooldown, 0)
+        allowed += ok
+    elapsed = time.perf_counter() - start
+    return len(calls) / elapsed, allowed
+
+
+async def run(args):
+    warmup, calls = workload(args.keys, args.decisions, args.seed)
+    # A cooldown long enough that the warmup keys are all still live
+    cooldown = 600
+
+    limiter = RateLimiter()
+    rate, allowed = await time_limiter(limiter, warmup, calls, cooldown)
+    print(
+        f"RateLimiter         {rate:12,.0f} decisions/s  allowed={allowed / len(calls):.1%} "
+        f"tracked={limiter.get_stats()['tracked_keys']}"
+    )
+
+    # Sync entry point, skipping the coroutine wrapper
+    limiter = RateLimiter()
+    for command, user in warmup:
+        limiter.check(command, user, cooldown, 0)
+    start = time.perf_counter()
+    for command, user in calls:
+        limiter.check(command, user, cooldown, 0)
+    print(f"RateLimiter.check   {len(calls) / (time.perf_counter() - start):12,.0f} decisions/s")
+
+    # Lazy expiry under churn: short cooldowns on a clock that runs ahead
+    now = [0.0]
+    limiter = RateLimiter(clock=lambda: now[0])
+    start = time.perf_counter()
+    for command, user in calls:
+        now[0] += 0.001
+        limiter.check(command, user, 30, 0)
+    stats = limiter.get_stats()
+    print(
+        f"RateLimiter churn   {len(calls) / (time.perf_counter() - start):12,.0f} decisions/s  "
+        f"expired={stats['expired']} tracked={stats['tracked_keys']}"
+    )
+
+    # Warming it up call by call would be quadratic, fill its dicts directly
+    old = ScanningRateLimiter()
+    filled = datetime.now(timezone.utc)
+    for command, user in warmup:
+        old.command_cooldowns.setdefault(command, {})[user] = filled
+    rate, _ = await time_limiter(old, [], calls[:args.old_decisions], cooldown)
+    print(f"previous (scanning) {rate:12,.0f} decisions/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--keys', type=int, default=100000)
+    parser.add_argument('--decisions', type=int, default=500000)
+    parser.add_argument('--old-decisions', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/bench_user_activity_memory.py
+"""Bytes per tracked user for the old dataclass and the slotted UserActivity.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_user_activity_memory --users 50000
+"""
+import argparse
+import gc
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from features.tracking.user_tracker import UserActivity, intern_badges
+
+
+@dataclass
+class LegacyUserActivity:
+    """The UserActivity layout before the slotted rewrite"""
+    first_seen: datetime
+    last_seen: datetime
+    message_count: int = 0
+    time_watched: int = 0
+    last_message: Optional[str] = None
+    is_subscriber: bool = False
+    is_moderator: bool = False
+    custom_badges: List[str] = None
+
+    def __post_init__(self):
+        if self.custom_badges is None:
+            self.custom_badges = []
+
+
+def chat_line(i: int) -> str:
+    # Built per user so every message body is a distinct object, as in real chat
+    return f"message number {i} from the chat, with some typical amount of text"
+
+
+def build_legacy(count: int):
+    users = {}
+    for i in range(count):
+        activity = LegacyUserActivity(
+            first_seen=datetime.now(timezone.utc),
+            last_seen=datetime.now(timezone.utc),
+            is_subscriber=i % 5 == 0
+        )
+        activity.message_count = 3
+        activity.last_message = chat_line(i)
+        activity.custom_badges = ['subscriber'] if i % 5 == 0 else []
+        users[str(i)] = activity
+    return users
+
+
+def build_slotted(count: int):
+    users = {}
+    for i in range(count):
+        activity = UserActivity(is_subscriber=i % 5 == 0)
+        activity.message_count = 3
+        activity.custom_badges = intern_badges(['subscriber'] if i % 5 == 0 else [])
+        users[str(i)] = activity
+    return users
+
+
+def measure(builder, count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+    users = builder(count)
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in snapshot.compare_to(baseline, 'filename'))
+    del users
+    return total / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=50000)
+    args = parser.parse_args()
+
+    legacy = measure(build_legacy, args.users)
+    slotted = measure(build_slotted, args.users)
+    print(f"users={args.users}")
+    print(f"legacy dataclass : {legacy:7.1f} bytes/user")
+    print(f"slotted activity : {slotted:7.1f} bytes/user")
+    print(f"saving           : {100 * (1 - slotted / legacy):6.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_user_tracker.py
+"""Message-processing latency of UserTracker under concurrent chatters.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_user_tracker --chatters 1000 --messages 5
+
+The database is simulated with a fixed per-statement latency so the numbers
+reflect lock contention rather than disk speed.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from features.tracking.user_tracker import UserTracker
+
+
+class SimulatedSession:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def execute(self, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(first=lambda: None, all=lambda: [])
+
+
+class SimulatedDatabase:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    @asynccontextmanager
+    async def session_scope(self):
+        yield SimulatedSession(self.latency)
+
+
+def make_message(user_id: int):
+    author = SimpleNamespace(id=user_id, name=f"user{user_id}", is_subscriber=False, is_mod=False)
+    return SimpleNamespace(author=author, content="hello chat")
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+
+async def run(shards: int, chatters: int, messages: int, latency: float, write_behind: bool):
+    bot = SimpleNamespace(db=SimulatedDatabase(latency))
+    tracker = UserTracker(bot, write_behind=write_behind, shard_count=shards)
+    latencies = []
+
+    async def chatter(user_id: int):
+        for _ in range(messages):
+            start = time.perf_counter()
+            await tracker.track_user_message(make_message(user_id))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(chatter(i) for i in range(chatters)))
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"shards={shards:<3} write_behind={str(write_behind):<5} "
+        f"p50={percentile(latencies, 50):8.2f}ms p95={percentile(latencies, 95):8.2f}ms "
+        f"p99={percentile(latencies, 99):8.2f}ms mean={statistics.mean(latencies):8.2f}ms "
+        f"throughput={len(latencies) / elapsed:9.0f} msg/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chatters', type=int, default=1000)
+    parser.add_argument('--messages', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    for shards in (1, 16, 64):
+        for write_behind in (False, True):
+            asyncio.run(run(shards, args.chatters, args.messages, latency, write_behind))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/load_raid_join.py
+"""Join latency and throughput of RaidManager under a burst of concurrent !raid commands.
+
+Run from the repository root:
+
+    python -m benchmarks.load_raid_join --joins 500
+
+Each run uses a fresh database file in a temporary directory with every
+joiner funded up front. All joins are started at once, the way a chat
+burst arrives, and chat output goes to a no-op sender.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from config.config import Config
+from core.raid_manager import RaidManager
+from core.raid_messages import RaidMessageHandler
+from database.manager import DatabaseManager, initialize_database
+from features.points.points_manager import PointsManager
+from utils.timer_wheel import TimerService
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+
+class LoadBot:
+    """Just enough of TwitchBot for the raid system"""
+
+    def __init__(self, db, viewers: int):
+        self.db = db
+        self.viewers = viewers
+        self.sent = 0
+        # Never driven, so recruitment stays open for the whole run
+        self.timers = TimerService()
+        self.points_manager = PointsManager(self)
+        self.raid_messages = RaidMessageHandler(self, join_interval=Config.RAID_JOIN_ANNOUNCE_INTERVAL)
+
+    async def get_viewer_count(self):
+        return self.viewers
+
+    async def send_chat_message(self, message, **options):
+        self.sent += 1
+
+
+async def run(path: str, joins: int, investment: int):
+    url = f"sqlite+aiosqlite:///{path}"
+    await initialize_database(url)
+    db = DatabaseManager(url)
+    bot = LoadBot(db, viewers=joins * 2)
+    await bot.points_manager.setup()
+    await bot.points_manager.add_points_bulk(
+        [{'user_id': str(i), 'amount': investment * 2} for i in range(joins)]
+    )
+
+    raid = RaidManager(bot)
+    assert await raid.start_raid(), "raid did not start"
+
+    latencies = []
+
+    async def join(i: int):
+        start = time.perf_counter()
+        ok, _ = await raid.join_raid(str(i), f"raider{i}", investment)
+        latencies.append((time.perf_counter() - start) * 1000)
+        return ok
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(join(i) for i in range(joins)))
+    elapsed = time.perf_counter() - start
+
+    await bot.raid_messages.flush_crew_joins()
+    ledger = raid.ledger.get_stats()
+
+    crew = len(raid.participants)
+    start = time.perf_counter()
+    plunder = await raid._distribute_rewards()
+    settle_ms = (time.perf_counter() - start) * 1000
+    await raid._force_reset()
+    await db.close()
+
+    print(
+        f"joins={joins} ok={sum(results)} elapsed={elapsed * 1000:.0f}ms "
+        f"throughput={joins / elapsed:.0f} joins/s"
+    )
+    print(
+        f"latency p50={percentile(latencies, 50):.2f}ms p95={percentile(latencies, 95):.2f}ms "
+        f"p99={percentile(latencies, 99):.2f}ms max={max(latencies):.2f}ms"
+    )
+    print(
+        f"debit batches={ledger['batches']} mean batch={ledger['mean_batch']:.1f} "
+        f"chat lines={bot.sent}"
+    )
+    print(f"settlement crew={crew} plunder={plunder} time={settle_ms:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--joins', type=int, default=500)
+    parser.add_argument('--investment', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(os.path.join(directory, 'raid.db'), args.joins, args.investment))
+
+
+if __name__ == "__main__":
+    main()
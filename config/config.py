@@ -14,14 +14,69 @@ class Config:
     
     # Database Configuration
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///bot.db')
+    DB_PROFILE = os.getenv('DB_PROFILE', 'tuned').lower()
+    DB_JOURNAL_MODE = os.getenv('DB_JOURNAL_MODE', 'WAL')
+    DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL')
+    DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', 5000))
+    DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', 16384))
+    DB_MMAP_SIZE_MB = int(os.getenv('DB_MMAP_SIZE_MB', 256))
+    DB_READ_POOL_SIZE = int(os.getenv('DB_READ_POOL_SIZE', 5))
+    DB_READ_POOL_OVERFLOW = int(os.getenv('DB_READ_POOL_OVERFLOW', 5))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', -1))
+    DB_SLOW_QUERY_MS = int(os.getenv('DB_SLOW_QUERY_MS', 100))
     
     # Feature Flags
     ENABLE_MODERATION = os.getenv('ENABLE_MODERATION', 'True').lower() == 'true'
+    # Automatic deletes and timeouts from the moderation pipeline, opt-in
+    ENABLE_AUTO_MODERATION = os.getenv('ENABLE_AUTO_MODERATION', 'False').lower() == 'true'
     ENABLE_CUSTOM_COMMANDS = os.getenv('ENABLE_CUSTOM_COMMANDS', 'True').lower() == 'true'
     
     # Moderation Settings
     MAX_MESSAGE_LENGTH = int(os.getenv('MAX_MESSAGE_LENGTH', 500))
     LINK_PROTECTION = os.getenv('LINK_PROTECTION', 'True').lower() == 'true'
+    SPAM_HISTORY_SIZE = int(os.getenv('SPAM_HISTORY_SIZE', 5))
+    SPAM_THRESHOLD = int(os.getenv('SPAM_THRESHOLD', 3))
+    SPAM_SIMHASH_DISTANCE = int(os.getenv('SPAM_SIMHASH_DISTANCE', 10))
+    SPAM_IDLE_SECONDS = float(os.getenv('SPAM_IDLE_SECONDS', 300))
+    SPAM_MAX_USERS = int(os.getenv('SPAM_MAX_USERS', 50000))
+    TIMEOUT_PERSIST = os.getenv('TIMEOUT_PERSIST', 'True').lower() == 'true'
+    MODERATION_MIN_LENGTH = int(os.getenv('MODERATION_MIN_LENGTH', 3))
+    MODERATION_TRUSTED_USERS = [
+        name.strip() for name in os.getenv('MODERATION_TRUSTED_USERS', '').split(',') if name.strip()
+    ]
+    
+    # User Tracking Settings
+    USER_WRITE_BEHIND = os.getenv('USER_WRITE_BEHIND', 'True').lower() == 'true'
+    USER_FLUSH_INTERVAL_MS = int(os.getenv('USER_FLUSH_INTERVAL_MS', 2000))
+    USER_FLUSH_MAX_ROWS = int(os.getenv('USER_FLUSH_MAX_ROWS', 500))
+    USER_TRACKER_SHARDS = int(os.getenv('USER_TRACKER_SHARDS', 16))
+    USER_RETAIN_MESSAGES = os.getenv('USER_RETAIN_MESSAGES', 'False').lower() == 'true'
+    
+    # Event Loop Monitoring
+    LOOP_MONITOR_INTERVAL_MS = int(os.getenv('LOOP_MONITOR_INTERVAL_MS', 500))
+    LOOP_SLOW_CALLBACK_MS = float(os.getenv('LOOP_SLOW_CALLBACK_MS', 100))
+    LOOP_TRACK_CALLBACKS = os.getenv('LOOP_TRACK_CALLBACKS', 'False').lower() == 'true'
+    
+    # Chat Output
+    CHAT_BOT_IS_MODERATOR = os.getenv('CHAT_BOT_IS_MODERATOR', 'False').lower() == 'true'
+    CHAT_QUEUE_MAX_DEPTH = int(os.getenv('CHAT_QUEUE_MAX_DEPTH', 200))
+    
+    # Timers
+    TIMER_TICK_MS = int(os.getenv('TIMER_TICK_MS', 250))
+
+    # Rate Limiting, per-role overrides as "role=cooldown_scale:extra_burst,..." e.g. "vip=0.5:1"
+    RATE_LIMIT_ROLE_POLICIES = os.getenv('RATE_LIMIT_ROLE_POLICIES', '')
+
+    # Raid Settings
+    RAID_JOIN_ANNOUNCE_INTERVAL = float(os.getenv('RAID_JOIN_ANNOUNCE_INTERVAL', 2.0))
+
+    # Message Tracing
+    TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 0.0))
+    TRACE_FILE = os.getenv('TRACE_FILE', 'traces.jsonl')
+    
+    # Points Settings
+    POINTS_CACHE_MAX_ENTRIES = int(os.getenv('POINTS_CACHE_MAX_ENTRIES', 10000))
     
     @classmethod
     def validate(cls):
@@ -6,6 +6,7 @@ from sqlalchemy import text
 from twitchio.ext import commands
 from datetime import datetime, timezone
 from config.config import Config
+from core.chat_queue import ChatQueue, PRIORITY_HIGH, PRIORITY_NORMAL
 from core.raid_manager import RaidManager
 from core.raid_messages import RaidMessageHandler
 from core.raid_recovery import RaidRecoveryManager
@@ -23,12 +24,17 @@ from features.rewards.handlers import RewardHandlers
 from features.rewards.moderation import ModerationRewardHandler
 from features.rewards.stream_interaction import StreamInteractionHandler
 from utils.decorators import error_boundary
-from utils.rate_limiter import RateLimiter
+from utils.rate_limiter import RateLimiter, parse_role_policies
 from utils.health_checker import HealthChecker
 from utils.monitoring import PerformanceMonitor, TimingContext
-from utils.alert_system import AlertManager
+from utils.loop_monitor import LoopMonitor
+from utils.timer_wheel import TimerService
+from utils.tracing import tracer
+from utils.alert_system import AlertManager, CHAT_ALERT_TYPES
 from features.tracking.user_tracker import UserTracker
 from features.moderation.moderator import ModerationManager
+from features.moderation.pipeline import ModerationPipeline
+from features.moderation.spam_detector import SpamDetector
 from features.commands.base import BaseCommands
 
 class TwitchBot(commands.Bot):
@@ -41,9 +47,22 @@ class TwitchBot(commands.Bot):
         
         # Store channel name for easy access
         self.channel_name = Config.CHANNEL_NAME
+
+        # Every delayed and periodic job runs off one timer wheel
+        self.timers = TimerService(tick=Config.TIMER_TICK_MS / 1000)
+
+        # All outbound chat goes through one paced queue
+        self.chat_queue = ChatQueue(
+            self._send_to_channel,
+            is_moderator=Config.CHAT_BOT_IS_MODERATOR,
+            max_depth=Config.CHAT_QUEUE_MAX_DEPTH
+        )
         
         # Initialize raid system components
-        self.raid_messages = RaidMessageHandler(self)
+        self.raid_messages = RaidMessageHandler(
+            self,
+            join_interval=Config.RAID_JOIN_ANNOUNCE_INTERVAL
+        )
         self.raid_manager = RaidManager(self)
         self.raid_recovery = RaidRecoveryManager(self)
         self.raid_scheduler = RaidScheduler(self)
@@ -55,15 +74,40 @@ class TwitchBot(commands.Bot):
         self.command_prefix = Config.BOT_PREFIX
 
         # Initialize monitoring and analytics components
-        self.monitor = PerformanceMonitor(self)
-        self.timeout_manager = TimeoutManager()
+        self.loop_monitor = LoopMonitor(
+            interval_ms=Config.LOOP_MONITOR_INTERVAL_MS,
+            slow_callback_ms=Config.LOOP_SLOW_CALLBACK_MS,
+            track_callbacks=Config.LOOP_TRACK_CALLBACKS
+        )
+        self.monitor = PerformanceMonitor(self, loop_monitor=self.loop_monitor)
+        tracer.configure(sample_rate=Config.TRACE_SAMPLE_RATE, trace_file=Config.TRACE_FILE)
+        self.timeout_manager = TimeoutManager(self, persist=Config.TIMEOUT_PERSIST)
         self.analytics = AnalyticsTracker(self)
         self.health_checker = HealthChecker(self)
 
         # Initialize user and raid tracking
-        self.user_tracker = UserTracker(self)
-        self.moderation = ModerationManager(self)
-        self.points_manager = PointsManager(self)
+        self.user_tracker = UserTracker(
+            self,
+            write_behind=Config.USER_WRITE_BEHIND,
+            flush_interval_ms=Config.USER_FLUSH_INTERVAL_MS,
+            flush_max_rows=Config.USER_FLUSH_MAX_ROWS,
+            shard_count=Config.USER_TRACKER_SHARDS,
+            retain_messages=Config.USER_RETAIN_MESSAGES
+        )
+        self.moderation = ModerationManager(self, SpamDetector(
+            history_size=Config.SPAM_HISTORY_SIZE,
+            spam_threshold=Config.SPAM_THRESHOLD,
+            max_distance=Config.SPAM_SIMHASH_DISTANCE,
+            idle_seconds=Config.SPAM_IDLE_SECONDS,
+            max_users=Config.SPAM_MAX_USERS
+        ))
+        self.moderation_pipeline = ModerationPipeline(
+            self.moderation,
+            min_length=Config.MODERATION_MIN_LENGTH,
+            trusted_users=Config.MODERATION_TRUSTED_USERS,
+            command_prefix=Config.BOT_PREFIX
+        )
+        self.points_manager = PointsManager(self, cache_max_entries=Config.POINTS_CACHE_MAX_ENTRIES)
 
         # Initialize rewards and moderation
         self.rewards = RewardManager(self)
@@ -72,11 +116,11 @@ class TwitchBot(commands.Bot):
         self.stream_interaction = StreamInteractionHandler(self)
 
         # Initialize rate limiter and alert manager
-        self.rate_limiter = RateLimiter()
+        self.rate_limiter = RateLimiter(role_policies=parse_role_policies(Config.RATE_LIMIT_ROLE_POLICIES))
         self.alert_manager = AlertManager(self)
 
         # Initialize database manager
-        self.db = DatabaseManager()
+        self.db = DatabaseManager(slow_query_ms=Config.DB_SLOW_QUERY_MS)
 
         # Set up logging
         self.logger = logging.getLogger('bot')
@@ -121,25 +165,56 @@ class TwitchBot(commands.Bot):
         if message.echo:
             return
 
+        with tracer.trace('message', user_id=str(message.author.id)):
+            self._record_receive_latency(message)
+            try:
+                async with TimingContext(self.monitor, 'event', 'message'):
+                    # Enforcement runs in the background, a flagged message just skips its command
+                    violation = None
+                    if Config.ENABLE_MODERATION and Config.ENABLE_AUTO_MODERATION:
+                        with tracer.span('moderation'):
+                            violation = self.moderation_pipeline.process(message)
+
+                    # Process commands if message starts with prefix
+                    if not violation and message.content.startswith(self.prefix):
+                        with tracer.span('command'):
+                            await self.handle_commands(message)
+                    
+                    # Track user activity
+                    with tracer.span('tracking'):
+                        await self.user_tracker.track_user_message(message)
+                    
+                    # Update analytics
+                    self.messages_count += 1
+                
+            except Exception as e:
+                logger.error(f"Error processing message: {e}")
+
+    def _record_receive_latency(self, message):
+        """Time from Twitch sending the message (tmi-sent-ts) to us handling it"""
         try:
-            # Process commands if message starts with prefix
-            if message.content.startswith(self.prefix):
-                await self.handle_commands(message)
-            
-            # Track user activity
-            await self.user_tracker.track_user_message(message)
-            
-            # Update analytics
-            self.messages_count += 1
-            
-        except Exception as e:
-            logger.error(f"Error processing message: {e}")
+            sent = message.timestamp
+            if sent.tzinfo is None:
+                sent = sent.replace(tzinfo=timezone.utc)
+            latency_ms = (datetime.now(timezone.utc) - sent).total_seconds() * 1000
+        except Exception:
+            return
+        # Large or negative values are clock skew rather than latency
+        if 0 <= latency_ms < 60000:
+            tracer.record('receive', latency_ms)
 
     async def handle_commands(self, message):
         """Process commands"""
         try:
             ctx = await self.get_context(message)
-            await self.invoke(ctx)
+            command = ctx.command.name if getattr(ctx, 'command', None) else None
+            if command:
+                tracer.set_attribute('command', command)
+                ctx.send = tracer.traced('send', self.send_chat_message)
+                async with TimingContext(self.monitor, 'command', command):
+                    await self.invoke(ctx)
+            else:
+                await self.invoke(ctx)
         except Exception as e:
             logger.error(f"Error handling command: {e}")
 
@@ -149,7 +224,11 @@ class TwitchBot(commands.Bot):
         
         # Load moderation settings
         await self.moderation.load_banned_phrases()
+        await self.timeout_manager.load()
         await self.points_manager.setup()
+        await self.points_manager.leaderboard.load()
+        await self.raid_recovery.recover_from_crash()
+        await self.user_tracker.load_known_users()
         
         # Add commands
         if not self.cogs:
@@ -183,10 +262,17 @@ class TwitchBot(commands.Bot):
 
     def _start_background_tasks(self):
         """Initialize background tasks"""
+        self.timers.call_every(60, self._update_watch_time, name='watch_time', delay=0)
+        self.timers.call_every(300, self._cleanup_inactive_users, name='cleanup_inactive_users', delay=0)
+        self.timers.call_every(300, self._update_analytics, name='session_analytics', delay=0)
+
         tasks = [
-            self._update_watch_time(),
-            self._cleanup_inactive_users(),
-            self._update_analytics()
+            self.timers.run(),
+            self.user_tracker.run_flusher(),
+            self.alert_manager.start_monitoring(),
+            self.loop_monitor.run(),
+            tracer.run_flusher(),
+            self.chat_queue.run()
         ]
         
         for task in tasks:
@@ -195,53 +281,41 @@ class TwitchBot(commands.Bot):
             task_obj.add_done_callback(self.background_tasks.discard)
 
     async def _update_watch_time(self):
-        """Background task to update user watch time"""
-        while True:
-            try:
-                await self.user_tracker.update_watch_time()
-                await asyncio.sleep(60)  # Update every minute
-            except asyncio.CancelledError:
-                # This is expected if the task is canceled, e.g., during shutdown
-                logger.info("Watch time update task was cancelled.")
-                raise
-            except (RuntimeError, ValueError) as e:
-                # Handle specific, known errors that might occur
-                logger.error("Known error in watch time update task: %s", e, exc_info=True)
-                # Optionally, you might want to implement a retry mechanism here
-            except Exception as e:
-                # Catch any unexpected exceptions, log them
-                logger.error("Unexpected error in watch time update task: %s", e, exc_info=True)
-                # Wait before retrying to avoid a fast crash-restart loop
-                await asyncio.sleep(5)
+        """Update user watch time, every minute"""
+        try:
+            await self.user_tracker.update_watch_time()
+            await self.points_manager.update_watch_time_points()
+        except (RuntimeError, ValueError) as e:
+            # Handle specific, known errors that might occur
+            logger.error("Known error in watch time update task: %s", e, exc_info=True)
+        except Exception as e:
+            logger.error("Unexpected error in watch time update task: %s", e, exc_info=True)
 
     async def _cleanup_inactive_users(self):
-        """Background task to cleanup inactive users"""
+        """Cleanup inactive users, every 5 minutes"""
         try:
-            while True:
-                await self.user_tracker.cleanup_inactive_users()
-                await asyncio.sleep(300)  # Check every 5 minutes
+            await self.user_tracker.cleanup_inactive_users()
         except Exception as e:
             logger.error("Error in user cleanup task: %s", e)
 
     async def _update_analytics(self):
-        """Background task to update analytics"""
+        """Update session analytics, every 5 minutes"""
         try:
-            while True:
-                stats = await self.user_tracker.get_session_stats()
-                await self.analytics.update_session_stats(stats)
-                await asyncio.sleep(300)  # Update every 5 minutes
+            stats = await self.user_tracker.get_session_stats()
+            await self.analytics.update_session_stats(stats)
         except Exception as e:
             logger.error("Error in analytics update task: %s", e)
 
     async def event_stream_start(self):
         """Called when the stream starts."""
         self.stream_start_time = datetime.now(timezone.utc)
-        task = asyncio.create_task(self._periodic_stats_update())
-        self.background_tasks.add(task)
-        task.add_done_callback(self.background_tasks.discard)
+        self.timers.call_every(30, self.db.stream_stats_manager.flush, name='stream_stats', delay=0)
 
     async def event_stream_end(self):
         """Called when the stream ends."""
+        # Make sure we save stats one last time
+        if self.timers.cancel('stream_stats'):
+            await self.db.stream_stats_manager.flush()
         if self.stream_start_time:
             duration = int((datetime.now(timezone.utc) - self.stream_start_time).total_seconds() / 60)
             try:
@@ -275,16 +349,6 @@ class TwitchBot(commands.Bot):
             except Exception as e:
                 self.logger.error(f"Failed to update final stream stats: {e}")
 
-    async def _periodic_stats_update(self):
-        """Background task to periodically update stream stats"""
-        try:
-            while True:
-                await self.db.stream_stats_manager.flush()
-                await asyncio.sleep(30)  # Update every 30 seconds
-        except asyncio.CancelledError:
-            # Make sure we save stats one last time if the task is cancelled
-            await self.db.stream_stats_manager.flush()
-
     def setup_alert_handlers(self):
         """Setup default alert handlers"""
         # Add Discord webhook handler if configured
@@ -301,22 +365,24 @@ class TwitchBot(commands.Bot):
             pass
 
     async def chat_alert_handler(self, alert):
-        """Send critical alerts to Twitch chat"""
-        if alert['severity'].value == 'critical':
-            await self.get_channel(Config.CHANNEL_NAME).send(
-                f"⚠️ Bot Health Alert: {alert['message']}"
+        """Send critical alerts to Twitch chat, internals only go to the log and webhooks"""
+        if alert['severity'].value == 'critical' and alert['type'] in CHAT_ALERT_TYPES:
+            await self.send_chat_message(
+                f"⚠️ Bot Health Alert: {alert['message']}",
+                priority=PRIORITY_HIGH
             )
 
-    async def send_chat_message(self, message: str):
-        """Send a message to the channel"""
-        try:
-            channel = self.get_channel(self.channel_name)
-            if channel:
-                await channel.send(message)
-            else:
-                logger.error(f"Could not find channel: {self.channel_name}")
-        except Exception as e:
-            logger.error(f"Error sending chat message: {e}", exc_info=True)
+    async def send_chat_message(self, message: str, priority: int = PRIORITY_NORMAL, **options) -> bool:
+        """Queue a message for the channel, see ChatQueue.enqueue for deduplication"""
+        return self.chat_queue.enqueue(message, priority=priority, **options)
+
+    async def _send_to_channel(self, message: str):
+        """Send a message to the channel right away, only the chat queue should call this"""
+        channel = self.get_channel(self.channel_name)
+        if not channel:
+            raise RuntimeError(f"Could not find channel: {self.channel_name}")
+        with tracer.span('chat_send'):
+            await channel.send(message)
 
     def handle_signal(self, signum, frame):
         """Handle system signals for graceful shutdown"""
@@ -339,12 +405,37 @@ class TwitchBot(commands.Bot):
                 for task in pending:
                     logger.warning(f"Task {task} did not complete in time")
 
+            # Stopping the timer loop stopped the periodic stream stats flush, save them one last time
+            if self.timers.cancel('stream_stats'):
+                try:
+                    await self.db.stream_stats_manager.flush()
+                except Exception as e:
+                    logger.error(f"Error flushing stream stats: {e}")
+
+            # Write out any pending user activity
+            try:
+                await self.user_tracker.flush()
+            except Exception as e:
+                logger.error(f"Error flushing user activity: {e}")
+
             # Ensure raid system is properly cleaned up
             if hasattr(self, 'raid_manager'):
                 try:
                     await self.raid_manager._reset_raid_data()
                 except Exception as e:
                     logger.error(f"Error cleaning up raid manager: {e}")
+
+            # Let dispatched moderation queue its deletes and timeouts first
+            try:
+                await asyncio.wait_for(self.moderation_pipeline.drain(), timeout=5)
+            except Exception as e:
+                logger.error(f"Error finishing moderation actions: {e}")
+
+            # Send whatever chat is still queued
+            try:
+                await self.chat_queue.drain(timeout=5)
+            except Exception as e:
+                logger.error(f"Error draining chat queue: {e}")
             
             # Final analytics update
             try:
@@ -0,0 +1,192 @@
+# core/chat_queue.py
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+import asyncio
+import logging
+import time
+
+from utils.windowed_stats import WindowedStats
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes, lower is sent first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+LANE_NAMES = {PRIORITY_HIGH: 'high', PRIORITY_NORMAL: 'normal', PRIORITY_LOW: 'low'}
+
+# Twitch chat limits per 30 seconds
+TWITCH_LIMITS = {False: 20, True: 100}
+TWITCH_WINDOW = 30.0
+
+class TokenBucket:
+    """Token bucket whose burst plus refill never exceeds `limit` sends in any `period`"""
+
+    def __init__(self, limit: int, period: float, burst_fraction: float = 0.25):
+        self.burst = max(1.0, limit * burst_fraction)
+        self.rate = (limit - self.burst) / period
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def time_until_available(self) -> float:
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+@dataclass
+class OutboundMessage:
+    text: str
+    priority: int
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+class ChatQueue:
+    """Central outbound chat queue with priority lanes, opt-in deduplication and Twitch rate pacing"""
+
+    def __init__(self, sender: Callable, is_moderator: bool = False, max_depth: int = 200):
+        self.sender = sender
+        self.is_moderator = is_moderator
+        self.max_depth = max_depth
+        self.bucket = TokenBucket(TWITCH_LIMITS[is_moderator], TWITCH_WINDOW)
+        self.lanes: Dict[int, deque] = {priority: deque() for priority in LANE_NAMES}
+        self._queued_texts: Dict[str, int] = {}
+        self._wakeup = asyncio.Event()
+        self.is_running = False
+        self.stats = {
+            'enqueued': 0,
+            'sent': 0,
+            'dropped': 0,
+            'deduplicated': 0,
+            'send_errors': 0
+        }
+        self.wait_ms = WindowedStats(500)
+
+    @property
+    def depth(self) -> int:
+        return sum(len(lane) for lane in self.lanes.values())
+
+    def enqueue(self, text: str, priority: int = PRIORITY_NORMAL, dedup: bool = False) -> bool:
+        """Queue a message, returns False if it was dropped.
+
+        With `dedup`, a message identical to one already queued is dropped as
+        a repeat. Only status lines should opt in, replies and mod commands
+        may legitimately repeat.
+        """
+        if dedup and text in self._queued_texts:
+            self.stats['deduplicated'] += 1
+            return False
+
+        if self.depth >= self.max_depth and not self._make_room(priority):
+            self.stats['dropped'] += 1
+            logger.warning(f"Chat queue full, dropping {LANE_NAMES[priority]} message")
+            return False
+
+        message = OutboundMessage(text=text, priority=priority)
+        self._queued_texts[text] = self._queued_texts.get(text, 0) + 1
+
+        self.lanes[priority].append(message)
+        self.stats['enqueued'] += 1
+        self._wakeup.set()
+        return True
+
+    def _make_room(self, priority: int) -> bool:
+        """Drop the oldest message from the lowest lane below `priority`"""
+        for lane_priority in sorted(self.lanes, reverse=True):
+            if lane_priority <= priority:
+                break
+            lane = self.lanes[lane_priority]
+            if lane:
+                self._forget(lane.popleft())
+                self.stats['dropped'] += 1
+                return True
+        return False
+
+    def _forget(self, message: OutboundMessage):
+        remaining = self._queued_texts.get(message.text, 0) - 1
+        if remaining > 0:
+            self._queued_texts[message.text] = remaining
+        else:
+            self._queued_texts.pop(message.text, None)
+
+    def _next_ready(self) -> Optional[OutboundMessage]:
+        for priority in sorted(self.lanes):
+            lane = self.lanes[priority]
+            if lane:
+                return lane.popleft()
+        return None
+
+    async def _send(self, message: OutboundMessage):
+        self._forget(message)
+        try:
+            await self.sender(message.text)
+            self.stats['sent'] += 1
+            self.wait_ms.append((time.monotonic() - message.enqueued_at) * 1000)
+        except Exception as e:
+            self.stats['send_errors'] += 1
+            logger.error(f"Error sending chat message: {e}")
+
+    async def run(self):
+        """Worker sending queued messages as the rate limit allows"""
+        self.is_running = True
+        try:
+            while self.is_running:
+                message = self._next_ready()
+                if message is None:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                wait = self.bucket.time_until_available()
+                if wait > 0:
+                    # Put it back at the front and sleep, a higher lane may arrive meanwhile
+                    self.lanes[message.priority].appendleft(message)
+                    await asyncio.sleep(wait)
+                    continue
+
+                self.bucket.try_acquire()
+                await self._send(message)
+        finally:
+            self.is_running = False
+
+    def stop(self):
+        self.is_running = False
+        self._wakeup.set()
+
+    async def drain(self, timeout: float = 5.0) -> int:
+        """Send what can be sent within `timeout`, returns messages left behind"""
+        deadline = time.monotonic() + timeout
+        while self.depth:
+            wait = self.bucket.time_until_available()
+            if time.monotonic() + wait > deadline:
+                break
+            if wait > 0:
+                await asyncio.sleep(wait)
+            message = self._next_ready()
+            self.bucket.try_acquire()
+            await self._send(message)
+        left = self.depth
+        if left:
+            logger.warning(f"Chat queue closed with {left} unsent messages")
+        return left
+
+    def get_metrics(self) -> Dict:
+        return {
+            'depth': self.depth,
+            'lanes': {LANE_NAMES[p]: len(lane) for p, lane in self.lanes.items()},
+            **self.stats,
+            'wait_ms': self.wait_ms.snapshot(),
+            'tokens': self.bucket.tokens,
+            'is_moderator': self.is_moderator
+        }
@@ -1,7 +1,6 @@
 # core/raid_cleanup.py
 
 import logging
-import asyncio
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Optional
 from sqlalchemy import text
@@ -12,7 +11,7 @@ class RaidCleanupManager:
     def __init__(self, bot):
         self.bot = bot
         self.is_running = False
-        self._task: Optional[asyncio.Task] = None
+        self._timer = None
         self.cleanup_interval = 300  # 5 minutes
         self.raid_timeout = 300      # 5 minutes
         self.history_retention = 30   # days
@@ -27,38 +26,33 @@ class RaidCleanupManager:
             return
 
         self.is_running = True
-        self._task = asyncio.create_task(self._cleanup_loop())
+        self._timer = self.bot.timers.call_every(
+            self.cleanup_interval, self._cleanup, name='raid:cleanup', delay=0
+        )
         logger.info("Raid cleanup system started")
 
     async def stop(self):
         """Stop the cleanup system"""
         self.is_running = False
-        if self._task:
-            self._task.cancel()
-            try:
-                await self._task
-            except asyncio.CancelledError:
-                pass
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
         logger.info("Raid cleanup system stopped")
 
-    async def _cleanup_loop(self):
-        """Main cleanup loop"""
-        while self.is_running:
-            try:
-                # Check for abandoned raids
-                await self._cleanup_abandoned_raids()
-                
-                # Clean up old raid history
-                await self._cleanup_raid_history()
-                
-                # Optimize database tables
-                await self._optimize_tables()
-                
-                await asyncio.sleep(self.cleanup_interval)
-                
-            except Exception as e:
-                logger.error(f"Error in cleanup loop: {e}")
-                await asyncio.sleep(60)
+    async def _cleanup(self):
+        """Run every cleanup_interval by the bot's timer service"""
+        try:
+            # Check for abandoned raids
+            await self._cleanup_abandoned_raids()
+            
+            # Clean up old raid history
+            await self._cleanup_raid_history()
+            
+            # Optimize database tables
+            await self._optimize_tables()
+            
+        except Exception as e:
+            logger.error(f"Error in cleanup loop: {e}")
 
     async def _cleanup_abandoned_raids(self):
         """Clean up abandoned or stuck raids"""
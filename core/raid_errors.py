@@ -23,6 +23,10 @@ class ValidationError(RaidError):
     """Error for validation failures"""
     pass
 
+class LedgerError(RaidError):
+    """Error for investment debits that could not be committed"""
+    pass
+
 class ErrorCode(Enum):
     # State Errors
     RAID_ALREADY_ACTIVE = "A raid is already in progress"
@@ -34,6 +38,7 @@ class ErrorCode(Enum):
     INVESTMENT_TOO_LOW = "Investment amount too low"
     INVESTMENT_TOO_HIGH = "Investment amount too high"
     INVESTMENT_WINDOW_CLOSED = "Investment window is closed"
+    DEBIT_FAILED = "Your investment could not be processed, please try again"
     
     # Participation Errors
     ALREADY_PARTICIPATING = "Already participating in raid"
@@ -0,0 +1,127 @@
+# core/raid_journal.py
+
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+INSERT_ENTRY = text("""
+    INSERT INTO raid_journal (raid_key, event, user_id, amount, data, created_at)
+    VALUES (:raid_key, :event, :user_id, :amount, :data, :created_at)
+""")
+
+# A raid without a settle or cancel event is still in flight, both lookups use idx_raid_journal_event
+SELECT_OPEN_RAIDS = text("""
+    SELECT s.raid_key
+    FROM raid_journal s
+    WHERE s.event = 'start'
+    AND NOT EXISTS (
+        SELECT 1 FROM raid_journal c
+        WHERE c.event IN ('settle', 'cancel') AND c.raid_key = s.raid_key
+    )
+    ORDER BY s.id
+""")
+
+SELECT_RAID_EVENTS = text("""
+    SELECT event, user_id, amount, data
+    FROM raid_journal
+    WHERE raid_key = :raid_key
+    ORDER BY id
+""")
+
+DELETE_CLOSED_RAIDS = text("""
+    DELETE FROM raid_journal
+    WHERE raid_key IN (
+        SELECT raid_key FROM raid_journal
+        WHERE event IN ('settle', 'cancel') AND created_at < :cutoff
+    )
+""")
+
+@dataclass
+class RaidReplay:
+    """State of one raid rebuilt from its journal"""
+    raid_key: str
+    start: Dict = field(default_factory=dict)
+    participants: Dict[str, Dict] = field(default_factory=dict)
+    multiplier: float = 1.5
+    launched: bool = False
+
+    def apply(self, event: str, user_id: Optional[str], amount: Optional[int], data: Dict):
+        if event == 'start':
+            self.start = data
+            self.multiplier = data.get('multiplier', self.multiplier)
+        elif event == 'join':
+            self.participants[user_id] = {
+                'username': data.get('username'),
+                'initial_investment': amount,
+                'total_investment': amount
+            }
+        elif event == 'invest' and user_id in self.participants:
+            self.participants[user_id]['total_investment'] += amount
+        elif event == 'refund' and user_id in self.participants:
+            # A refunded increase leaves the raider in the crew, a refunded join doesn't
+            participant = self.participants[user_id]
+            participant['total_investment'] -= amount or participant['total_investment']
+            if participant['total_investment'] <= 0:
+                del self.participants[user_id]
+        elif event == 'milestone':
+            self.multiplier = data['multiplier']
+        elif event == 'launch':
+            self.launched = True
+
+    @property
+    def investments(self) -> Dict[str, int]:
+        return {user_id: p['total_investment'] for user_id, p in self.participants.items()}
+
+class RaidJournal:
+    """Append-only log of raid events in SQLite, written as they happen"""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @staticmethod
+    def entry(raid_key: str, event: str, user_id: str = None, amount: int = None, **data) -> Dict:
+        """Build a journal row, extra keyword arguments are stored as JSON"""
+        return {
+            'raid_key': raid_key,
+            'event': event,
+            'user_id': user_id,
+            'amount': amount,
+            'data': json.dumps(data, default=str) if data else None,
+            'created_at': datetime.now(timezone.utc)
+        }
+
+    async def append(self, raid_key: str, event: str, user_id: str = None, amount: int = None, **data):
+        """Append one event in its own transaction"""
+        async with self.bot.db.session_scope() as session:
+            await self.append_in_session(session, [self.entry(raid_key, event, user_id, amount, **data)])
+
+    async def append_in_session(self, session, entries: List[Dict]):
+        """Append events as part of the caller's transaction"""
+        if entries:
+            await session.execute(INSERT_ENTRY, entries)
+
+    async def open_raids(self) -> List[RaidReplay]:
+        """Replay every raid that was started but never settled or cancelled"""
+        replays = []
+        async with self.bot.db.session_scope(readonly=True) as session:
+            result = await session.execute(SELECT_OPEN_RAIDS)
+            for (raid_key,) in result.all():
+                replay = RaidReplay(raid_key)
+                events = await session.execute(SELECT_RAID_EVENTS, {'raid_key': raid_key})
+                for event, user_id, amount, data in events.all():
+                    replay.apply(event, user_id, amount, json.loads(data) if data else {})
+                replays.append(replay)
+        return replays
+
+    async def prune(self, keep_days: int = 30) -> int:
+        """Drop the events of raids closed more than keep_days ago"""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=keep_days)
+        async with self.bot.db.session_scope() as session:
+            result = await session.execute(DELETE_CLOSED_RAIDS, {'cutoff': cutoff})
+            return result.rowcount
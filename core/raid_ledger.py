@@ -0,0 +1,94 @@
+# core/raid_ledger.py
+
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from core.raid_errors import LedgerError
+
+logger = logging.getLogger(__name__)
+
+class RaidLedger:
+    """Group-commits raid investment debits so concurrent joins share one transaction.
+
+    Each debit can carry a journal entry, which is written in the same
+    transaction only if the debit succeeds. A batch that fails to commit
+    raises LedgerError in each of its callers, so an error is never
+    reported as a balance that was too low.
+    """
+
+    def __init__(self, bot, journal=None):
+        self.bot = bot
+        self.journal = journal
+        self._pending: List[tuple] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self.stats = {'debits': 0, 'batches': 0, 'largest_batch': 0}
+
+    async def debit(self, user_id: str, amount: int, entry: Optional[Dict] = None) -> bool:
+        """Debit a raid investment, returns False if the user can't afford it.
+
+        Raises LedgerError if the debit could not be committed.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((user_id, amount, entry, future))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush())
+        return await future
+
+    async def _flush(self):
+        batch: List[tuple] = []
+        try:
+            # Let every join already scheduled on this loop pass add its debit
+            await asyncio.sleep(0)
+            while self._pending:
+                batch, self._pending = self._pending, []
+                try:
+                    balances = await self._commit(batch)
+                except LedgerError as e:
+                    for _, _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                self.stats['debits'] += len(batch)
+                self.stats['batches'] += 1
+                self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+                for (_, _, _, future), balance in zip(batch, balances):
+                    if not future.done():
+                        future.set_result(balance is not None)
+        finally:
+            # Cancelled or failed outside _commit, never leave a caller waiting
+            stranded, self._pending = batch + self._pending, []
+            for _, _, _, future in stranded:
+                if not future.done():
+                    future.set_exception(LedgerError("Raid ledger stopped before the debit was committed"))
+
+    async def _commit(self, batch: List[tuple]) -> List[Optional[int]]:
+        points_manager = self.bot.points_manager
+        debits = [{'user_id': user_id, 'amount': amount} for user_id, amount, _, _ in batch]
+        try:
+            async with self.bot.db.session_scope() as session:
+                balances = await points_manager.debit_in_session(session, debits)
+                if self.journal is not None:
+                    await self.journal.append_in_session(session, [
+                        entry for (_, _, entry, _), balance in zip(batch, balances)
+                        if entry is not None and balance is not None
+                    ])
+        except asyncio.CancelledError:
+            points_manager.debits_failed(debits)
+            raise
+        except Exception as e:
+            logger.error(f"Error debiting {len(batch)} raid investments: {e}")
+            points_manager.debits_failed(debits)
+            raise LedgerError(f"Could not commit {len(batch)} raid investments") from e
+
+        points_manager.debits_committed(debits, balances)
+        return balances
+
+    def get_stats(self) -> Dict:
+        batches = self.stats['batches']
+        return {
+            **self.stats,
+            'pending': len(self._pending),
+            'mean_batch': self.stats['debits'] / batches if batches else 0
+        }
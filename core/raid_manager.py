@@ -6,15 +6,26 @@ from typing import Dict, List, Optional
 import asyncio
 import logging
 import random
-from database.models import RaidHistory, RaidParticipant, PlayerRaidStats
+import uuid
+from database.models import PlayerRaidStats
 from sqlalchemy import select, text
 
-from core.raid_errors import ErrorHandler, RaidError, ErrorCode, RaidStateError, ValidationError
+from core.chat_queue import PRIORITY_HIGH
+from core.raid_errors import ErrorHandler, RaidError, ErrorCode, LedgerError, RaidStateError, ValidationError
+from core.raid_journal import RaidJournal
+from core.raid_ledger import RaidLedger
+from core.raid_rewards import RaidRewardManager
 from core.raid_validation import RaidValidator
 from core.raid_recovery import RaidRecoveryManager
 
 logger = logging.getLogger(__name__)
 
+# Named timers on the bot's TimerService, (delay, seconds left to announce) and the deadline
+RECRUITMENT_ANNOUNCEMENTS = (('raid:recruitment_60s', 60, 60), ('raid:recruitment_30s', 90, 30))
+RECRUITMENT_TIMER = 'raid:recruitment'
+RECRUITMENT_SECONDS = 120
+MILESTONE_TIMER = 'raid:milestone'
+
 class RaidState(Enum):
     INACTIVE = "INACTIVE"
     RECRUITING = "RECRUITING"
@@ -30,16 +41,23 @@ class RaidManager:
         self.current_raid = None
         self.participants = {}
         self._lock = asyncio.Lock()
+        # Joins whose debit is in flight, and a counter bumped whenever the raid resets
+        self._reservations: Dict[str, int] = {}
+        self._generation = 0
+        self.journal = RaidJournal(bot)
+        self.ledger = RaidLedger(bot, self.journal)
+        self.rewards = RaidRewardManager(bot, self.journal)
         self.validator = RaidValidator()
         self.recovery = RaidRecoveryManager(self)
         
         # Initialize raid-specific attributes
+        self.raid_key = None
+        self.raid_settled = False
         self.raid_ship_type = None
         self.raid_required_crew = None
         self.raid_start_time = None
         self.raid_viewer_count = None
         self.raid_multiplier = None
-        self._recruitment_task = None
         
         # Ship types based on viewer count
         self.ship_types = {
@@ -81,27 +99,33 @@ class RaidManager:
                     return False
 
                 # Initialize raid data
+                self.raid_key = uuid.uuid4().hex
+                self.raid_settled = False
                 self.raid_start_time = datetime.now(timezone.utc)
                 self.raid_ship_type = await self._select_ship_type(viewer_count)
                 self.raid_required_crew = self._calculate_required_crew(viewer_count)
                 self.raid_viewer_count = viewer_count
                 self.raid_multiplier = 1.5
+                self._setup_milestones()
                 
                 logger.info(f"Raid initialized - Ship: {self.raid_ship_type}, Required crew: {self.raid_required_crew}")
+
+                # Nothing is debited before the start is durable
+                await self.journal.append(
+                    self.raid_key, 'start',
+                    ship_type=self.raid_ship_type,
+                    required_crew=self.raid_required_crew,
+                    viewer_count=viewer_count,
+                    start_time=self.raid_start_time.isoformat(),
+                    multiplier=self.raid_multiplier
+                )
                 
                 # Set state to recruiting and clear any old data
                 self.state = RaidState.RECRUITING
                 self.participants.clear()
                 
-                # Start recruitment timer
-                if self._recruitment_task and not self._recruitment_task.done():
-                    self._recruitment_task.cancel()
-                    try:
-                        await self._recruitment_task
-                    except asyncio.CancelledError:
-                        pass
-                        
-                self._recruitment_task = asyncio.create_task(self._recruitment_timer())
+                # Start recruitment timers, replacing any left from an earlier raid
+                self._schedule_recruitment()
                 
                 # Announce raid start
                 await self._announce_raid_start()
@@ -110,7 +134,8 @@ class RaidManager:
 
             except Exception as e:
                 logger.error(f"Error starting raid: {e}", exc_info=True)
-                await self._reset_raid_data()
+                # The lock is already held here, so reset directly
+                await self._force_reset()
                 return False
             
     async def _reset_raid_data(self):
@@ -119,17 +144,7 @@ class RaidManager:
             async with self._lock:
                 logger.info("Starting raid data reset")
                 
-                # Cancel recruitment timer if it exists
-                if self._recruitment_task and not self._recruitment_task.done():
-                    logger.info("Cancelling recruitment task")
-                    self._recruitment_task.cancel()
-                    try:
-                        await asyncio.wait_for(self._recruitment_task, timeout=2.0)
-                    except (asyncio.CancelledError, asyncio.TimeoutError):
-                        logger.warning("Recruitment task cancellation timed out")
-                    self._recruitment_task = None
-
-                # Force immediate state reset
+                # Force immediate state reset, which also cancels the raid timers
                 await self._force_reset()
                 
                 # Verify state
@@ -160,58 +175,83 @@ class RaidManager:
         if self.raid_ship_type is None:
             return False, "No raid is currently active"
 
+        # Reserve the slot in memory, nothing under the lock waits on I/O
         async with self._lock:
-            try:
-                # Validate participant
-                is_valid, error_code = self.validator.validate_participant(
-                    user_id, 
-                    self.participants,
-                    self.state.name
-                )
-                
-                if not is_valid:
-                    return False, str(error_code.value if error_code else "Invalid participant")
+            if user_id in self._reservations:
+                return False, str(ErrorCode.ALREADY_PARTICIPATING.value)
+
+            # Validate participant
+            is_valid, error_code = self.validator.validate_participant(
+                user_id, 
+                self.participants,
+                self.state.name
+            )
+            
+            if not is_valid:
+                return False, str(error_code.value if error_code else "Invalid participant")
 
-                # Validate investment
-                current_points = await self.bot.points_manager.get_points(user_id)
-                is_valid, error_code = self.validator.validate_investment(
-                    investment,
-                    current_points
-                )
-                
-                if not is_valid:
-                    return False, str(error_code.value if error_code else "Invalid investment")
+            # Validate investment limits, the balance is checked by the debit
+            is_valid, error_code = self.validator.validate_investment(
+                investment,
+                None
+            )
+            
+            if not is_valid:
+                return False, str(error_code.value if error_code else "Invalid investment")
 
-                # Add participant
-                self.participants[user_id] = {
-                    'username': username,
-                    'initial_investment': investment,
-                    'total_investment': investment
-                }
+            self._reservations[user_id] = investment
+            generation = self._generation
+            raid_key = self.raid_key
 
-                # Update points
-                await self.bot.points_manager.remove_points(
-                    user_id,
-                    investment,
-                    "Raid investment"
-                )
-                
-                # Announce new crew member
-                await self.bot.raid_messages.announce_crew_joined(
-                    username=username,
-                    current=len(self.participants),
-                    needed=self.raid_required_crew,
-                    investment=investment
+        try:
+            # Concurrent joins share one debit transaction, journaled with the debit
+            entry = self.journal.entry(raid_key, 'join', user_id, investment, username=username)
+            if not await self.ledger.debit(user_id, investment, entry):
+                return False, str(ErrorCode.INSUFFICIENT_POINTS.value)
+
+            async with self._lock:
+                still_open = (
+                    generation == self._generation and
+                    self.state in (RaidState.RECRUITING, RaidState.MILESTONE)
                 )
+                if still_open:
+                    self.participants[user_id] = {
+                        'username': username,
+                        'initial_investment': investment,
+                        'total_investment': investment
+                    }
+                    current = len(self.participants)
+                    needed = self.raid_required_crew
+                    milestone = self._check_milestone()
+
+            if not still_open:
+                # The raid closed while the debit was in flight
+                await self.rewards.refund_participant(raid_key, user_id, investment, "Raid closed - refund")
+                return False, "The raid is no longer recruiting"
+
+            # Announce new crew member in the next summary
+            self.bot.raid_messages.record_crew_join(
+                username=username,
+                current=current,
+                needed=needed,
+                investment=investment
+            )
+            if milestone:
+                await self._journal('milestone', raid_key, multiplier=milestone['multiplier'])
+                await self._announce_milestone(milestone)
 
-                await self._check_milestone()
-                
-                return True, "Successfully joined the raid!"
+            return True, "Successfully joined the raid!"
 
-            except Exception as e:
-                logger.error(f"Error joining raid: {e}")
-                await self.recovery.handle_error(e)
-                return False, "Error joining raid"
+        except LedgerError as e:
+            # The debit was rolled back, nothing to recover
+            logger.error(f"Raid join debit failed for {user_id}: {e}")
+            return False, str(ErrorCode.DEBIT_FAILED.value)
+        except Exception as e:
+            logger.error(f"Error joining raid: {e}")
+            await self.recovery.handle_error(e)
+            return False, "Error joining raid"
+        finally:
+            self._reservations.pop(user_id, None)
             
     async def _select_ship_type(self, viewer_count: int) -> str:
         """Select appropriate ship type based on viewer count"""
@@ -230,32 +270,33 @@ class RaidManager:
             return 2
         return max(2, int(viewer_count * 0.1))
 
-    async def _recruitment_timer(self):
-        """Handle recruitment phase timing"""
+    def _schedule_recruitment(self):
+        """Schedule the time-left announcements and the end of recruitment"""
+        timers = self.bot.timers
+        generation = self._generation
+        for name, delay, seconds_left in RECRUITMENT_ANNOUNCEMENTS:
+            timers.call_later(delay, self._announce_recruitment_left, generation, seconds_left, name=name)
+        timers.call_later(RECRUITMENT_SECONDS, self._recruitment_finished, generation, name=RECRUITMENT_TIMER)
+
+    def _cancel_timers(self):
+        timers = self.bot.timers
+        for name, _, _ in RECRUITMENT_ANNOUNCEMENTS:
+            timers.cancel(name)
+        timers.cancel(RECRUITMENT_TIMER)
+        timers.cancel(MILESTONE_TIMER)
+
+    async def _announce_recruitment_left(self, generation: int, seconds_left: int):
+        if generation == self._generation and self.state == RaidState.RECRUITING:
+            await self._announce_time_remaining(seconds_left)
+
+    async def _recruitment_finished(self, generation: int):
+        """Handle the end of the recruitment phase"""
         try:
-            # Announce at 60 seconds remaining
-            await asyncio.sleep(60)
-            if self.state == RaidState.RECRUITING:
-                await self._announce_time_remaining(60)
-
-            # Announce at 30 seconds remaining
-            await asyncio.sleep(30)
-            if self.state == RaidState.RECRUITING:
-                await self._announce_time_remaining(30)
-
-            # Final 30 seconds
-            await asyncio.sleep(30)
-            
-            logger.info("Recruitment timer finished - initiating raid end")
-            
-            # Important: Use _end_raid instead of _complete_raid
-            if self.state == RaidState.RECRUITING:
-                async with self._lock:
+            async with self._lock:
+                # A raid ended or reset meanwhile must not be completed again
+                if generation == self._generation and self.state == RaidState.RECRUITING:
+                    logger.info("Recruitment timer finished - initiating raid end")
                     await self._handle_raid_completion()
-
-        except asyncio.CancelledError:
-            logger.info("Recruitment timer cancelled")
-            raise
         except Exception as e:
             logger.error(f"Error in recruitment timer: {e}")
             await self._handle_raid_error()
@@ -271,6 +312,7 @@ class RaidManager:
                 
                 # Transition states
                 self.state = RaidState.LAUNCHING
+                await self._journal('launch')
                 await self._announce_raid_launching()
                 await asyncio.sleep(2)
 
@@ -303,19 +345,14 @@ class RaidManager:
             try:
                 logger.info(f"Ending raid with {len(self.participants)} participants (need {self.raid_required_crew})")
                 
-                # Cancel the recruitment timer first
-                if self._recruitment_task and not self._recruitment_task.done():
-                    self._recruitment_task.cancel()
-                    try:
-                        await asyncio.wait_for(self._recruitment_task, timeout=1.0)
-                    except (asyncio.CancelledError, asyncio.TimeoutError):
-                        pass
-                    self._recruitment_task = None
+                # Cancel the recruitment timers first
+                self._cancel_timers()
 
                 # Check if we have enough participants
                 if len(self.participants) >= self.raid_required_crew:
                     logger.info("Sufficient participants - completing raid")
                     self.state = RaidState.LAUNCHING
+                    await self._journal('launch')
                     await self._announce_raid_launching()
                     await asyncio.sleep(5)
 
@@ -352,14 +389,16 @@ class RaidManager:
         try:
             logger.info("Performing force reset of raid state")
             
-            # Cancel any existing recruitment timer
-            if hasattr(self, '_recruitment_task') and self._recruitment_task:
-                if not self._recruitment_task.done():
-                    self._recruitment_task.cancel()
-                self._recruitment_task = None
+            # Cancel any pending raid timers
+            self._cancel_timers()
+
+            self.bot.raid_messages.discard_crew_joins()
 
             # Reset all state variables
+            self._generation += 1
             self.state = RaidState.INACTIVE
+            self.raid_key = None
+            self.raid_settled = False
             self.raid_ship_type = None
             self.raid_required_crew = None
             self.raid_start_time = None
@@ -393,7 +432,7 @@ class RaidManager:
                     self.current_raid['multiplier'] = new_multiplier
                     self.state = RaidState.MILESTONE
                     await self._announce_milestone(new_multiplier)
-                    asyncio.create_task(self._milestone_timer())
+                    self.bot.timers.call_later(30, self._end_milestone_window, name=MILESTONE_TIMER)
                 else:
                     logger.warning(f"Invalid state transition to milestone: {error_code}")
 
@@ -401,10 +440,8 @@ class RaidManager:
             logger.error(f"Error checking milestone: {e}")
             await self.recovery.handle_error(e)
     
-    async def _milestone_timer(self):
-        """Handle milestone investment window"""
-        await asyncio.sleep(30)  # 30 second investment window
-        
+    async def _end_milestone_window(self):
+        """Close the 30 second milestone investment window"""
         async with self._lock:
             if self.state == RaidState.MILESTONE:
                 self.state = RaidState.RECRUITING
@@ -413,48 +450,69 @@ class RaidManager:
     async def increase_investment(self, user_id: str, additional_amount: int) -> tuple[bool, str]:
         """Handle investment increase with validation"""
         async with self._lock:
-            try:
-                # Validate increase
-                is_valid, error_code = self.validator.validate_investment_increase(
-                    user_id,
-                    additional_amount,
-                    self.participants,
-                    str(self.state)
-                )
-                if not is_valid:
-                    return False, ErrorHandler.get_error_message(error_code)
+            if user_id in self._reservations:
+                return False, "Your previous investment is still being processed"
+
+            # Validate increase
+            is_valid, error_code = self.validator.validate_investment_increase(
+                user_id,
+                additional_amount,
+                self.participants,
+                self.state.name
+            )
+            if not is_valid:
+                return False, ErrorHandler.get_error_message(error_code)
 
-                current_points = await self.bot.points_manager.get_points(user_id)
-                is_valid, error_code = self.validator.validate_investment(
-                    additional_amount,
-                    current_points,
-                    self.participants[user_id]['total_investment']
-                )
-                if not is_valid:
-                    return False, ErrorHandler.get_error_message(error_code, {'current_points': current_points})
+            is_valid, error_code = self.validator.validate_investment(
+                additional_amount,
+                None,
+                self.participants[user_id]['total_investment']
+            )
+            if not is_valid:
+                return False, ErrorHandler.get_error_message(error_code)
 
-                # Update investment
-                participant = self.participants[user_id]
-                participant['total_investment'] += additional_amount
+            self._reservations[user_id] = additional_amount
+            generation = self._generation
+            raid_key = self.raid_key
 
-                # Update points
-                await self.bot.points_manager.remove_points(
-                    user_id,
-                    additional_amount,
-                    "Raid investment increase"
+        try:
+            entry = self.journal.entry(raid_key, 'invest', user_id, additional_amount)
+            if not await self.ledger.debit(user_id, additional_amount, entry):
+                current_points = await self.bot.points_manager.get_points(user_id)
+                return False, ErrorHandler.get_error_message(
+                    ErrorCode.INSUFFICIENT_POINTS, {'current_points': current_points}
                 )
 
-                await self._announce_investment_increased(
-                    participant['username'],
-                    additional_amount
+            async with self._lock:
+                participant = self.participants.get(user_id)
+                still_open = (
+                    generation == self._generation and
+                    self.state == RaidState.MILESTONE and
+                    participant is not None
                 )
-                
-                return True, f"Investment increased by {additional_amount} points!"
+                if still_open:
+                    participant['total_investment'] += additional_amount
 
-            except Exception as e:
-                logger.error(f"Error increasing investment: {e}")
-                await self.recovery.handle_error(e)
-                return False, "Error increasing investment"
+            if not still_open:
+                await self.rewards.refund_participant(raid_key, user_id, additional_amount, "Raid closed - refund")
+                return False, ErrorHandler.get_error_message(ErrorCode.INVESTMENT_WINDOW_CLOSED)
+
+            await self._announce_investment_increased(
+                participant['username'],
+                additional_amount
+            )
+            
+            return True, f"Investment increased by {additional_amount} points!"
+
+        except LedgerError as e:
+            logger.error(f"Raid investment debit failed for {user_id}: {e}")
+            return False, ErrorHandler.get_error_message(ErrorCode.DEBIT_FAILED)
+        except Exception as e:
+            logger.error(f"Error increasing investment: {e}")
+            await self.recovery.handle_error(e)
+            return False, "Error increasing investment"
+        finally:
+            self._reservations.pop(user_id, None)
 
     async def _complete_raid(self):
         """Complete the raid with error handling and reward distribution"""
@@ -483,6 +541,7 @@ class RaidManager:
                 try:
                     # State transition
                     self.state = RaidState.LAUNCHING
+                    await self._journal('launch')
                     await self._announce_raid_launching()
                     await asyncio.sleep(5)
 
@@ -516,62 +575,19 @@ class RaidManager:
             await self._handle_raid_error()
 
     async def _distribute_rewards(self):
-        """Handle reward distribution"""
-        total_plunder = 0
-        participant_rewards = []
-
-        async with self.bot.db.session_scope() as session:
-            # Create raid history record
-            raid_record = RaidHistory(
-                start_time=self.raid_start_time,
-                end_time=datetime.now(timezone.utc),
-                ship_type=self.raid_ship_type,
-                viewer_count=self.raid_viewer_count,
-                required_crew=self.raid_required_crew,
-                final_crew=len(self.participants),
-                final_multiplier=self.raid_multiplier,
-                total_plunder=0
-            )
-            session.add(raid_record)
-            await session.flush()
-
-            # Process rewards for each participant
-            for user_id, participant in self.participants.items():
-                investment = participant['total_investment']
-                reward = int(investment * self.raid_multiplier)
-                total_plunder += reward
-                
-                # Record participation and prepare rewards
-                participation = RaidParticipant(
-                    raid_id=raid_record.id,
-                    user_id=user_id,
-                    initial_investment=participant['initial_investment'],
-                    final_investment=investment,
-                    reward=reward
-                )
-                session.add(participation)
-                
-                participant_rewards.append({
-                    'user_id': user_id,
-                    'username': participant['username'],
-                    'reward': reward
-                })
-
-            # Update total plunder
-            raid_record.total_plunder = total_plunder
-            await session.commit()
-
-        # Distribute rewards after successful database transaction
-        for reward_info in participant_rewards:
-            try:
-                await self.bot.points_manager.add_points(
-                    reward_info['user_id'],
-                    reward_info['reward'],
-                    f"Raid reward ({self.raid_ship_type})"
-                )
-            except Exception as e:
-                logger.error(f"Error distributing reward to {reward_info['username']}: {e}")
-
+        """Settle the raid in one transaction, returns the total plunder"""
+        total_plunder = await self.rewards.settle_raid(
+            {
+                'raid_key': self.raid_key,
+                'start_time': self.raid_start_time,
+                'ship_type': self.raid_ship_type,
+                'viewer_count': self.raid_viewer_count,
+                'required_crew': self.raid_required_crew,
+                'multiplier': self.raid_multiplier
+            },
+            self.participants
+        )
+        self.raid_settled = True
         return total_plunder
 
     async def _handle_raid_error(self):
@@ -579,18 +595,18 @@ class RaidManager:
         try:
             logger.info("Handling raid error and cleaning up")
             
-            # Process refunds first
-            if self.participants:
-                for user_id, participant in self.participants.items():
-                    try:
-                        await self.bot.points_manager.add_points(
-                            user_id,
-                            participant['total_investment'],
-                            "Raid cancelled - refund"
-                        )
-                        logger.info(f"Refunded {participant['total_investment']} points to {participant['username']}")
-                    except Exception as refund_error:
-                        logger.error(f"Error processing refund for {user_id}: {refund_error}")
+            # Refund everyone and close the raid in the journal in one transaction
+            if self.raid_settled:
+                logger.warning("Raid already settled, skipping refunds")
+            else:
+                try:
+                    await self.rewards.refund_raid(
+                        self.raid_key,
+                        {user_id: p['total_investment'] for user_id, p in self.participants.items()},
+                        "Raid cancelled - refund"
+                    )
+                except Exception as refund_error:
+                    logger.error(f"Error processing raid refunds: {refund_error}")
 
             # Announce the error
             await self._announce_raid_error()
@@ -601,6 +617,13 @@ class RaidManager:
             # Always force reset state
             await self._force_reset()
 
+    async def _journal(self, event: str, raid_key: Optional[str] = None, **data):
+        """Append a raid event, a journal failure is logged rather than failing the raid"""
+        try:
+            await self.journal.append(raid_key or self.raid_key, event, **data)
+        except Exception as e:
+            logger.error(f"Error journaling raid {event}: {e}")
+
     def reset_state(self):
         """Explicitly reset all raid state"""
         self.state = RaidState.INACTIVE
@@ -720,8 +743,8 @@ class RaidManager:
         except Exception as e:
             logger.error(f"Error announcing raid start: {e}")
 
-    async def _check_milestone(self) -> bool:
-        """Check if a new milestone has been reached"""
+    def _check_milestone(self) -> Optional[dict]:
+        """Apply a newly reached milestone, returns it so the caller can announce it"""
         try:
             participant_count = len(self.participants)
             
@@ -732,14 +755,13 @@ class RaidManager:
                 if (participant_count >= milestone['count'] and 
                     self.raid_multiplier < milestone['multiplier']):
                     self.raid_multiplier = milestone['multiplier']
-                    await self._announce_milestone(milestone)
-                    return True
+                    return milestone
             
-            return False
+            return None
 
         except Exception as e:
             logger.error(f"Error checking milestone: {e}")
-            return False
+            return None
         
     def _setup_milestones(self):
         """Setup raid milestones based on viewer count"""
@@ -780,6 +802,8 @@ class RaidManager:
     async def _announce_raid_launching(self) -> None:
         """Announce raid launching"""
         try:
+            # Latest crew joins go out before the launch
+            await self.bot.raid_messages.flush_crew_joins()
             await self.bot.raid_messages.announce_raid_launching({
                 'ship_type': self.raid_ship_type,
                 'crew_size': len(self.participants),
@@ -797,7 +821,8 @@ class RaidManager:
             # Fallback message
             try:
                 await self.bot.send_chat_message(
-                    f"Raid successful! Total plunder: {data['total_plunder']} points!"
+                    f"Raid successful! Total plunder: {data['total_plunder']} points!",
+                    priority=PRIORITY_HIGH
                 )
             except Exception as e2:
                 logger.error(f"Error sending fallback success message: {e2}")
@@ -812,7 +837,10 @@ class RaidManager:
             logger.error(f"Error announcing raid failure: {e}")
             # Fallback message if the fancy announcement fails
             try:
-                await self.bot.send_chat_message("Raid cancelled! All investments have been refunded.")
+                await self.bot.send_chat_message(
+                    "Raid cancelled! All investments have been refunded.",
+                    priority=PRIORITY_HIGH
+                )
             except Exception as e2:
                 logger.error(f"Error sending fallback message: {e2}")
 
@@ -832,7 +860,7 @@ class RaidManager:
 
     async def _announce_player_joined(self, username: str):
         """Announce when a player joins the raid"""
-        await self.bot.raid_messages.announce_crew_joined(
+        self.bot.raid_messages.record_crew_join(
             username=username,
             current=len(self.participants),
             needed=self.raid_required_crew
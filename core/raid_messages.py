@@ -1,11 +1,14 @@
 # core/raid_messages.py
 
+import asyncio
 import logging
 import random
 from typing import Dict, Optional, List
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
+from core.chat_queue import PRIORITY_HIGH, PRIORITY_LOW
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -21,8 +24,12 @@ class MessageContext:
     time_remaining: Optional[int] = None
 
 class RaidMessageHandler:
-    def __init__(self, bot):
+    def __init__(self, bot, join_interval: float = 2.0):
         self.bot = bot
+        # Joins are collected and announced as one summary per interval
+        self.join_interval = join_interval
+        self._pending_joins: List[tuple] = []
+        self._join_flush: Optional[asyncio.Task] = None
         self._setup_message_templates()
 
     def _setup_message_templates(self):
@@ -123,14 +130,14 @@ class RaidMessageHandler:
                 nation=random.choice(self.nations)
             )
             
-            await self.bot.send_chat_message(message)
+            await self.bot.send_chat_message(message, priority=PRIORITY_HIGH)
             
             # Follow up with crew requirements
             crew_message = (
                 f"🏴‍☠️ Seeking {raid_data['required_crew']} brave souls! "
                 f"Join with !raid <amount> (100-1000 points)"
             )
-            await self.bot.send_chat_message(crew_message)
+            await self.bot.send_chat_message(crew_message, priority=PRIORITY_HIGH)
 
         except Exception as e:
             logger.error(f"Error announcing raid start: {e}")
@@ -138,26 +145,66 @@ class RaidMessageHandler:
     async def announce_raid_active(self, crew_count: int, ship_type: str):
         """Announce that raid is now active"""
         message = f"🚀 The raid on the {ship_type} begins! {crew_count} brave souls against destiny!"
-        await self.bot.send_chat_message(message)
+        await self.bot.send_chat_message(message, priority=PRIORITY_HIGH)
 
 
+    def record_crew_join(self, username: str, current: int, needed: int, investment: int = None):
+        """Record a new crew member for the next summary, never waits on chat"""
+        message = random.choice(self.crew_join_messages).format(
+            username=username,
+            investment=investment,
+            current=current,
+            needed=needed
+        )
+        self._pending_joins.append((username, current, needed, message))
+        if self._join_flush is None or self._join_flush.done():
+            self._join_flush = asyncio.create_task(self._flush_crew_joins_later())
+
     async def announce_crew_joined(self, username: str, current: int, needed: int, investment: int = None):
         """Announce when a new crew member joins"""
+        self.record_crew_join(username, current, needed, investment)
+
+    async def _flush_crew_joins_later(self):
+        await asyncio.sleep(self.join_interval)
+        # Joins arriving while this flush sends start the next interval
+        self._join_flush = None
+        await self.flush_crew_joins()
+
+    async def flush_crew_joins(self) -> int:
+        """Send one summary line for the joins recorded so far, returns how many it covered"""
+        joins, self._pending_joins = self._pending_joins, []
+        if not joins:
+            return 0
         try:
-            message = random.choice(self.crew_join_messages).format(
-                username=username,
-                investment=investment,
-                current=current,
-                needed=needed
-            )
-            await self.bot.send_chat_message(message)
+            await self.bot.send_chat_message(self.render_crew_joins(joins))
 
             # If almost full crew, add urgency
-            if current == needed - 1:
-                await self.bot.send_chat_message(f"⚠️ One more crew member needed!")
+            current = max(current for _, current, _, _ in joins)
+            if current == joins[-1][2] - 1:
+                await self.bot.send_chat_message("⚠️ One more crew member needed!", dedup=True)
 
         except Exception as e:
-            logger.error(f"Error announcing crew join: {e}")
+            logger.error(f"Error announcing crew joins: {e}")
+        return len(joins)
+
+    def discard_crew_joins(self):
+        """Drop unannounced joins when the raid is reset"""
+        if self._join_flush is not None and not self._join_flush.done():
+            self._join_flush.cancel()
+        self._join_flush = None
+        self._pending_joins.clear()
+
+    @staticmethod
+    def render_crew_joins(joins: List[tuple]) -> str:
+        """One join keeps its flavor text, several are merged into one line with the crew count"""
+        if len(joins) == 1:
+            return joins[0][3]
+        names = [username for username, _, _, _ in joins]
+        current = max(current for _, current, _, _ in joins)
+        needed = joins[-1][2]
+        if len(names) > 8:
+            names = names[:8] + [f"{len(joins) - 8} more"]
+        return f"⚔️ {', '.join(names)} joined the crew! ({current}/{needed})"
 
     async def announce_investment(self, context: MessageContext) -> None:
         """Announce when someone invests in the raid"""
@@ -177,18 +224,21 @@ class RaidMessageHandler:
         except Exception as e:
             logger.error(f"Error announcing investment: {e}")
 
-    async def announce_milestone(self, context: MessageContext) -> None:
+    async def announce_milestone(self, description: str, multiplier: float) -> None:
         """Announce reaching a raid milestone"""
         try:
-            message = random.choice(self.milestone_messages).format(**context.__dict__)
-            await self.bot.send_message(message)
+            message = random.choice(self.milestone_messages).format(
+                description=description,
+                multiplier=multiplier
+            )
+            await self.bot.send_chat_message(message, priority=PRIORITY_HIGH)
             
             # Announce investment window
             window_message = (
                 f"💫 30-second bonus investment window! "
                 f"Use !invest <amount> to increase your stake!"
             )
-            await self.bot.send_message(window_message)
+            await self.bot.send_chat_message(window_message, priority=PRIORITY_HIGH)
 
         except Exception as e:
             logger.error(f"Error announcing milestone: {e}")
@@ -212,7 +262,7 @@ class RaidMessageHandler:
     async def announce_raid_failure(self, data: dict) -> None:
         """Announce when a raid fails or is cancelled"""
         message = random.choice(self.raid_failure_messages).format(**data)
-        await self.bot.send_chat_message(message)
+        await self.bot.send_chat_message(message, priority=PRIORITY_HIGH)
 
     async def announce_time_remaining(self, time_remaining: int, raid_data: dict) -> None:
         """Announce remaining time in raid"""
@@ -221,7 +271,7 @@ class RaidMessageHandler:
             f"⏳ {time_remaining} seconds remaining! {raid_data['current_crew']}/{raid_data['required_crew']} crew members! "
             f"Need {remaining_crew} more to raid the {raid_data['ship_type']}!"
         )
-        await self.bot.send_chat_message(message)
+        await self.bot.send_chat_message(message, priority=PRIORITY_LOW)
 
     async def announce_launch(self, context: MessageContext) -> None:
         """Announce raid launching"""
@@ -236,7 +286,7 @@ class RaidMessageHandler:
         """Announce successful raid completion"""
         try:
             message = random.choice(self.success_messages).format(plunder=total_plunder, **data)
-            await self.bot.send_chat_message(message)
+            await self.bot.send_chat_message(message, priority=PRIORITY_HIGH)
 
         except Exception as e:
             logger.error(f"Error announcing success: {e}")
@@ -63,59 +63,36 @@ class RaidRecoveryManager:
             return False
 
     async def recover_from_crash(self) -> bool:
-        """Recover raid state after bot crash/restart"""
+        """Settle or refund raids left open by a crash, replayed from the raid journal"""
+        raid_manager = self.bot.raid_manager
         try:
-            async with self.bot.db.session_scope() as session:
-                # Find any incomplete raids
-                result = await session.execute(
-                    text("""
-                        SELECT id, start_time, ship_type, required_crew
-                        FROM raid_history
-                        WHERE end_time IS NULL
-                        AND start_time > :cutoff
-                        ORDER BY start_time DESC
-                        LIMIT 1
-                    """),
-                    {'cutoff': datetime.now(timezone.utc) - timedelta(hours=1)}
-                )
-                raid = await result.fetchone()
-
-                if not raid:
-                    return True  # No recovery needed
-
-                # Get participants for the incomplete raid
-                result = await session.execute(
-                    text("""
-                        SELECT user_id, initial_investment, final_investment
-                        FROM raid_participants
-                        WHERE raid_id = :raid_id
-                    """),
-                    {'raid_id': raid[0]}
-                )
-                participants = await result.fetchall()
-
-                # Process refunds
-                for participant in participants:
-                    await self.bot.raid_points_manager.refund_investment(
-                        participant[0],
-                        participant[2],  # final_investment
-                        "Raid recovery after crash"
+            replays = await raid_manager.journal.open_raids()
+            for replay in replays:
+                if replay.launched and replay.participants:
+                    # The crew was complete and launching, pay out as the raid would have
+                    start = replay.start
+                    plunder = await raid_manager.rewards.settle_raid(
+                        {
+                            'raid_key': replay.raid_key,
+                            'start_time': datetime.fromisoformat(start['start_time']),
+                            'ship_type': start['ship_type'],
+                            'viewer_count': start['viewer_count'],
+                            'required_crew': start['required_crew'],
+                            'multiplier': replay.multiplier
+                        },
+                        replay.participants
                     )
+                    logger.info(f"Recovered raid {replay.raid_key}: settled {plunder} plunder")
+                else:
+                    refunded = await raid_manager.rewards.refund_raid(
+                        replay.raid_key, replay.investments, "Raid recovery after crash"
+                    )
+                    logger.info(f"Recovered raid {replay.raid_key}: refunded {refunded} points")
 
-                # Mark raid as failed
-                await session.execute(
-                    text("""
-                        UPDATE raid_history
-                        SET end_time = :now, status = 'failed'
-                        WHERE id = :raid_id
-                    """),
-                    {
-                        'now': datetime.now(timezone.utc),
-                        'raid_id': raid[0]
-                    }
-                )
-
-                return True
+            pruned = await raid_manager.journal.prune()
+            if pruned:
+                logger.info(f"Pruned {pruned} raid journal entries")
+            return True
 
         except Exception as e:
             logger.error(f"Error during crash recovery: {e}")
@@ -264,8 +241,7 @@ class RaidRecoveryManager:
                     """),
                     {'start_time': raid_instance.start_time}
                 )
-                count = (await result.first())[0]
-                return count > 0
+                return result.scalar() > 0
 
         except Exception as e:
             logger.error(f"Error checking partial distribution: {e}")
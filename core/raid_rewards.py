@@ -1,17 +1,56 @@
 # core/raid_rewards.py
 import logging
 import asyncio
+import time
 from typing import Dict, Optional, Tuple
 from datetime import datetime, timezone
 from sqlalchemy import text
 from core.raid_states import RaidState
+from utils.tracing import tracer
 
 
 logger = logging.getLogger(__name__)
 
+INSERT_RAID_HISTORY = text("""
+    INSERT INTO raid_history (
+        start_time, end_time, ship_type, viewer_count,
+        required_crew, final_crew, final_multiplier, total_plunder
+    ) VALUES (
+        :start_time, :end_time, :ship_type, :viewer_count,
+        :required_crew, :final_crew, :final_multiplier, :total_plunder
+    ) RETURNING id
+""")
+
+INSERT_RAID_PARTICIPANT = text("""
+    INSERT INTO raid_participants (
+        raid_id, user_id, initial_investment,
+        final_investment, reward
+    ) VALUES (
+        :raid_id, :user_id, :initial_investment,
+        :final_investment, :reward
+    )
+""")
+
+UPSERT_PLAYER_STATS = text("""
+    INSERT INTO player_raid_stats (
+        user_id, total_raids, successful_raids,
+        total_invested, total_plunder, biggest_reward
+    ) VALUES (
+        :user_id, 1, 1,
+        :investment, :reward, :reward
+    )
+    ON CONFLICT (user_id) DO UPDATE SET
+        total_raids = player_raid_stats.total_raids + 1,
+        successful_raids = player_raid_stats.successful_raids + 1,
+        total_invested = player_raid_stats.total_invested + excluded.total_invested,
+        total_plunder = player_raid_stats.total_plunder + excluded.total_plunder,
+        biggest_reward = MAX(player_raid_stats.biggest_reward, excluded.biggest_reward)
+""")
+
 class RaidRewardManager:
-    def __init__(self, bot):
+    def __init__(self, bot, journal=None):
         self.bot = bot
+        self.journal = journal
         self._lock = asyncio.Lock()
 
     async def distribute_rewards(self, raid_instance):
@@ -41,82 +80,101 @@ class RaidRewardManager:
             logger.error(f"Error distributing rewards: {e}")
             return False, f"Error: {str(e)}"
         
-    async def _record_raid_history(self, session, raid_instance) -> Optional[int]:
-        """Record raid history and return raid_id"""
+    async def settle_raid(self, raid: Dict, participants: Dict[str, Dict]) -> int:
+        """Write history, participants, stats and reward credits in one transaction.
+
+        Returns the total plunder. Nothing is paid out unless everything commits,
+        so on error the caller can still refund every investment.
+        """
+        multiplier = raid['multiplier']
+        rewards = {
+            user_id: int(participant['total_investment'] * multiplier)
+            for user_id, participant in participants.items()
+        }
+        total_plunder = sum(rewards.values())
+        credits = [{'user_id': user_id, 'amount': reward} for user_id, reward in rewards.items()]
+        points_manager = self.bot.points_manager
+
+        start = time.perf_counter()
         try:
-            result = await session.execute(
-                text("""
-                    INSERT INTO raid_history (
-                        start_time, end_time, ship_type, viewer_count,
-                        required_crew, final_crew, final_multiplier, total_plunder
-                    ) VALUES (
-                        :start_time, :end_time, :ship_type, :viewer_count,
-                        :required_crew, :final_crew, :final_multiplier, :total_plunder
-                    ) RETURNING id
-                """),
-                {
-                    'start_time': raid_instance.start_time,
-                    'end_time': datetime.now(timezone.utc),
-                    'ship_type': raid_instance.ship_type,
-                    'viewer_count': len(raid_instance.participants),
-                    'required_crew': raid_instance.required_crew,
-                    'final_crew': len(raid_instance.participants),
-                    'final_multiplier': raid_instance.current_multiplier,
-                    'total_plunder': sum(raid_instance.get_rewards().values())
-                }
-            )
-            row = await result.first()
-            return row[0] if row else None
-            
-        except Exception as e:
-            logger.error(f"Error recording raid history: {e}")
-            return None
-
-    async def _record_participants(self, session, raid_id: int, raid_instance, rewards: Dict[str, int]):
-        """Record all participant data"""
-        for user_id, participant in raid_instance.participants.items():
-            await session.execute(
-                text("""
-                    INSERT INTO raid_participants (
-                        raid_id, user_id, initial_investment,
-                        final_investment, reward
-                    ) VALUES (
-                        :raid_id, :user_id, :initial_investment,
-                        :final_investment, :reward
-                    )
-                """),
-                {
-                    'raid_id': raid_id,
-                    'user_id': user_id,
-                    'initial_investment': participant.initial_investment,
-                    'final_investment': participant.total_investment,
-                    'reward': rewards[user_id]
-                }
-            )
+            with tracer.span('raid_settlement'):
+                async with self.bot.db.session_scope() as session:
+                    result = await session.execute(INSERT_RAID_HISTORY, {
+                        'start_time': raid['start_time'],
+                        'end_time': datetime.now(timezone.utc),
+                        'ship_type': raid['ship_type'],
+                        'viewer_count': raid['viewer_count'],
+                        'required_crew': raid['required_crew'],
+                        'final_crew': len(participants),
+                        'final_multiplier': multiplier,
+                        'total_plunder': total_plunder
+                    })
+                    raid_id = result.scalar()
 
-    async def _update_player_stats(self, session, raid_instance, rewards: Dict[str, int]):
-        """Update player raid statistics"""
-        for user_id, reward in rewards.items():
-            participant = raid_instance.participants[user_id]
-            await session.execute(
-                text("""
-                    INSERT INTO player_raid_stats (
-                        user_id, total_raids, successful_raids,
-                        total_invested, total_plunder, biggest_reward
-                    ) VALUES (
-                        :user_id, 1, 1,
-                        :investment, :reward, :reward
+                    await session.execute(INSERT_RAID_PARTICIPANT, [
+                        {
+                            'raid_id': raid_id,
+                            'user_id': user_id,
+                            'initial_investment': participant['initial_investment'],
+                            'final_investment': participant['total_investment'],
+                            'reward': rewards[user_id]
+                        }
+                        for user_id, participant in participants.items()
+                    ])
+                    await session.execute(UPSERT_PLAYER_STATS, [
+                        {
+                            'user_id': user_id,
+                            'investment': participant['total_investment'],
+                            'reward': rewards[user_id]
+                        }
+                        for user_id, participant in participants.items()
+                    ])
+                    await points_manager.credit_in_session(
+                        session, credits, f"Raid reward ({raid['ship_type']})"
                     )
-                    ON CONFLICT (user_id) DO UPDATE SET
-                        total_raids = player_raid_stats.total_raids + 1,
-                        successful_raids = player_raid_stats.successful_raids + 1,
-                        total_invested = player_raid_stats.total_invested + :investment,
-                        total_plunder = player_raid_stats.total_plunder + :reward,
-                        biggest_reward = GREATEST(player_raid_stats.biggest_reward, :reward)
-                """),
-                {
-                    'user_id': user_id,
-                    'investment': participant.total_investment,
-                    'reward': reward
-                }
-            )
\ No newline at end of file
+                    await self._journal_in_session(session, raid.get('raid_key'), 'settle',
+                                                   amount=total_plunder, raid_id=raid_id)
+        except Exception:
+            points_manager.credits_failed(credits)
+            raise
+
+        points_manager.credits_committed(credits)
+        logger.info(
+            f"Settled raid {raid_id}: {len(participants)} participants, {total_plunder} plunder "
+            f"in {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+        return total_plunder
+
+    async def refund_raid(self, raid_key: Optional[str], investments: Dict[str, int], reason: str) -> int:
+        """Refund every investment and close the raid in one transaction, returns the total refunded"""
+        return await self._refund(raid_key, 'cancel', investments, reason)
+
+    async def refund_participant(self, raid_key: Optional[str], user_id: str, amount: int, reason: str) -> int:
+        """Refund one investment that arrived after its raid closed"""
+        return await self._refund(raid_key, 'refund', {user_id: amount}, reason)
+
+    async def _refund(self, raid_key: Optional[str], event: str, investments: Dict[str, int], reason: str) -> int:
+        credits = [{'user_id': user_id, 'amount': amount} for user_id, amount in investments.items() if amount]
+        total = sum(credit['amount'] for credit in credits)
+        points_manager = self.bot.points_manager
+        try:
+            async with self.bot.db.session_scope() as session:
+                if credits:
+                    await points_manager.credit_in_session(session, credits, reason)
+                user_id = credits[0]['user_id'] if event == 'refund' and credits else None
+                await self._journal_in_session(session, raid_key, event, user_id=user_id,
+                                               amount=total, reason=reason)
+        except Exception:
+            points_manager.credits_failed(credits)
+            raise
+
+        points_manager.credits_committed(credits)
+        logger.info(f"Refunded {total} points to {len(credits)} raiders ({reason})")
+        return total
+
+    async def _journal_in_session(self, session, raid_key: Optional[str], event: str,
+                                  user_id: str = None, amount: int = None, **data):
+        if self.journal is not None and raid_key:
+            await self.journal.append_in_session(
+                session, [self.journal.entry(raid_key, event, user_id, amount, **data)]
+            )
@@ -1,6 +1,5 @@
 # core/raid_scheduler.py
 
-import asyncio
 import random
 import logging
 from datetime import datetime, timezone, timedelta
@@ -23,7 +22,7 @@ class RaidScheduler:
     def __init__(self, bot):
         self.bot = bot
         self.is_running = False
-        self._task: Optional[asyncio.Task] = None
+        self._timer = None
         self.last_raid_end: Optional[datetime] = None
         # Initialize with a time in the past instead of None
         self.last_raid_end = datetime.now(timezone.utc) - timedelta(hours=1)  # Set to 1 hour ago
@@ -47,41 +46,32 @@ class RaidScheduler:
             return
 
         self.is_running = True
-        self._task = asyncio.create_task(self._schedule_loop())
+        self._timer = self.bot.timers.call_every(60, self._schedule_check, name='raid:scheduler')
         logger.info("Raid scheduler started")
 
     async def stop(self):
         """Stop the raid scheduling system"""
         self.is_running = False
-        if self._task:
-            self._task.cancel()
-            try:
-                await self._task
-            except asyncio.CancelledError:
-                pass
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
         logger.info("Raid scheduler stopped")
 
-    async def _schedule_loop(self):
-        """Main scheduling loop"""
-        while self.is_running:
-            try:
-                if not self.config.enabled:
-                    await asyncio.sleep(60)
-                    continue
-
-                # Check if we should start a raid
-                if await self._should_start_raid():
-                    await self._trigger_raid()
-                
-                # Update activity metrics
-                await self._update_activity_metrics()
-                
-                # Wait before next check
-                await asyncio.sleep(60)
+    async def _schedule_check(self):
+        """Run once a minute by the bot's timer service"""
+        try:
+            if not self.config.enabled:
+                return
 
-            except Exception as e:
-                logger.error(f"Error in raid scheduler: {e}")
-                await asyncio.sleep(60)
+            # Check if we should start a raid
+            if await self._should_start_raid():
+                await self._trigger_raid()
+            
+            # Update activity metrics
+            await self._update_activity_metrics()
+
+        except Exception as e:
+            logger.error(f"Error in raid scheduler: {e}")
 
     async def _should_start_raid(self) -> bool:
         """Determine if we should start a raid based on current conditions"""
@@ -36,9 +36,9 @@ class RaidValidator:
         return True, None
 
     @staticmethod
-    def validate_investment(amount: int, current_points: int, 
+    def validate_investment(amount: int, current_points: Optional[int], 
                           existing_investment: Optional[int] = None) -> Tuple[bool, Optional[ErrorCode]]:
-        """Validate investment amount"""
+        """Validate investment amount, the balance check is skipped when current_points is None"""
         try:
             amount = int(amount)
         except (TypeError, ValueError):
@@ -53,7 +53,7 @@ class RaidValidator:
         if existing_investment and (existing_investment + amount) > 2000:
             return False, ErrorCode.INVESTMENT_TOO_HIGH
 
-        if amount > current_points:
+        if current_points is not None and amount > current_points:
             return False, ErrorCode.INSUFFICIENT_POINTS
 
         return True, None
@@ -0,0 +1,92 @@
+# database/engine_profile.py
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import logging
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """SQLite connection PRAGMAs and pool sizing for DatabaseManager"""
+    name: str = 'tuned'
+    journal_mode: Optional[str] = 'WAL'
+    synchronous: Optional[str] = 'NORMAL'
+    busy_timeout_ms: Optional[int] = 5000
+    cache_size_kb: Optional[int] = 16384
+    mmap_size_mb: Optional[int] = 256
+    temp_store: Optional[str] = 'MEMORY'
+    read_pool_size: int = 5
+    read_max_overflow: int = 5
+    pool_timeout: float = 30.0
+    pool_recycle: int = -1
+    # One writer connection for all writes, readers get their own pool
+    split_read_write: bool = True
+
+    @classmethod
+    def from_config(cls) -> 'EngineProfile':
+        if Config.DB_PROFILE == 'default':
+            return cls.default()
+        return cls(
+            journal_mode=Config.DB_JOURNAL_MODE or None,
+            synchronous=Config.DB_SYNCHRONOUS or None,
+            busy_timeout_ms=Config.DB_BUSY_TIMEOUT_MS,
+            cache_size_kb=Config.DB_CACHE_SIZE_KB,
+            mmap_size_mb=Config.DB_MMAP_SIZE_MB,
+            read_pool_size=Config.DB_READ_POOL_SIZE,
+            read_max_overflow=Config.DB_READ_POOL_OVERFLOW,
+            pool_timeout=Config.DB_POOL_TIMEOUT,
+            pool_recycle=Config.DB_POOL_RECYCLE
+        )
+
+    @classmethod
+    def default(cls) -> 'EngineProfile':
+        """SQLAlchemy and SQLite defaults, no PRAGMAs and one shared engine"""
+        return cls(
+            name='default',
+            journal_mode=None,
+            synchronous=None,
+            busy_timeout_ms=None,
+            cache_size_kb=None,
+            mmap_size_mb=None,
+            temp_store=None,
+            split_read_write=False
+        )
+
+    def pragmas(self, readonly: bool = False) -> List[str]:
+        """PRAGMA statements to run on every new connection"""
+        statements = []
+        # Switching journal mode needs a write lock, so only the writer does it
+        if self.journal_mode and not readonly:
+            statements.append(f"PRAGMA journal_mode={self.journal_mode}")
+        if self.synchronous:
+            statements.append(f"PRAGMA synchronous={self.synchronous}")
+        if self.busy_timeout_ms is not None:
+            statements.append(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        if self.cache_size_kb:
+            # Negative values are KiB rather than pages
+            statements.append(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        if self.mmap_size_mb is not None:
+            statements.append(f"PRAGMA mmap_size={int(self.mmap_size_mb) * 1024 * 1024}")
+        if self.temp_store:
+            statements.append(f"PRAGMA temp_store={self.temp_store}")
+        if readonly:
+            statements.append("PRAGMA query_only=ON")
+        return statements
+
+    def read_pool_options(self) -> Dict:
+        return {
+            'pool_size': self.read_pool_size,
+            'max_overflow': self.read_max_overflow,
+            'pool_timeout': self.pool_timeout,
+            'pool_recycle': self.pool_recycle
+        }
+
+    def write_pool_options(self) -> Dict:
+        return {
+            'pool_size': 1,
+            'max_overflow': 0,
+            'pool_timeout': self.pool_timeout,
+            'pool_recycle': self.pool_recycle
+        }
@@ -1,14 +1,22 @@
 # database/manager.py
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, text
+from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, event, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.future import select
 from datetime import datetime, timezone
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from typing import Optional, Dict, Any
 import logging
 import asyncio
 
+from database.engine_profile import EngineProfile
+from database.pool_telemetry import PoolTelemetry
+from utils.performance_monitor import PerformanceTracker
+from utils.query_profiler import QueryProfiler
+from utils.tracing import tracer
+
 logger = logging.getLogger(__name__)
 
 Base = declarative_base()
@@ -56,46 +64,147 @@ class StreamStatsManager:
 
 
 class DatabaseManager:
-    def __init__(self, connection_url: Optional[str] = None, testing: bool = False):
+    def __init__(self, connection_url: Optional[str] = None, testing: bool = False,
+                 profile: Optional[EngineProfile] = None, slow_query_ms: int = 100):
         self.connection_url = connection_url or 'sqlite+aiosqlite:///bot.db'
+        self.profile = profile or EngineProfile.from_config()
         self.engine = None
+        self.read_engine = None
         self.Session = None
+        self.ReadSession = None
         self.testing = testing
         self.stats = {'connections_created': 0, 'connections_used': 0, 'errors': 0}
+        # (task, session) of the writer scope open in the current task, if any
+        self._active_writer: ContextVar = ContextVar(f'active_writer_{id(self)}', default=None)
+        self.write_telemetry = PoolTelemetry('writer')
+        self.read_telemetry = self.write_telemetry
+        self.performance = PerformanceTracker(alert_threshold_ms=slow_query_ms)
+        self.query_profiler = QueryProfiler(self.performance)
         self._setup_engine()
         self.stream_stats_manager = StreamStatsManager(self.session_scope)
 
+    @property
+    def is_memory(self) -> bool:
+        return ':memory:' in self.connection_url or self.connection_url.endswith('://')
+
     def _setup_engine(self) -> None:
         try:
+            profile = self.profile
+            split = profile.split_read_write and not self.is_memory
+
+            # In-memory databases only exist on one connection, so keep the pool defaults
+            pool_options = {}
+            if split:
+                pool_options = {'poolclass': AsyncAdaptedQueuePool, **profile.write_pool_options()}
             self.engine = create_async_engine(
                 self.connection_url,
                 echo=False,
-                future=True
+                future=True,
+                **pool_options
             )
+            self._register_pragmas(self.engine, profile.pragmas())
+            self.write_telemetry.attach(self.engine)
+            self.query_profiler.attach(self.engine)
+
+            if split:
+                self.read_engine = create_async_engine(
+                    self.connection_url,
+                    echo=False,
+                    future=True,
+                    poolclass=AsyncAdaptedQueuePool,
+                    **profile.read_pool_options()
+                )
+                self._register_pragmas(self.read_engine, profile.pragmas(readonly=True))
+                self.read_telemetry = PoolTelemetry('reader')
+                self.read_telemetry.attach(self.read_engine)
+                self.query_profiler.attach(self.read_engine)
+            else:
+                self.read_engine = self.engine
+
             self.Session = sessionmaker(
                 bind=self.engine,
                 class_=AsyncSession,
                 expire_on_commit=False
             )
-            logger.info("Database engine initialized successfully")
+            self.ReadSession = self.Session if self.read_engine is self.engine else sessionmaker(
+                bind=self.read_engine,
+                class_=AsyncSession,
+                expire_on_commit=False
+            )
+            logger.info(f"Database engine initialized successfully (profile={profile.name}, split={split})")
         except Exception as e:
             logger.error(f"Error setting up database engine: {e}")
             raise
 
+    def _register_pragmas(self, engine, pragmas) -> None:
+        """Run the profile PRAGMAs on every new DBAPI connection"""
+        @event.listens_for(engine.sync_engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            self.stats['connections_created'] += 1
+            if not pragmas:
+                return
+            cursor = dbapi_connection.cursor()
+            try:
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+            finally:
+                cursor.close()
+
     @asynccontextmanager
-    async def session_scope(self):
-        """Provide a transactional scope for database operations."""
+    async def session_scope(self, readonly: bool = False):
+        """Provide a transactional scope for database operations.
+
+        Split engines have a single writer connection. A nested writer scope
+        in the same task reuses the open session, but a task started from
+        inside a writer scope gets its own and waits for the outer one to
+        commit, so awaiting such a task from within the scope stalls until
+        pool_timeout. Finish the outer transaction before awaiting children
+        that write, or pass them the session.
+        """
+        self.stats['connections_used'] += 1
+        if readonly and self.ReadSession is not self.Session:
+            session = self.ReadSession()
+            with tracer.span('db'):
+                try:
+                    await self._acquire(session, self.read_telemetry)
+                    yield session
+                finally:
+                    await session.close()
+            return
+
+        # Nested writer scopes in the same task join the outer transaction
+        # rather than wait forever on the single writer connection
+        task = asyncio.current_task()
+        active = self._active_writer.get()
+        if active is not None and active[0] is task:
+            yield active[1]
+            return
+        if active is not None and active[1].in_transaction() and self.ReadSession is not self.Session:
+            logger.warning(
+                f"Writer scope in task {task.get_name()} waits on the writer held by "
+                f"{active[0].get_name()}, awaiting it from that scope stalls until pool_timeout"
+            )
+
         session = self.Session()
-        try:
-            yield session
-            await session.commit()
-        except Exception as e:
-            await session.rollback()
-            self.stats['errors'] += 1
-            logger.error(f"Database error: {str(e)}")
-            raise
-        finally:
-            await session.close()
+        token = self._active_writer.set((task, session))
+        with tracer.span('db'):
+            try:
+                await self._acquire(session, self.write_telemetry)
+                yield session
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                self.stats['errors'] += 1
+                logger.error(f"Database error: {str(e)}")
+                raise
+            finally:
+                self._active_writer.reset(token)
+                await session.close()
+
+    async def _acquire(self, session, telemetry: PoolTelemetry):
+        """Check out the session's connection up front so pool waits are measured"""
+        async with telemetry.measure_wait():
+            await session.connection()
 
     async def check_connection_health(self) -> bool:
         """Check database connection health"""
@@ -111,6 +220,8 @@ class DatabaseManager:
     async def close(self) -> None:
         """Close database connections"""
         try:
+            if self.read_engine and self.read_engine is not self.engine:
+                await self.read_engine.dispose()
             if self.engine:
                 await self.engine.dispose()
             logger.info("Database connections closed successfully")
@@ -119,11 +230,31 @@ class DatabaseManager:
             raise
 
     async def get_pool_status(self) -> Dict[str, Any]:
+        """Pool sizing, usage and wait times for the writer and reader pools"""
+        pools = {'writer': self.write_telemetry.snapshot()}
+        if self.read_telemetry is not self.write_telemetry:
+            pools['reader'] = self.read_telemetry.snapshot()
+
+        totals = {
+            key: sum(pool[key] for pool in pools.values())
+            for key in ('size', 'capacity', 'checkedout', 'checkedin', 'overflow', 'waiting', 'timeouts')
+        }
         return {
             'active': bool(self.engine and self.Session),
+            'profile': self.profile.name,
+            'split_read_write': self.read_engine is not self.engine,
+            **totals,
+            'usage_pct': 100 * totals['checkedout'] / totals['capacity'] if totals['capacity'] else 0,
+            'max_wait_p95_ms': max(pool['recent_wait_p95_ms'] for pool in pools.values()),
+            'pools': pools,
             'stats': self.stats.copy()
         }
     
+    async def get_performance_metrics(self) -> Dict[str, Any]:
+        """Per-statement query metrics and resource usage, as consumed by AlertManager"""
+        self.performance.sample_resources()
+        return await self.performance.get_performance_report()
+
     async def get_or_create_user(self, twitch_id: str, username: str) -> User:
         """Fetch or create a user by Twitch ID."""
         async with self.session_scope() as session:
@@ -196,6 +327,27 @@ async def initialize_database(db_url: str):
             )
         '''))
 
+        # Append-only raid events, replayed on startup to recover in-flight raids
+        await conn.execute(text('''
+            CREATE TABLE IF NOT EXISTS raid_journal (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                raid_key TEXT NOT NULL,
+                event TEXT NOT NULL,
+                user_id TEXT,
+                amount INTEGER,
+                data TEXT,
+                created_at TIMESTAMP NOT NULL
+            )
+        '''))
+
+        # Timeouts still running when the bot stops, expires_at is a unix timestamp
+        await conn.execute(text('''
+            CREATE TABLE IF NOT EXISTS user_timeouts (
+                username TEXT PRIMARY KEY,
+                expires_at REAL NOT NULL
+            )
+        '''))
+
         # Create other required tables
         await conn.execute(text('''
             CREATE TABLE IF NOT EXISTS banned_phrases (
@@ -233,6 +385,9 @@ async def initialize_database(db_url: str):
         await conn.execute(text('CREATE INDEX IF NOT EXISTS idx_raid_history_time ON raid_history(start_time)'))
         await conn.execute(text('CREATE INDEX IF NOT EXISTS idx_raid_participants_user ON raid_participants(user_id)'))
         await conn.execute(text('CREATE INDEX IF NOT EXISTS idx_player_stats_plunder ON player_raid_stats(total_plunder)'))
+        await conn.execute(text('CREATE INDEX IF NOT EXISTS idx_raid_journal_raid ON raid_journal(raid_key, id)'))
+        await conn.execute(text('CREATE INDEX IF NOT EXISTS idx_raid_journal_event ON raid_journal(event, raid_key)'))
+        await conn.execute(text('CREATE INDEX IF NOT EXISTS idx_user_timeouts_expiry ON user_timeouts(expires_at)'))
 
     await engine.dispose()
     logger.info("Database tables created successfully.")
\ No newline at end of file
@@ -126,4 +126,29 @@ class PlayerRaidStats(Base):
     
     __table_args__ = (
         Index('idx_player_stats_plunder', 'total_plunder', postgresql_using='btree'),
-    )
\ No newline at end of file
+    )
+class UserTimeout(Base):
+    __tablename__ = 'user_timeouts'
+    
+    username = Column(String, primary_key=True)
+    expires_at = Column(Float, nullable=False)
+    
+    __table_args__ = (
+        Index('idx_user_timeouts_expiry', 'expires_at'),
+    )
+
+class RaidJournalEntry(Base):
+    __tablename__ = 'raid_journal'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    raid_key = Column(String, nullable=False)
+    event = Column(String, nullable=False)
+    user_id = Column(String)
+    amount = Column(Integer)
+    data = Column(String)
+    created_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        Index('idx_raid_journal_raid', 'raid_key', 'id'),
+        Index('idx_raid_journal_event', 'event', 'raid_key'),
+    )
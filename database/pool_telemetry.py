@@ -0,0 +1,128 @@
+# database/pool_telemetry.py
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from utils.histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+class PoolTelemetry:
+    """Connection pool counters and timings collected from SQLAlchemy pool events"""
+
+    def __init__(self, name: str, recent_size: int = 256):
+        self.name = name
+        self.pool = None
+        self.counters = {
+            'connects': 0,
+            'checkouts': 0,
+            'checkins': 0,
+            'closes': 0,
+            'invalidations': 0,
+            'timeouts': 0
+        }
+        self.checked_out = 0
+        self.waiting = 0
+        self.wait_ms = LatencyHistogram()
+        self.hold_ms = LatencyHistogram()
+        self.lifetime_s = LatencyHistogram()
+        # Recent waits, so alerts react to a burst rather than the all-time distribution
+        self.recent_wait_ms = deque(maxlen=recent_size)
+
+    def attach(self, engine):
+        """Listen to pool events on an async engine"""
+        sync_engine = engine.sync_engine
+        self.pool = sync_engine.pool
+        event.listen(sync_engine, 'connect', self._on_connect)
+        event.listen(sync_engine, 'checkout', self._on_checkout)
+        event.listen(sync_engine, 'checkin', self._on_checkin)
+        event.listen(sync_engine, 'close', self._on_close)
+        event.listen(sync_engine, 'invalidate', self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.counters['connects'] += 1
+        connection_record.info['created_at'] = time.monotonic()
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.counters['checkouts'] += 1
+        self.checked_out += 1
+        connection_record.info['checked_out_at'] = time.monotonic()
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop('checked_out_at', None)
+        if checked_out_at is None:
+            return
+        self.counters['checkins'] += 1
+        self.checked_out -= 1
+        self.hold_ms.record((time.monotonic() - checked_out_at) * 1000)
+
+    def _on_close(self, dbapi_connection, connection_record):
+        self.counters['closes'] += 1
+        created_at = connection_record.info.pop('created_at', None)
+        if created_at is not None:
+            self.lifetime_s.record(time.monotonic() - created_at)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.counters['invalidations'] += 1
+
+    @asynccontextmanager
+    async def measure_wait(self):
+        """Time a connection checkout, counting pool timeouts"""
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            yield
+        except PoolTimeoutError:
+            self.counters['timeouts'] += 1
+            logger.warning(f"Timed out waiting for a {self.name} connection")
+            raise
+        finally:
+            self.waiting -= 1
+            elapsed = (time.perf_counter() - start) * 1000
+            self.wait_ms.record(elapsed)
+            self.recent_wait_ms.append(elapsed)
+
+    def _pool_size(self) -> Dict:
+        pool = self.pool
+        if pool is not None and hasattr(pool, 'checkedout') and hasattr(pool, '_max_overflow'):
+            size = pool.size()
+            max_overflow = max(pool._max_overflow, 0)
+            return {
+                'size': size,
+                'max_overflow': max_overflow,
+                'capacity': size + max_overflow,
+                'checkedout': pool.checkedout(),
+                'checkedin': pool.checkedin(),
+                'overflow': max(pool.overflow(), 0)
+            }
+        # Single-connection pools (in-memory databases) have no sizing API
+        return {
+            'size': 1,
+            'max_overflow': 0,
+            'capacity': 1,
+            'checkedout': self.checked_out,
+            'checkedin': 0 if self.checked_out else 1,
+            'overflow': 0
+        }
+
+    def recent_wait_percentile(self, pct: float) -> float:
+        if not self.recent_wait_ms:
+            return 0.0
+        ordered = sorted(self.recent_wait_ms)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def snapshot(self) -> Dict:
+        return {
+            **self._pool_size(),
+            **self.counters,
+            'waiting': self.waiting,
+            'wait_ms': self.wait_ms.snapshot(),
+            'recent_wait_p95_ms': self.recent_wait_percentile(95),
+            'hold_ms': self.hold_ms.snapshot(),
+            'lifetime_s': self.lifetime_s.snapshot()
+        }
@@ -143,4 +143,35 @@ class ModCommands(commands.Cog):
                 await ctx.send("Emote-only mode enabled")
         except Exception as e:
             logger.error(f"Failed to toggle emote-only mode: {e}")
-            await ctx.send("Failed to change emote-only mode")
\ No newline at end of file
+            await ctx.send("Failed to change emote-only mode")
+
+    @commands.command(name='timers')
+    async def list_timers(self, ctx, prefix: Optional[str] = None):
+        """Show pending named timers, soonest first"""
+        if not ctx.author.is_mod:
+            return
+
+        timers = self.bot.timers
+        pending = [
+            handle for handle in timers.timers()
+            if handle.name and (prefix is None or handle.name.startswith(prefix))
+        ]
+        stats = timers.get_stats()
+        summary = f"⏲️ {stats['pending']} timers pending, {stats['running']} running"
+        if not pending:
+            await ctx.send(f"{summary}, no named timers{f' matching {prefix}' if prefix else ''}")
+            return
+
+        entries = []
+        length = len(summary)
+        for handle in pending:
+            entry = f"{handle.name} {handle.remaining:.0f}s"
+            if handle.interval is not None:
+                entry += f" (every {handle.interval:.0f}s)"
+            # Stay well inside Twitch's 500 character limit
+            if length + len(entry) + 2 > 450:
+                entries.append(f"+{len(pending) - len(entries)} more")
+                break
+            entries.append(entry)
+            length += len(entry) + 2
+        await ctx.send(f"{summary}: {', '.join(entries)}")
@@ -1,6 +1,9 @@
 # features/moderation/moderator.py
 from sqlalchemy import text
 import logging
+from features.moderation.phrase_matcher import PhraseMatcher
+from features.moderation.spam_detector import SpamDetector
+from utils.tracing import tracer
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from dataclasses import dataclass
@@ -16,29 +19,34 @@ class TimeoutInfo:
     timestamp: datetime
 
 class ModerationManager:
-    def __init__(self, bot):
+    def __init__(self, bot, spam_detector: Optional[SpamDetector] = None):
         self.bot = bot
         self.timeout_history: Dict[str, List[TimeoutInfo]] = {}
-        self.banned_phrases: List[str] = []
+        self.phrase_matcher = PhraseMatcher()
         self.user_warnings: Dict[str, int] = {}
         self.caps_threshold = 0.7
-        self.spam_threshold = 3
-        self.message_history: Dict[str, List[str]] = {}
+        self.spam_detector = spam_detector or SpamDetector()
+
+    @property
+    def banned_phrases(self) -> List[str]:
+        return self.phrase_matcher.phrases
 
     async def load_banned_phrases(self):
         """Load banned phrases from database"""
         try:
-            async with self.bot.db.session_scope() as session:
+            async with self.bot.db.session_scope(readonly=True) as session:
                 result = await session.execute(
                     text("SELECT phrase FROM banned_phrases WHERE enabled = TRUE")
                 )
-                # Use the result's scalars() method instead of fetchall()
-                self.banned_phrases = [row[0] for row in result.all()]
-                logger.info(f"Loaded {len(self.banned_phrases)} banned phrases")
+                phrases = result.scalars().all()
         except Exception as e:
+            # Keep matching the phrases already loaded
             logger.error(f"Error loading banned phrases: {e}")
-            # Set empty list as fallback
-            self.banned_phrases = []
+            return
+
+        self.phrase_matcher.set_phrases(phrases)
+        await self.phrase_matcher.rebuild()
+        logger.info(f"Loaded {len(self.phrase_matcher)} banned phrases")
 
     async def add_banned_phrase(self, phrase: str, moderator: str):
         """Add a new banned phrase"""
@@ -51,14 +59,15 @@ class ModerationManager:
                     """),
                     {'phrase': phrase.lower(), 'moderator': moderator}
                 )
-                await session.commit()
-                await self.load_banned_phrases()
-                logger.info(f"Added banned phrase: {phrase} by {moderator}")
-                return True
         except Exception as e:
             logger.error(f"Error adding banned phrase: {e}")
             return False
 
+        if self.phrase_matcher.add(phrase):
+            await self.phrase_matcher.rebuild()
+        logger.info(f"Added banned phrase: {phrase} by {moderator}")
+        return True
+
     async def remove_banned_phrase(self, phrase: str):
         """Remove a banned phrase"""
         try:
@@ -67,71 +76,101 @@ class ModerationManager:
                     text("UPDATE banned_phrases SET enabled = FALSE WHERE phrase = :phrase"),
                     {'phrase': phrase.lower()}
                 )
-                await session.commit()
-                await self.load_banned_phrases()
-                logger.info(f"Removed banned phrase: {phrase}")
-                return True
         except Exception as e:
             logger.error(f"Error removing banned phrase: {e}")
             return False
 
+        if self.phrase_matcher.remove(phrase):
+            await self.phrase_matcher.rebuild()
+        logger.info(f"Removed banned phrase: {phrase}")
+        return True
+
+    def scan(self, user_id: str, content: str, check_spam: bool = True) -> Optional[str]:
+        """Run every content rule in one call, returns the first violation or None.
+
+        The rules share one lowercased copy but still make their own passes
+        (phrase regex, upper count, spam normalization). Each pass runs in
+        C, and a per-character Python loop fusing them measured slower.
+        """
+        lowered = content.lower()
+        violation = None
+        if self.phrase_matcher.search(lowered):
+            violation = "banned phrase"
+        elif len(content) > 10 and sum(map(str.isupper, content)) / len(content) > self.caps_threshold:
+            violation = "excessive caps"
+
+        # The spam ring records every message, even ones already in violation
+        if check_spam and self.spam_detector.check(user_id, lowered) and violation is None:
+            violation = "spam"
+        return violation
+
     async def check_message(self, message) -> Optional[str]:
         """Check message against moderation rules"""
         if not message.content:
             return None
-            
-        content = message.content.lower()
+        return self.scan(str(message.author.id), message.content)
+
+    async def warn_user(self, user_id: str) -> int:
+        """Record a warning, returns the user's warning count"""
+        self.user_warnings[user_id] = self.user_warnings.get(user_id, 0) + 1
+        return self.user_warnings[user_id]
+
+    async def timeout_user(self, user_id: str, username: str, moderator: str,
+                           duration: int, reason: str, channel=None) -> TimeoutInfo:
+        """Time a user out through the channel, remembered only once the call succeeded"""
+        channel = channel or self.bot.get_channel(self.bot.channel_name)
+        if channel is None:
+            raise RuntimeError(f"Could not find channel to time out {username}")
+        await channel.timeout(username, duration, reason)
+
+        info = TimeoutInfo(user_id, moderator, reason, duration, datetime.now())
+        self.timeout_history.setdefault(user_id, []).append(info)
+        await self.bot.timeout_manager.add_timeout(username.lower(), duration)
+        return info
+
+    async def enforce(self, message, violation: str):
+        """Delete the message, warn and time out its author with escalating durations.
+
+        Raises if the timeout fails, in which case no warning is counted and
+        nothing is announced.
+        """
         user_id = str(message.author.id)
+        # Escalating timeout durations, 5 minutes * warning count
+        warning_count = self.user_warnings.get(user_id, 0) + 1
+        duration = 300 * warning_count
 
-        # Check banned phrases if any exist
-        if self.banned_phrases and any(phrase in content for phrase in self.banned_phrases):
-            return "banned phrase"
-
-        # Check caps
-        if len(message.content) > 10:
-            caps_ratio = sum(1 for c in message.content if c.isupper()) / len(message.content)
-            if caps_ratio > self.caps_threshold:
-                return "excessive caps"
-
-        # Check spam
-        if user_id not in self.message_history:
-            self.message_history[user_id] = []
-        
-        self.message_history[user_id].append(content)
-        if len(self.message_history[user_id]) > self.spam_threshold:
-            self.message_history[user_id].pop(0)
-            
-        if len(self.message_history[user_id]) == self.spam_threshold:
-            if all(msg == content for msg in self.message_history[user_id]):
-                return "spam"
-
-        return None
+        deleted = True
+        try:
+            await message.channel.send(f"/delete {message.id}")
+        except Exception as e:
+            deleted = False
+            logger.warning(f"Could not delete message from {message.author.name}: {e}")
+
+        await self.timeout_user(
+            user_id,
+            message.author.name,
+            "Bot",
+            duration,
+            f"AutoMod: {violation} (Warning #{warning_count})",
+            channel=message.channel
+        )
+        await self.warn_user(user_id)
+
+        action = "message deleted" if deleted else "timed out"
+        await self.bot.send_chat_message(
+            f"@{message.author.name} {action} for {violation}. "
+            f"Warning #{warning_count}. Timeout: {duration//60} minutes."
+        )
 
     async def handle_message_moderation(self, message):
-        """Handle message moderation"""
+        """Check and enforce inline, the bot uses ModerationPipeline instead"""
         try:
             if message.author.is_mod:
                 return
 
-            violation = await self.check_message(message)
+            with tracer.span('moderation'):
+                violation = await self.check_message(message)
             if violation:
-                user_id = str(message.author.id)
-                warning_count = await self.warn_user(user_id)
-                
-                # Escalating timeout durations
-                duration = 300 * warning_count  # 5 minutes * warning count
-                
-                await message.delete()
-                await self.timeout_user(
-                    user_id,
-                    "Bot",
-                    duration,
-                    f"AutoMod: {violation} (Warning #{warning_count})"
-                )
-                
-                await message.channel.send(
-                    f"@{message.author.name} message deleted for {violation}. "
-                    f"Warning #{warning_count}. Timeout: {duration//60} minutes."
-                )
+                await self.enforce(message, violation)
         except Exception as e:
-            logger.error(f"Error in message moderation: {e}")
\ No newline at end of file
+            logger.error(f"Error in message moderation: {e}")
@@ -0,0 +1,165 @@
+# features/moderation/phrase_matcher.py
+import asyncio
+import re
+from typing import Dict, Iterable, List, Optional, Pattern
+
+class _Node:
+    __slots__ = ('children', 'end', 'source')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.end = False
+        # Cached regex source for this subtree, None once a phrase below it changes
+        self.source: Optional[str] = None
+
+    def regex(self) -> str:
+        """Regex source for this subtree, phrases sharing a prefix share its match"""
+        if self.source is not None:
+            return self.source
+        if self.end:
+            # A shorter phrase already matches, longer ones through this node are redundant
+            self.source = ''
+            return ''
+        branches = []
+        chars = []
+        for char in sorted(self.children):
+            child = self.children[char]
+            if child.end:
+                chars.append(re.escape(char))
+            else:
+                branches.append(re.escape(char) + child.regex())
+        if chars:
+            branches.append(chars[0] if len(chars) == 1 else f"[{''.join(chars)}]")
+        if not branches:
+            self.source = ''
+        elif len(branches) == 1:
+            self.source = branches[0]
+        else:
+            self.source = f"(?:{'|'.join(branches)})"
+        return self.source
+
+class PhraseMatcher:
+    """Finds any of many banned phrases with a single regex scan.
+
+    Phrases live in a character trie whose nodes cache their regex source,
+    so a change only regenerates the path to the changed phrase. The
+    compiled pattern is replaced as a whole, readers keep using the old
+    one until the new one is ready.
+    """
+
+    def __init__(self, phrases: Iterable[str] = ()):
+        self._root = _Node()
+        self._phrases: set = set()
+        self._pattern: Optional[Pattern] = None
+        # Bumped on every change, the compiled pattern records the revision it covers
+        self.revision = 0
+        self.compiled_revision = 0
+        if phrases:
+            self.set_phrases(phrases)
+            self.compile()
+
+    @staticmethod
+    def normalize(phrase: str) -> str:
+        return phrase.strip().lower()
+
+    def __len__(self) -> int:
+        return len(self._phrases)
+
+    def __contains__(self, phrase: str) -> bool:
+        return self.normalize(phrase) in self._phrases
+
+    @property
+    def phrases(self) -> List[str]:
+        return sorted(self._phrases)
+
+    @property
+    def is_stale(self) -> bool:
+        return self.compiled_revision != self.revision
+
+    def set_phrases(self, phrases: Iterable[str]):
+        """Replace every phrase, takes effect on the next compile"""
+        root = _Node()
+        normalized = set()
+        for phrase in phrases:
+            phrase = self.normalize(phrase)
+            if phrase and phrase not in normalized:
+                normalized.add(phrase)
+                self._insert(root, phrase)
+        self._root, self._phrases = root, normalized
+        self.revision += 1
+
+    def add(self, phrase: str) -> bool:
+        """Add one phrase, returns False if it was already present"""
+        phrase = self.normalize(phrase)
+        if not phrase or phrase in self._phrases:
+            return False
+        self._insert(self._root, phrase)
+        self._phrases.add(phrase)
+        self.revision += 1
+        return True
+
+    def remove(self, phrase: str) -> bool:
+        """Remove one phrase, returns False if it was not present"""
+        phrase = self.normalize(phrase)
+        if phrase not in self._phrases:
+            return False
+        self._delete(self._root, phrase)
+        self._phrases.discard(phrase)
+        self.revision += 1
+        return True
+
+    def compile(self):
+        """Compile the current phrases and swap the pattern in"""
+        revision = self.revision
+        self._swap(revision, self._compile(self._root.regex()))
+
+    async def rebuild(self):
+        """Compile off the event loop, the previous pattern keeps serving meanwhile"""
+        revision = self.revision
+        source = self._root.regex()
+        pattern = await asyncio.to_thread(self._compile, source)
+        self._swap(revision, pattern)
+
+    def search(self, content: str) -> Optional[str]:
+        """Return the first banned phrase found in already lowercased content"""
+        pattern = self._pattern
+        if pattern is None:
+            return None
+        match = pattern.search(content)
+        return match.group() if match else None
+
+    def _swap(self, revision: int, pattern: Optional[Pattern]):
+        # A slower compile of an older revision must not replace a newer one
+        if revision > self.compiled_revision:
+            self._pattern = pattern
+            self.compiled_revision = revision
+
+    @staticmethod
+    def _compile(source: str) -> Optional[Pattern]:
+        return re.compile(source) if source else None
+
+    @staticmethod
+    def _insert(root: _Node, phrase: str):
+        node = root
+        node.source = None
+        for char in phrase:
+            node = node.children.setdefault(char, _Node())
+            node.source = None
+        node.end = True
+
+    @staticmethod
+    def _delete(root: _Node, phrase: str):
+        # Walk down recording the path, then prune nodes left without phrases
+        path = []
+        node = root
+        for char in phrase:
+            node.source = None
+            path.append((node, char))
+            node = node.children[char]
+        node.end = False
+        node.source = None
+        for parent, char in reversed(path):
+            child = parent.children[char]
+            if child.end or child.children:
+                break
+            del parent.children[char]
@@ -0,0 +1,90 @@
+# features/moderation/pipeline.py
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, Optional, Set
+
+from utils.windowed_stats import WindowedStats
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('prefilter', 'scan', 'enforce')
+
+class ModerationPipeline:
+    """Moderates chat inline without blocking the message path.
+
+    A cheap prefilter skips mods, trusted users and short messages, one
+    scan runs every content check, and enforcement (delete, timeout,
+    announcement) is dispatched as a background task.
+    """
+
+    def __init__(self, moderation, min_length: int = 3,
+                 trusted_users: Iterable[str] = (), command_prefix: str = '!'):
+        self.moderation = moderation
+        self.min_length = min_length
+        self.trusted_users: Set[str] = {name.lower() for name in trusted_users}
+        self.command_prefix = command_prefix
+        self.timings: Dict[str, WindowedStats] = {stage: WindowedStats() for stage in STAGES}
+        self.hits: Dict[str, int] = {}
+        self._enforcing: Set[asyncio.Task] = set()
+
+    def process(self, message) -> Optional[str]:
+        """Run the inline stages, returns the violation if enforcement was dispatched"""
+        start = time.perf_counter()
+        skip = self._prefilter(message)
+        scanned = time.perf_counter()
+        self.timings['prefilter'].append((scanned - start) * 1000)
+        if skip:
+            self._hit(skip)
+            return None
+
+        content = message.content
+        # Repeated commands are the rate limiter's job, not spam
+        violation = self.moderation.scan(
+            str(message.author.id), content,
+            check_spam=not content.startswith(self.command_prefix)
+        )
+        self.timings['scan'].append((time.perf_counter() - scanned) * 1000)
+        self._hit('scanned')
+        if violation:
+            self._hit(violation)
+            task = asyncio.create_task(self._enforce(message, violation))
+            self._enforcing.add(task)
+            task.add_done_callback(self._enforcing.discard)
+        return violation
+
+    def _prefilter(self, message) -> Optional[str]:
+        author = message.author
+        if author.is_mod or author.is_broadcaster:
+            return 'skipped_mod'
+        if 'vip' in (author.badges or {}) or author.name.lower() in self.trusted_users:
+            return 'skipped_trusted'
+        if not message.content or len(message.content) < self.min_length:
+            return 'skipped_short'
+        return None
+
+    async def _enforce(self, message, violation: str):
+        start = time.perf_counter()
+        try:
+            await self.moderation.enforce(message, violation)
+            self._hit('enforced')
+        except Exception as e:
+            self._hit('enforce_errors')
+            logger.error(f"Error enforcing {violation} for {message.author.name}: {e}")
+        finally:
+            self.timings['enforce'].append((time.perf_counter() - start) * 1000)
+
+    def _hit(self, name: str):
+        self.hits[name] = self.hits.get(name, 0) + 1
+
+    async def drain(self):
+        """Wait for dispatched enforcement, used on shutdown and in tests"""
+        if self._enforcing:
+            await asyncio.gather(*self._enforcing, return_exceptions=True)
+
+    def get_metrics(self) -> Dict:
+        return {
+            'stages': {stage: stats.snapshot() for stage, stats in self.timings.items()},
+            'hits': dict(self.hits),
+            'enforcing': len(self._enforcing)
+        }
@@ -0,0 +1,159 @@
+# features/moderation/spam_detector.py
+import hashlib
+import re
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, Optional
+
+MASK = (1 << 64) - 1
+SHINGLE = 3
+
+_strip = re.compile(r'[^\w\s]+')
+_spaces = re.compile(r'\s+')
+_repeats = re.compile(r'(.)\1+')
+_leet = str.maketrans('013457@$', 'oieastas')
+
+def normalize(content: str) -> str:
+    """Fold case, leetspeak, punctuation, repeated letters and whitespace"""
+    text = _strip.sub('', content.lower().translate(_leet))
+    return _spaces.sub(' ', _repeats.sub(r'\1', text)).strip()
+
+GRAM_CACHE_SIZE = 16384
+# Lanes are 16 bits wide, longer texts are cut well before a lane could overflow
+MAX_GRAMS = 4096
+
+def _spread(value: int) -> int:
+    """Move each of the 64 bits to the bottom of its own 16-bit lane"""
+    return sum(1 << (16 * bit) for bit in range(64) if value >> bit & 1)
+
+def gram_hash(gram: str) -> int:
+    """Stable 64-bit shingle hash, so simhashes agree across restarts"""
+    return int.from_bytes(hashlib.blake2b(gram.encode(), digest_size=8).digest(), 'little')
+
+class _GramLanes(dict):
+    """Spread hash of each shingle, chat reuses a small set of shingles so most lookups hit"""
+
+    def __missing__(self, gram: str) -> int:
+        if len(self) >= GRAM_CACHE_SIZE:
+            self.clear()
+        lanes = self[gram] = _spread(gram_hash(gram))
+        return lanes
+
+_gram_lanes = _GramLanes()
+_ALL_LANES = _spread(MASK)
+_TOP_BIT = bytes.maketrans(bytes(range(256)), b'0' * 128 + b'1' * 128)
+
+def simhash(text: str) -> int:
+    """64-bit simhash over character shingles of already normalized text.
+
+    Every shingle's hash is cached spread into 64 lanes of one int, so
+    counting all 64 columns is a single C-level sum over the shingles.
+    """
+    text = text[:MAX_GRAMS]
+    count = len(text) - SHINGLE + 1
+    if count < 1:
+        return gram_hash(text)
+    grams = map(''.join, zip(*(text[i:] for i in range(SHINGLE))))
+
+    # Lanes start at 0x8000 - (count // 2 + 1), so a lane's top bit is set once more than half its bits are
+    lanes = sum(map(_gram_lanes.__getitem__, grams), (0x8000 - count // 2 - 1) * _ALL_LANES)
+    return int(lanes.to_bytes(128, 'little')[1::2].translate(_TOP_BIT)[::-1], 2)
+
+class _History:
+    __slots__ = ('hashes', 'pos', 'count', 'last_seen')
+
+    def __init__(self, size: int):
+        # Exact hash and simhash of each message interleaved in one fixed-size ring
+        self.hashes = array('Q', bytes(16 * size))
+        self.pos = 0
+        self.count = 0
+        self.last_seen = 0.0
+
+class SpamDetector:
+    """Flags users repeating the same or nearly the same message.
+
+    Each user keeps a fixed ring of message hashes instead of the
+    messages themselves, and users idle longer than idle_seconds are
+    evicted on the next check, oldest first.
+    """
+
+    def __init__(self, history_size: int = 5, spam_threshold: int = 3,
+                 max_distance: int = 10, idle_seconds: float = 300.0,
+                 max_users: int = 50000, min_length: int = 8):
+        self.history_size = history_size
+        self.spam_threshold = spam_threshold
+        self.max_distance = max_distance
+        self.idle_seconds = idle_seconds
+        self.max_users = max_users
+        # Simhash of shorter texts is too noisy, they only match exactly
+        self.min_length = min_length
+        self._users: 'OrderedDict[str, _History]' = OrderedDict()
+        self.stats = {'checks': 0, 'spam': 0, 'near_duplicates': 0, 'evicted': 0, 'exempt': 0}
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def check(self, user_id: str, content: str, now: Optional[float] = None) -> bool:
+        """Record a message, returns True if it repeats enough of the user's recent ones"""
+        now = time.monotonic() if now is None else now
+        self.stats['checks'] += 1
+        self._evict_idle(now)
+
+        text = normalize(content)
+        # A lone emote or word ("LUL", "gg") repeated is chat, not spam
+        if ' ' not in text:
+            self.stats['exempt'] += 1
+            return False
+
+        history = self._users.get(user_id)
+        if history is None:
+            history = self._users[user_id] = _History(self.history_size)
+            if len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+                self.stats['evicted'] += 1
+        else:
+            self._users.move_to_end(user_id)
+        history.last_seen = now
+
+        exact = hash(text) & MASK
+        fuzzy = simhash(text) if len(text) >= self.min_length else None
+
+        repeats = near = 0
+        hashes = history.hashes
+        for slot in range(history.count):
+            if hashes[2 * slot] == exact:
+                repeats += 1
+            elif fuzzy is not None and (hashes[2 * slot + 1] ^ fuzzy).bit_count() <= self.max_distance:
+                repeats += 1
+                near += 1
+
+        slot = history.pos
+        hashes[2 * slot] = exact
+        # Short messages store their exact hash twice, a near match would need a full-length text
+        hashes[2 * slot + 1] = exact if fuzzy is None else fuzzy
+        history.pos = (slot + 1) % self.history_size
+        history.count = min(history.count + 1, self.history_size)
+
+        if repeats + 1 >= self.spam_threshold:
+            self.stats['spam'] += 1
+            if near:
+                self.stats['near_duplicates'] += 1
+            return True
+        return False
+
+    def forget(self, user_id: str):
+        self._users.pop(user_id, None)
+
+    def _evict_idle(self, now: float):
+        cutoff = now - self.idle_seconds
+        users = self._users
+        while users:
+            user_id, history = next(iter(users.items()))
+            if history.last_seen >= cutoff:
+                break
+            del users[user_id]
+            self.stats['evicted'] += 1
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'tracked_users': len(self._users)}
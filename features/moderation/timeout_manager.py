@@ -1,53 +1,122 @@
 # features/moderation/timeout_manager.py
+import heapq
 import time
-from typing import Optional, Dict
+from typing import Dict, List, Optional, Tuple
 import logging
 
+from sqlalchemy import text
+
 logger = logging.getLogger(__name__)
 
+UPSERT_TIMEOUT = text("""
+    INSERT INTO user_timeouts (username, expires_at) VALUES (:username, :expires_at)
+    ON CONFLICT(username) DO UPDATE SET expires_at = excluded.expires_at
+""")
+
+DELETE_TIMEOUT = text("DELETE FROM user_timeouts WHERE username = :username")
+
+# Both use idx_user_timeouts_expiry, a restart only reads the timeouts still running
+DELETE_EXPIRED_TIMEOUTS = text("DELETE FROM user_timeouts WHERE expires_at <= :now")
+SELECT_ACTIVE_TIMEOUTS = text("SELECT username, expires_at FROM user_timeouts WHERE expires_at > :now")
+
 class TimeoutManager:
-    def __init__(self, cleanup_interval: int = 3600):
-        self.timeout_users: Dict[str, float] = {}  # user -> timeout_end_time
-        self.cleanup_interval = cleanup_interval
-        self.last_cleanup = time.time()
+    """Tracks timed out users with a min-heap of expiries.
+
+    Heap entries are (expires_at, user, generation). Re-adding or removing
+    a timeout bumps the user's generation instead of searching the heap,
+    so outdated entries are skipped when they reach the top, and each
+    check only pops the timeouts that have actually expired.
+    """
+
+    def __init__(self, bot=None, persist: bool = False):
+        self.bot = bot
+        self.persist = persist and bot is not None
+        self.timeout_users: Dict[str, Tuple[float, int]] = {}  # user -> (timeout_end_time, generation)
+        self._heap: List[Tuple[float, str, int]] = []
+        self._generation = 0
+        self.stats = {'added': 0, 'expired': 0, 'compactions': 0}
+
+    async def load(self) -> int:
+        """Restore the timeouts that were still running, dropping expired rows"""
+        if not self.persist:
+            return 0
+        now = time.time()
+        try:
+            async with self.bot.db.session_scope() as session:
+                await session.execute(DELETE_EXPIRED_TIMEOUTS, {'now': now})
+                result = await session.execute(SELECT_ACTIVE_TIMEOUTS, {'now': now})
+                rows = result.all()
+        except Exception as e:
+            logger.error(f"Error loading timeouts: {e}")
+            return 0
 
-    def add_timeout(self, user: str, duration: int) -> None:
+        for user, expires_at in rows:
+            self._set(user, expires_at)
+        logger.info(f"Restored {len(rows)} active timeouts")
+        return len(rows)
+
+    async def add_timeout(self, user: str, duration: int) -> None:
         """Add a user timeout"""
-        self.timeout_users[user] = time.time() + duration
-        self._cleanup_if_needed()
+        expires_at = time.time() + duration
+        self._set(user, expires_at)
+        self.stats['added'] += 1
+        await self._write(UPSERT_TIMEOUT, {'username': user, 'expires_at': expires_at})
 
-    def remove_timeout(self, user: str) -> None:
+    async def remove_timeout(self, user: str) -> None:
         """Remove a user's timeout"""
-        self.timeout_users.pop(user, None)
+        # Its heap entry is left behind and skipped once it surfaces
+        if self.timeout_users.pop(user, None) is not None:
+            await self._write(DELETE_TIMEOUT, {'username': user})
 
-    def get_remaining_timeout(self, user: str) -> Optional[int]:
+    async def get_remaining_timeout(self, user: str) -> Optional[int]:
         """Get remaining timeout duration in seconds"""
-        if user not in self.timeout_users:
-            return None
-            
-        remaining = self.timeout_users[user] - time.time()
-        if remaining <= 0:
-            self.remove_timeout(user)
+        now = time.time()
+        self.expire(now)
+        entry = self.timeout_users.get(user)
+        if entry is None:
             return None
-            
-        return int(remaining)
+        return int(entry[0] - now)
 
-    def is_timeout(self, user: str) -> bool:
+    async def is_timeout(self, user: str) -> bool:
         """Check if a user is currently timed out"""
-        remaining = self.get_remaining_timeout(user)
-        return remaining is not None and remaining > 0
-
-    def _cleanup_if_needed(self) -> None:
-        """Clean up expired timeouts periodically"""
-        current_time = time.time()
-        if current_time - self.last_cleanup > self.cleanup_interval:
-            expired = [
-                user for user, end_time in self.timeout_users.items()
-                if end_time <= current_time
-            ]
-            for user in expired:
-                self.timeout_users.pop(user)
-            
-            if expired:
-                logger.debug(f"Cleaned up {len(expired)} expired timeouts")
-            self.last_cleanup = current_time
\ No newline at end of file
+        self.expire()
+        return user in self.timeout_users
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop every timeout that has ended, O(k log n) for k expired entries"""
+        now = time.time() if now is None else now
+        heap = self._heap
+        expired = 0
+        while heap and heap[0][0] <= now:
+            _, user, generation = heapq.heappop(heap)
+            entry = self.timeout_users.get(user)
+            if entry is not None and entry[1] == generation:
+                del self.timeout_users[user]
+                expired += 1
+        self.stats['expired'] += expired
+        return expired
+
+    def _set(self, user: str, expires_at: float):
+        self._generation += 1
+        self.timeout_users[user] = (expires_at, self._generation)
+        heapq.heappush(self._heap, (expires_at, user, self._generation))
+        self.expire()
+
+        # Re-added and removed timeouts leave stale entries, rebuild once they dominate the heap
+        if len(self._heap) > 2 * len(self.timeout_users) + 64:
+            self._heap = [(end, user, generation) for user, (end, generation) in self.timeout_users.items()]
+            heapq.heapify(self._heap)
+            self.stats['compactions'] += 1
+
+    async def _write(self, statement, params: Dict):
+        # Expired rows are never deleted one by one, load() drops them in bulk
+        if not self.persist:
+            return
+        try:
+            async with self.bot.db.session_scope() as session:
+                await session.execute(statement, params)
+        except Exception as e:
+            logger.error(f"Error saving timeout for {params['username']}: {e}")
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'active': len(self.timeout_users), 'heap_size': len(self._heap)}
@@ -2,7 +2,6 @@
 import logging
 from twitchio.ext import commands
 from utils.decorators import rate_limited
-from datetime import datetime, timezone
 from sqlalchemy import text
 
 logger = logging.getLogger(__name__)
@@ -19,37 +18,11 @@ class PointsCommands(commands.Cog):
         user_id = str(ctx.author.id)
 
         try:
-            async with self.bot.db.session_scope() as session:
-                # Attempt to retrieve the user's points
-                result = await session.execute(
-                    text('SELECT points FROM user_points WHERE user_id = :user_id'),
-                    {'user_id': user_id}
-                )
-                row = result.first()
-
-                # Insert new user if they do not exist in the table
-                if row is None:
-                    points = 0
-                    await session.execute(
-                        text('''
-                            INSERT INTO user_points (user_id, points, total_earned, last_updated)
-                            VALUES (:user_id, :points, :total_earned, :last_updated)
-                        '''),
-                        {
-                            'user_id': user_id,
-                            'points': points,
-                            'total_earned': points,
-                            'last_updated': datetime.now(timezone.utc)
-                        }
-                    )
-                    await session.commit()
-                    logger.info(f"New user {ctx.author.name} ({user_id}) added with {points} points.")
-                else:
-                    points = row[0]
-                    logger.info(f"User {ctx.author.name} ({user_id}) has {points} points.")
-
-                # Send the user's points balance
-                await ctx.send(f"@{ctx.author.name} You have {points} {self.points_name}!")
+            points = await self.bot.points_manager.get_points(user_id)
+            logger.info(f"User {ctx.author.name} ({user_id}) has {points} points.")
+
+            # Send the user's points balance
+            await ctx.send(f"@{ctx.author.name} You have {points} {self.points_name}!")
 
         except Exception as e:
             logger.error(f"Error checking points for user {user_id} ({ctx.author.name}): {e}")
@@ -62,24 +35,35 @@ class PointsCommands(commands.Cog):
     async def show_leaderboard(self, ctx):
         """Show points leaderboard"""
         try:
-            async with self.bot.db.session_scope() as session:
-                result = await session.execute(text('''
-                    SELECT up.points, u.username 
-                    FROM user_points up
-                    JOIN users u ON up.user_id = u.twitch_id
-                    ORDER BY up.points DESC LIMIT 5
-                '''))
-                rows = result.all()
-                
-                if rows:
-                    leaders = [f"#{i+1} {username}: {points}" for i, (points, username) in enumerate(rows)]
-                    await ctx.send(f"Top {self.points_name}: {' | '.join(leaders)}")
-                else:
-                    await ctx.send("No point earners yet!")
+            leaders = await self.bot.points_manager.leaderboard.top(5)
+            if leaders:
+                ranking = [f"#{i+1} {username}: {points}" for i, (username, points) in enumerate(leaders)]
+                await ctx.send(f"Top {self.points_name}: {' | '.join(ranking)}")
+            else:
+                await ctx.send("No point earners yet!")
         except Exception as e:
             logger.error(f"Error showing leaderboard: {e}")
             await ctx.send("Error fetching leaderboard!")
 
+    @commands.command(name='rank')
+    @rate_limited(cooldown=10)
+    async def show_rank(self, ctx):
+        """Show your position on the points leaderboard"""
+        user_id = str(ctx.author.id)
+
+        try:
+            leaderboard = self.bot.points_manager.leaderboard
+            position = await leaderboard.get_rank(user_id)
+            if position is None:
+                await ctx.send(f"@{ctx.author.name} You haven't earned any {self.points_name} yet!")
+                return
+
+            rank, points = position
+            await ctx.send(f"@{ctx.author.name} You are #{rank} of {len(leaderboard)} with {points} {self.points_name}!")
+        except Exception as e:
+            logger.error(f"Error checking rank for user {user_id} ({ctx.author.name}): {e}")
+            await ctx.send(f"@{ctx.author.name} Error checking rank!")
+
     @commands.command(name='give')
     @rate_limited(cooldown=10)
     async def give_points(self, ctx, target: str = None, amount: str = None):
@@ -104,28 +88,11 @@ class PointsCommands(commands.Cog):
                     await ctx.send(f"@{ctx.author.name} User not found!")
                     return
                 
-                # Try transferring points
-                sender_points = await self.bot.points_manager.get_points(str(ctx.author.id))
-                if sender_points >= amount:
-                    now = datetime.now(timezone.utc)
-                    update_query = text('''
-                        UPDATE user_points 
-                        SET points = CASE
-                            WHEN user_id = :sender_id THEN points - :amount
-                            WHEN user_id = :target_id THEN points + :amount
-                        END,
-                        last_updated = :now
-                        WHERE user_id IN (:sender_id, :target_id)
-                    ''')
-                    await session.execute(update_query, {
-                        'sender_id': str(ctx.author.id),
-                        'target_id': target_id,
-                        'amount': amount,
-                        'now': now
-                    })
-                    await ctx.send(f"@{ctx.author.name} gave {amount} {self.points_name} to @{target}!")
-                else:
-                    await ctx.send(f"@{ctx.author.name} You don't have enough {self.points_name}!")
+            # Try transferring points, the debit only succeeds if the sender can afford it
+            if await self.bot.points_manager.transfer_points(str(ctx.author.id), target_id, amount):
+                await ctx.send(f"@{ctx.author.name} gave {amount} {self.points_name} to @{target}!")
+            else:
+                await ctx.send(f"@{ctx.author.name} You don't have enough {self.points_name}!")
                     
         except ValueError:
             await ctx.send(f"@{ctx.author.name} Invalid amount!")
@@ -149,27 +116,33 @@ class PointsCommands(commands.Cog):
                 await ctx.send("Amount cannot be negative!")
                 return
                 
-            async with self.bot.db.session_scope() as session:
-                now = datetime.now(timezone.utc)
-                query = text('''
-                    UPDATE user_points 
-                    SET points = :amount,
-                        last_updated = :now
-                    WHERE user_id = (
-                        SELECT twitch_id 
-                        FROM users 
-                        WHERE LOWER(username) = :username
-                    )
-                ''')
-                await session.execute(query, {
-                    'amount': amount,
-                    'now': now,
-                    'username': target.lower()
-                })
+            if await self.bot.points_manager.set_points(target, amount):
                 await ctx.send(f"Set @{target}'s {self.points_name} to {amount}!")
+            else:
+                await ctx.send(f"@{ctx.author.name} User not found!")
                 
         except ValueError:
             await ctx.send("Invalid amount!")
         except Exception as e:
             logger.error(f"Error setting points: {e}")
-            await ctx.send("Error setting points!")
\ No newline at end of file
+            await ctx.send("Error setting points!")
+
+    @commands.command(name='checktop')
+    async def check_leaderboard(self, ctx, mode: str = None):
+        """Verify the leaderboard against the database (mod only)"""
+        if not ctx.author.is_mod:
+            return
+
+        try:
+            report = await self.bot.points_manager.leaderboard.verify(repair=mode == 'repair')
+            if report['consistent']:
+                await ctx.send(f"Leaderboard OK ({report['checked']} balances checked)")
+            else:
+                status = "repaired" if report['repaired'] else "use !checktop repair to fix"
+                await ctx.send(
+                    f"Leaderboard drift: {report['mismatched']} mismatched, {report['missing']} missing, "
+                    f"{report['extra']} extra ({status})"
+                )
+        except Exception as e:
+            logger.error(f"Error checking leaderboard: {e}")
+            await ctx.send("Error checking leaderboard!")
@@ -0,0 +1,219 @@
+# features/points/leaderboard.py
+from bisect import bisect_left, insort
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+SELECT_BALANCES = text("""
+    SELECT up.user_id, up.points, u.username
+    FROM user_points up
+    LEFT JOIN users u ON up.user_id = u.twitch_id
+""")
+
+# IN lists are split like bulk debits, to stay under the bound parameter limit
+LOOKUP_CHUNK = 400
+
+@lru_cache(maxsize=16)
+def select_names_sql(count: int):
+    placeholders = ', '.join(f':id{i}' for i in range(count))
+    return text(f'SELECT twitch_id, username FROM users WHERE twitch_id IN ({placeholders})')
+
+@lru_cache(maxsize=16)
+def select_points_sql(count: int):
+    placeholders = ', '.join(f':id{i}' for i in range(count))
+    return text(f'SELECT user_id, points FROM user_points WHERE user_id IN ({placeholders})')
+
+class PointsLeaderboard:
+    """In-memory ranking of every points balance, kept in step with PointsManager writes.
+
+    Ranks come from a sorted Python list, so a rank lookup is an O(log n)
+    bisect but a balance change is an O(n) list delete and insert. The
+    shift is a memmove of pointers, around 40µs per update at 100k users,
+    which was kept over a top-K list with !rank answered by a count query
+    so ranks stay free of database reads. Channels with millions of ranked
+    users would want the top-K approach instead.
+    """
+
+    def __init__(self, bot, name_retry_seconds: float = 60):
+        self.bot = bot
+        self._balances: Dict[str, int] = {}
+        # Sorted ascending on (-points, user_id), so index 0 is first place
+        self._order: List[Tuple[int, str]] = []
+        self._names: Dict[str, str] = {}
+        # Users rows are written behind points, so a missing name is looked up again later
+        self.name_retry_seconds = name_retry_seconds
+        self._name_misses: Dict[str, float] = {}
+        self._loaded = False
+        self._loading: Optional[set] = None
+        self._load_lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return len(self._balances)
+
+    async def load(self) -> int:
+        """Seed the leaderboard from the database, returns the number of balances loaded"""
+        async with self._load_lock:
+            # Writes landing while the snapshot is read are re-read afterwards
+            self._loading = set()
+            try:
+                async with self.bot.db.session_scope(readonly=True) as session:
+                    rows = (await session.execute(SELECT_BALANCES)).all()
+
+                self._balances = {user_id: points or 0 for user_id, points, _ in rows}
+                self._order = sorted((-points, user_id) for user_id, points in self._balances.items())
+                now = time.monotonic()
+                self._names = {user_id: username for user_id, _, username in rows if username}
+                self._name_misses = {user_id: now for user_id, _, username in rows if not username}
+                self._loaded = True
+
+                touched = self._loading
+                self._loading = None
+                if touched:
+                    await self._reload_balances(touched)
+            finally:
+                self._loading = None
+
+        logger.info(f"Leaderboard loaded with {len(self._balances)} balances")
+        return len(self._balances)
+
+    async def ensure_loaded(self):
+        if not self._loaded:
+            await self.load()
+
+    def update(self, user_id: str, points: int, username: Optional[str] = None):
+        """Record a user's new absolute balance"""
+        if username:
+            self._names[user_id] = username
+            self._name_misses.pop(user_id, None)
+        if self._loading is not None:
+            self._loading.add(user_id)
+        if not self._loaded:
+            return
+
+        previous = self._balances.get(user_id)
+        if previous == points:
+            return
+        if previous is not None:
+            del self._order[bisect_left(self._order, (-previous, user_id))]
+        self._balances[user_id] = points
+        insort(self._order, (-points, user_id))
+
+    def adjust(self, user_id: str, delta: int):
+        """Apply a relative change, users not yet ranked start from zero"""
+        if self._loading is not None:
+            self._loading.add(user_id)
+        if not self._loaded:
+            return
+        self.update(user_id, self._balances.get(user_id, 0) + delta)
+
+    def rank(self, user_id: str) -> Optional[Tuple[int, int]]:
+        """Return (rank, points) for a user, or None if they have no balance"""
+        points = self._balances.get(user_id)
+        if points is None:
+            return None
+        return bisect_left(self._order, (-points, user_id)) + 1, points
+
+    async def top(self, count: int = 5) -> List[Tuple[str, int]]:
+        """Return the top (username, points) entries, skipping balances without a known user"""
+        await self.ensure_loaded()
+
+        leaders = []
+        index = 0
+        while len(leaders) < count and index < len(self._order):
+            window = self._order[index:index + count * 2]
+            index += len(window)
+
+            retry_before = time.monotonic() - self.name_retry_seconds
+            missing = [
+                user_id for _, user_id in window
+                if user_id not in self._names and self._name_misses.get(user_id, retry_before) <= retry_before
+            ]
+            if missing:
+                await self._resolve_names(missing)
+
+            for neg_points, user_id in window:
+                username = self._names.get(user_id)
+                if username:
+                    leaders.append((username, -neg_points))
+                    if len(leaders) == count:
+                        break
+        return leaders
+
+    async def get_rank(self, user_id: str) -> Optional[Tuple[int, int]]:
+        """Rank lookup that seeds the leaderboard first if needed"""
+        await self.ensure_loaded()
+        return self.rank(user_id)
+
+    async def _resolve_names(self, user_ids: List[str]):
+        found = {}
+        async with self.bot.db.session_scope(readonly=True) as session:
+            for offset in range(0, len(user_ids), LOOKUP_CHUNK):
+                chunk = user_ids[offset:offset + LOOKUP_CHUNK]
+                params = {f'id{i}': user_id for i, user_id in enumerate(chunk)}
+                result = await session.execute(select_names_sql(len(chunk)), params)
+                found.update(result.all())
+        now = time.monotonic()
+        for user_id in user_ids:
+            username = found.get(user_id)
+            if username:
+                self._names[user_id] = username
+                self._name_misses.pop(user_id, None)
+            else:
+                self._name_misses[user_id] = now
+
+    async def _reload_balances(self, user_ids):
+        user_ids = list(user_ids)
+        async with self.bot.db.session_scope(readonly=True) as session:
+            for offset in range(0, len(user_ids), LOOKUP_CHUNK):
+                chunk = user_ids[offset:offset + LOOKUP_CHUNK]
+                params = {f'id{i}': user_id for i, user_id in enumerate(chunk)}
+                result = await session.execute(select_points_sql(len(chunk)), params)
+                for user_id, points in result.all():
+                    self.update(user_id, points or 0)
+
+    async def verify(self, repair: bool = False) -> Dict:
+        """Compare the in-memory leaderboard against user_points, optionally fixing drift"""
+        await self.ensure_loaded()
+        async with self.bot.db.session_scope(readonly=True) as session:
+            rows = (await session.execute(text('SELECT user_id, points FROM user_points'))).all()
+
+        stored = {user_id: points or 0 for user_id, points in rows}
+        mismatched = [
+            user_id for user_id, points in stored.items()
+            if user_id in self._balances and self._balances[user_id] != points
+        ]
+        missing = [user_id for user_id in stored if user_id not in self._balances]
+        extra = [user_id for user_id in self._balances if user_id not in stored]
+        order_ok = (
+            len(self._order) == len(self._balances)
+            and all(self._order[i] <= self._order[i + 1] for i in range(len(self._order) - 1))
+        )
+
+        report = {
+            'checked': len(stored),
+            'mismatched': len(mismatched),
+            'missing': len(missing),
+            'extra': len(extra),
+            'order_ok': order_ok,
+            'consistent': not (mismatched or missing or extra) and order_ok,
+            'repaired': False
+        }
+
+        if repair and not report['consistent']:
+            self._balances = stored
+            self._order = sorted((-points, user_id) for user_id, points in stored.items())
+            report['repaired'] = True
+
+        if not report['consistent']:
+            logger.warning(f"Leaderboard drift detected: {report}")
+        return report
@@ -1,20 +1,89 @@
 # features/points/points_manager.py
-from datetime import datetime, timezone, timedelta
-from typing import Dict, Optional, List
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Optional, List, Set
 import logging
-import asyncio
+import time
 
 from sqlalchemy import text
 
+from features.points.leaderboard import PointsLeaderboard
+
 logger = logging.getLogger(__name__)
 
+CREDIT_POINTS_SQL = """
+    INSERT INTO user_points (user_id, points, total_earned, last_updated)
+    VALUES (:user_id, :amount, :amount, :now)
+    ON CONFLICT (user_id) DO UPDATE
+    SET points = user_points.points + :amount,
+        total_earned = user_points.total_earned + :amount,
+        last_updated = :now
+"""
+
+CREDIT_POINTS = text(CREDIT_POINTS_SQL)
+CREDIT_POINTS_RETURNING = text(CREDIT_POINTS_SQL + " RETURNING points")
+
+DEBIT_POINTS = text("""
+    UPDATE user_points
+    SET points = points - :amount,
+        last_updated = :now
+    WHERE user_id = :user_id AND points >= :amount
+    RETURNING points
+""")
+
+# Debits for many users as one statement, only the affordable rows are returned
+BULK_DEBIT_CHUNK = 400
+
+@lru_cache(maxsize=64)
+def bulk_debit_sql(count: int):
+    values = ", ".join(f"(:user_id_{i}, :amount_{i})" for i in range(count))
+    return text(f"""
+        WITH debits (user_id, amount) AS (VALUES {values})
+        UPDATE user_points
+        SET points = user_points.points - debits.amount,
+            last_updated = :now
+        FROM debits
+        WHERE user_points.user_id = debits.user_id AND user_points.points >= debits.amount
+        RETURNING user_points.user_id, user_points.points
+    """)
+
+SET_POINTS = text("""
+    INSERT INTO user_points (user_id, points, total_earned, last_updated)
+    SELECT twitch_id, :amount, 0, :now
+    FROM users
+    WHERE LOWER(username) = :username
+    ON CONFLICT (user_id) DO UPDATE
+    SET points = :amount,
+        last_updated = :now
+    RETURNING user_id
+""")
+
+INSERT_TRANSACTION = text("""
+    INSERT INTO points_transactions (user_id, amount, reason)
+    VALUES (:user_id, :amount, :reason)
+""")
+
 class PointsManager:
-    def __init__(self, bot):
+    def __init__(self, bot, cache_max_entries: int = 10000):
         self.bot = bot
         self.points_per_minute = 10
         self.active_multiplier = 2.0
         self.subscriber_multiplier = 1.5
-        self._lock = asyncio.Lock()
+        self.record_watch_transactions = False
+        self.last_accrual: Dict = {}
+
+        # LRU balance cache, kept exact by applying every write in place
+        self.cache_max_entries = cache_max_entries
+        self._balances: OrderedDict = OrderedDict()
+        # Reads only fill the cache when no write started or was running meanwhile
+        self._write_epoch = 0
+        self._writes_in_flight = 0
+        self._staged_writes: Set[int] = set()
+        self.cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+        self.leaderboard = PointsLeaderboard(bot)
 
     async def setup(self):
         """Initialize database tables for points system."""
@@ -62,91 +131,302 @@ class PointsManager:
 
     async def add_points(self, user_id: str, amount: int, reason: str = None) -> bool:
         """Add points to a user's balance."""
-        async with self._lock:
-            async with self.bot.db.session_scope() as session:
-                try:
+        with self._writing():
+            try:
+                async with self.bot.db.session_scope() as session:
                     now = datetime.now(timezone.utc)
-                    await session.execute(
-                        text("""
-                            INSERT INTO user_points (user_id, points, total_earned, last_updated)
-                            VALUES (:user_id, :amount, :amount, :now)
-                            ON CONFLICT (user_id) DO UPDATE
-                            SET points = user_points.points + :amount,
-                                total_earned = user_points.total_earned + :amount,
-                                last_updated = :now
-                        """),
+                    result = await session.execute(
+                        CREDIT_POINTS_RETURNING,
                         {'user_id': user_id, 'amount': amount, 'now': now}
                     )
-                    await session.commit()
-                    return True
-                except Exception as e:
-                    logger.error(f"Error adding points: {e}")
-                    return False
+                    balance = result.scalar()
+            except Exception as e:
+                logger.error(f"Error adding points: {e}")
+                self._cache_invalidate(user_id)
+                return False
+
+            self._record_balance(user_id, balance)
+            return True
 
     async def remove_points(self, user_id: str, amount: int, reason: str = None) -> bool:
-        """Remove points from a user's balance."""
-        async with self._lock:
+        """Remove points from a user's balance if they can afford it."""
+        with self._writing():
+            try:
+                async with self.bot.db.session_scope() as session:
+                    balance = await self._debit(session, user_id, amount)
+            except Exception as e:
+                logger.error(f"Error removing points: {e}")
+                self._cache_invalidate(user_id)
+                return False
+
+            if balance is None:
+                return False
+            self._record_balance(user_id, balance)
+            return True
+
+    async def remove_points_bulk(self, debits: List[Dict], reason: str = None) -> List[Optional[int]]:
+        """Conditionally debit many distinct users in one transaction, returns each new balance or None"""
+        if not debits:
+            return []
+
+        try:
             async with self.bot.db.session_scope() as session:
-                try:
-                    current_points = await self.get_points(user_id)
-                    if current_points < amount:
-                        return False
+                balances = await self.debit_in_session(session, debits)
+        except Exception as e:
+            logger.error(f"Error removing points in bulk for {len(debits)} users: {e}")
+            self.debits_failed(debits)
+            return [None] * len(debits)
 
-                    now = datetime.now(timezone.utc)
-                    await session.execute(
-                        text("""
-                            UPDATE user_points
-                            SET points = points - :amount,
-                                last_updated = :now
-                            WHERE user_id = :user_id
-                        """),
-                        {'user_id': user_id, 'amount': amount, 'now': now}
+        self.debits_committed(debits, balances)
+        return balances
+
+    async def debit_in_session(self, session, debits: List[Dict]) -> List[Optional[int]]:
+        """Stage bulk debits in the caller's transaction, call debits_committed once it commits"""
+        self._stage_write(debits)
+        now = datetime.now(timezone.utc)
+        balances: Dict[str, int] = {}
+        for offset in range(0, len(debits), BULK_DEBIT_CHUNK):
+            chunk = debits[offset:offset + BULK_DEBIT_CHUNK]
+            params = {'now': now}
+            for i, debit in enumerate(chunk):
+                params[f'user_id_{i}'] = debit['user_id']
+                params[f'amount_{i}'] = debit['amount']
+            result = await session.execute(bulk_debit_sql(len(chunk)), params)
+            balances.update(result.all())
+        return [balances.get(debit['user_id']) for debit in debits]
+
+    def debits_committed(self, debits: List[Dict], balances: List[Optional[int]]):
+        """Apply committed bulk debits to the cache and the leaderboard"""
+        for debit, balance in zip(debits, balances):
+            if balance is not None:
+                self._record_balance(debit['user_id'], balance)
+        self._unstage_write(debits)
+
+    def debits_failed(self, debits: List[Dict]):
+        """Forget cached balances for debits whose transaction rolled back"""
+        self._cache_invalidate(*(d['user_id'] for d in debits))
+        self._unstage_write(debits)
+
+    async def transfer_points(self, sender_id: str, target_id: str, amount: int) -> bool:
+        """Move points between users in one transaction, fails if the sender can't afford it."""
+        with self._writing():
+            try:
+                async with self.bot.db.session_scope() as session:
+                    sender_balance = await self._debit(session, sender_id, amount)
+                    if sender_balance is None:
+                        return False
+                    result = await session.execute(
+                        CREDIT_POINTS_RETURNING,
+                        {'user_id': target_id, 'amount': amount, 'now': datetime.now(timezone.utc)}
                     )
-                    await session.commit()
-                    return True
-                except Exception as e:
-                    logger.error(f"Error removing points: {e}")
-                    return False
+                    target_balance = result.scalar()
+            except Exception as e:
+                logger.error(f"Error transferring points: {e}")
+                self._cache_invalidate(sender_id, target_id)
+                return False
+
+            self._record_balance(sender_id, sender_balance)
+            self._record_balance(target_id, target_balance)
+            return True
+
+    async def set_points(self, username: str, amount: int) -> bool:
+        """Set a user's balance by username, returns False if the user is unknown."""
+        with self._writing():
+            try:
+                async with self.bot.db.session_scope() as session:
+                    result = await session.execute(SET_POINTS, {
+                        'amount': amount,
+                        'now': datetime.now(timezone.utc),
+                        'username': username.lower()
+                    })
+                    user_ids = [row[0] for row in result.all()]
+            except Exception as e:
+                logger.error(f"Error setting points: {e}")
+                self._balances.clear()
+                return False
+
+            for user_id in user_ids:
+                self._record_balance(user_id, amount)
+            return bool(user_ids)
+
+    async def _debit(self, session, user_id: str, amount: int) -> Optional[int]:
+        """Conditionally debit within a session, returns the new balance or None if unaffordable"""
+        result = await session.execute(
+            DEBIT_POINTS,
+            {'user_id': user_id, 'amount': amount, 'now': datetime.now(timezone.utc)}
+        )
+        return result.scalar()
 
     async def get_points(self, user_id: str) -> int:
         """Get current points balance."""
+        cached = self._cache_lookup(user_id)
+        if cached is not None:
+            return cached
+
+        epoch = self._write_epoch
+        quiet = not self._writes_in_flight
         try:
-            async with self.bot.db.session_scope() as session:
+            async with self.bot.db.session_scope(readonly=True) as session:
                 query = text('SELECT points FROM user_points WHERE user_id = :user_id')
                 result = await session.execute(query, {'user_id': user_id})
                 points = result.scalar()
-                return points if points is not None else 0
+                points = points if points is not None else 0
         except Exception as e:
             logger.error(f"Error fetching points for user_id {user_id}: {e}")
             return 0
 
-    async def update_watch_time_points(self):
+        # A write running during this read may have made the result stale
+        if quiet and epoch == self._write_epoch:
+            self._cache_store(user_id, points)
+        return points
+
+    @contextmanager
+    def _writing(self):
+        """Mark a balance write as running until its results are applied to the cache"""
+        self._write_epoch += 1
+        self._writes_in_flight += 1
+        try:
+            yield
+        finally:
+            self._writes_in_flight -= 1
+
+    def _stage_write(self, batch: List[Dict]):
+        if id(batch) not in self._staged_writes:
+            self._staged_writes.add(id(batch))
+            self._writes_in_flight += 1
+        self._write_epoch += 1
+
+    def _unstage_write(self, batch: List[Dict]):
+        if id(batch) in self._staged_writes:
+            self._staged_writes.discard(id(batch))
+            self._writes_in_flight -= 1
+
+    def _record_balance(self, user_id: str, balance: int, username: str = None):
+        """Apply a committed balance to the cache and the leaderboard"""
+        self._cache_store(user_id, balance)
+        self.leaderboard.update(user_id, balance, username)
+
+    def _cache_lookup(self, user_id: str) -> Optional[int]:
+        balance = self._balances.get(user_id)
+        if balance is None:
+            self.cache_stats['misses'] += 1
+            return None
+        self._balances.move_to_end(user_id)
+        self.cache_stats['hits'] += 1
+        return balance
+
+    def _cache_store(self, user_id: str, balance: int):
+        if self.cache_max_entries <= 0:
+            return
+        self._balances[user_id] = balance
+        self._balances.move_to_end(user_id)
+        while len(self._balances) > self.cache_max_entries:
+            self._balances.popitem(last=False)
+            self.cache_stats['evictions'] += 1
+
+    def _cache_adjust(self, user_id: str, delta: int):
+        if user_id in self._balances:
+            self._balances[user_id] += delta
+
+    def _cache_invalidate(self, *user_ids: str):
+        for user_id in user_ids:
+            self._balances.pop(user_id, None)
+
+    def get_cache_stats(self) -> Dict:
+        """Balance cache counters and current size"""
+        lookups = self.cache_stats['hits'] + self.cache_stats['misses']
+        return {
+            **self.cache_stats,
+            'size': len(self._balances),
+            'max_entries': self.cache_max_entries,
+            'hit_rate': self.cache_stats['hits'] / lookups if lookups else 0
+        }
+
+    def _compute_watch_time_awards(self, active_users, now: Optional[float] = None) -> List[Dict]:
+        """Compute every active user's watch-time award in one pass"""
+        inactive_threshold = (time.monotonic() if now is None else now) - 600  # 10 minutes
+
+        # Only four possible awards exist, so compute them once up front
+        base = self.points_per_minute
+        awards = {
+            (is_subscriber, is_active): round(
+                base
+                * (self.subscriber_multiplier if is_subscriber else 1)
+                * (self.active_multiplier if is_active else 1)
+            )
+            for is_subscriber in (False, True)
+            for is_active in (False, True)
+        }
+
+        return [
+            {'user_id': user_id, 'amount': awards[(bool(activity.is_subscriber), activity.message_count > 0)]}
+            for user_id, activity in list(active_users.items())
+            if activity.last_seen_mono > inactive_threshold
+        ]
+
+    async def add_points_bulk(self, awards: List[Dict], reason: str = None,
+                              record_transactions: bool = False) -> bool:
+        """Credit many users with a single multi-row upsert in one transaction"""
+        if not awards:
+            return True
+
+        try:
+            async with self.bot.db.session_scope() as session:
+                await self.credit_in_session(session, awards, reason, record_transactions)
+        except Exception as e:
+            logger.error(f"Error adding points in bulk for {len(awards)} users: {e}")
+            self.credits_failed(awards)
+            return False
+
+        self.credits_committed(awards)
+        return True
+
+    async def credit_in_session(self, session, awards: List[Dict], reason: str = None,
+                                record_transactions: bool = False):
+        """Stage bulk credits in the caller's transaction, call credits_committed once it commits"""
+        self._stage_write(awards)
+        now = datetime.now(timezone.utc)
+        await session.execute(
+            CREDIT_POINTS,
+            [{'user_id': a['user_id'], 'amount': a['amount'], 'now': now} for a in awards]
+        )
+        if record_transactions:
+            await session.execute(
+                INSERT_TRANSACTION,
+                [{'user_id': a['user_id'], 'amount': a['amount'], 'reason': reason} for a in awards]
+            )
+
+    def credits_committed(self, awards: List[Dict]):
+        """Apply committed bulk credits to the cache and the leaderboard"""
+        for award in awards:
+            self._cache_adjust(award['user_id'], award['amount'])
+            self.leaderboard.adjust(award['user_id'], award['amount'])
+        self._unstage_write(awards)
+
+    def credits_failed(self, awards: List[Dict]):
+        """Forget cached balances for credits whose transaction rolled back"""
+        self._cache_invalidate(*(a['user_id'] for a in awards))
+        self._unstage_write(awards)
+
+    async def update_watch_time_points(self, record_transactions: Optional[bool] = None) -> Dict:
         """Update points for active viewers."""
+        if record_transactions is None:
+            record_transactions = self.record_watch_transactions
+
+        start = time.perf_counter()
         try:
-            now = datetime.now(timezone.utc)
-            inactive_threshold = now - timedelta(minutes=10)
-            
-            for user_id, activity in self.bot.user_tracker.active_users.items():
-                try:
-                    # Skip inactive users
-                    if activity.last_seen <= inactive_threshold:
-                        continue
-
-                    # Calculate points for the user
-                    points = self.points_per_minute
-                    if activity.is_subscriber:
-                        points *= self.subscriber_multiplier
-                    if activity.message_count > 0:
-                        points *= self.active_multiplier
-
-                    # Round points before adding
-                    await self.add_points(user_id, round(points))
-                
-                except Exception as user_error:
-                    logger.error(
-                        f"Error updating points for user_id {user_id}: {user_error} | "
-                        f"Last Seen: {activity.last_seen}, Message Count: {activity.message_count}"
-                    )
-        
-        except Exception as general_error:
-            logger.error(f"Error in update_watch_time_points: {general_error}")
+            awards = self._compute_watch_time_awards(self.bot.user_tracker.active_users)
+            success = await self.add_points_bulk(awards, "Watch time", record_transactions)
+        except Exception as e:
+            logger.error(f"Error in update_watch_time_points: {e}")
+            awards, success = [], False
+
+        duration_ms = (time.perf_counter() - start) * 1000
+        self.last_accrual = {
+            'users': len(awards),
+            'points': sum(a['amount'] for a in awards),
+            'success': success,
+            'duration_ms': duration_ms
+        }
+        logger.debug(f"Watch time accrual: {len(awards)} users in {duration_ms:.1f}ms")
+        return self.last_accrual
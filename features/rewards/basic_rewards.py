@@ -1,4 +1,3 @@
-import asyncio
 
 
 class BasicRewards(commands.Cog):
@@ -30,8 +29,7 @@ class BasicRewards(commands.Cog):
         
     async def handle_temp_vip(self, ctx, user, _):
         await ctx.send(f"/vip {user}")
-        await asyncio.sleep(3600)  # 1 hour
-        await ctx.send(f"/unvip {user}")
+        self.bot.timers.call_later(3600, ctx.send, f"/unvip {user}", name=f"reward:vip:{user}")  # 1 hour
         
     async def handle_song_request(self, ctx, user, song_name):
         await ctx.send(f"Song request from {user}: {song_name} has been added to the queue!")
\ No newline at end of file
@@ -1,6 +1,5 @@
 # features/rewards/handlers.py
 from typing import Dict, Optional
-import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass
@@ -194,11 +193,13 @@ class RewardHandlers:
             channel = self.bot.get_channel(self.bot.channel_name)
             await channel.subscribers_only()
             
-            # Schedule mode disable
-            asyncio.create_task(self._schedule_mode_disable(
+            # Schedule mode disable, a new redemption extends the existing timer
+            self.bot.timers.call_later(
+                minutes * 60,
+                self._disable_mode,
                 channel.subscribers_only_off,
-                minutes * 60
-            ))
+                name='reward:subscriber_only'
+            )
             
             return RewardResult(
                 status=RewardStatus.SUCCESS,
@@ -240,9 +241,8 @@ class RewardHandlers:
                 message=f"@{user} Failed to display alert. Please try again later."
             )
 
-    async def _schedule_mode_disable(self, disable_func, delay: int):
-        """Schedule a chat mode to be disabled after delay"""
-        await asyncio.sleep(delay)
+    async def _disable_mode(self, disable_func):
+        """Disable a chat mode, run by a timer once its duration is over"""
         try:
             await disable_func()
         except Exception as e:
@@ -283,8 +283,7 @@ class RewardHandlers:
         try:
             await ctx.send("/emoteonly")
             await ctx.send("The emote-only mode has been activated!")
-            await asyncio.sleep(5)  # Simulate the delay for the mode
-            await ctx.send("/emoteonlyoff")
+            self.bot.timers.call_later(5, ctx.send, "/emoteonlyoff", name='reward:emote_only')
         except Exception as e:
             logger.error(f"Error activating emote-only mode: {e}")
             await ctx.send("Failed to activate emote-only mode.")
\ No newline at end of file
@@ -1,5 +1,4 @@
 # features/rewards/moderation.py
-import asyncio
 from features.rewards.base_handler import BaseRewardHandler
 
 class ModerationRewardHandler(BaseRewardHandler):
@@ -38,6 +37,6 @@ class ModerationRewardHandler(BaseRewardHandler):
     async def handle_emote_only(self, ctx, user: str, _: str) -> None:
         await ctx.send("/emoteonly")
         await self.send_random_message(ctx, 'emote_only', user=user)
-        await asyncio.sleep(30)
-        await ctx.send("/emoteonlyoff")
+        # The handler returns right away, the shared timer turns the mode off
+        self.bot.timers.call_later(30, ctx.send, "/emoteonlyoff", name='reward:emote_only')
         await self.bot.analytics.log_reward('emote_only')
\ No newline at end of file
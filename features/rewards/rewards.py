@@ -1,7 +1,6 @@
 # features/rewards/rewards.py
 from typing import Dict, Optional, Callable, Any
 import logging
-import asyncio
 from datetime import datetime, timezone
 from dataclasses import dataclass
 
@@ -141,15 +140,20 @@ class ChannelRewards:
             await ctx.send(f"Chat is now in emote-only mode for 5 minutes! (Redeemed by {user})")
             
             # Schedule emote-only mode disable
-            await asyncio.sleep(300)
-            await ctx.channel.emote_only(False)
-            await ctx.send("Emote-only mode has been disabled.")
+            self.bot.timers.call_later(300, self._end_emote_mode, ctx, name='reward:emote_mode')
             return True
 
         except Exception as e:
             logger.error(f"Error in emote-only mode reward: {e}")
             return False
 
+    async def _end_emote_mode(self, ctx: Any):
+        try:
+            await ctx.channel.emote_only(False)
+            await ctx.send("Emote-only mode has been disabled.")
+        except Exception as e:
+            logger.error(f"Error disabling emote-only mode: {e}")
+
     async def _check_cooldown(self, reward: RewardDefinition) -> bool:
         """Check if a reward is on cooldown"""
         if reward.cooldown == 0:
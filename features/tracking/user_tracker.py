@@ -1,36 +1,154 @@
 # features/tracking/user_tracker.py
 import logging
 import asyncio
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta, timezone
-from dataclasses import dataclass
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from collections.abc import Mapping
+from datetime import datetime, timezone
 from sqlalchemy import text
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Offset converting time.monotonic() readings to wall-clock epoch seconds
+_MONOTONIC_EPOCH = time.time() - time.monotonic()
+
+# Shared badge tuples, so identical badge sets are stored once
+_BADGE_CACHE: Dict[Tuple[str, ...], Tuple[str, ...]] = {(): ()}
+
+def intern_badges(badges) -> Tuple[str, ...]:
+    """Return a shared tuple for a badge collection, dicts contribute their keys"""
+    if not isinstance(badges, (dict, list, tuple, set, frozenset)):
+        return ()
+    key = tuple(sorted(badges))
+    return _BADGE_CACHE.setdefault(key, key)
+
+def monotonic_to_datetime(value: float) -> datetime:
+    return datetime.fromtimestamp(_MONOTONIC_EPOCH + value, timezone.utc)
+
+def datetime_to_monotonic(value: datetime) -> float:
+    return value.timestamp() - _MONOTONIC_EPOCH
+
 class UserActivity:
-    first_seen: datetime
-    last_seen: datetime
-    message_count: int = 0
-    time_watched: int = 0  # in minutes
-    last_message: Optional[str] = None
-    is_subscriber: bool = False
-    is_moderator: bool = False
-    custom_badges: List[str] = None
-
-    def __post_init__(self):
-        if self.custom_badges is None:
-            self.custom_badges = []
+    """Per-user session activity, timestamps are time.monotonic() floats"""
+    __slots__ = (
+        'first_seen_mono', 'last_seen_mono', 'message_count', 'time_watched',
+        'last_message', 'is_subscriber', 'is_moderator', 'custom_badges'
+    )
+
+    def __init__(self, is_subscriber: bool = False, is_moderator: bool = False,
+                 custom_badges: Tuple[str, ...] = (), now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        self.first_seen_mono = now
+        self.last_seen_mono = now
+        self.message_count = 0
+        self.time_watched = 0  # in minutes
+        self.last_message: Optional[str] = None
+        self.is_subscriber = is_subscriber
+        self.is_moderator = is_moderator
+        self.custom_badges = custom_badges
+
+    @property
+    def first_seen(self) -> datetime:
+        return monotonic_to_datetime(self.first_seen_mono)
+
+    @property
+    def last_seen(self) -> datetime:
+        return monotonic_to_datetime(self.last_seen_mono)
+
+    @last_seen.setter
+    def last_seen(self, value: datetime):
+        self.last_seen_mono = datetime_to_monotonic(value)
+
+    def __repr__(self) -> str:
+        return (
+            f"UserActivity(messages={self.message_count}, watched={self.time_watched}, "
+            f"subscriber={self.is_subscriber}, moderator={self.is_moderator})"
+        )
+
+class ShardedActivityStore(Mapping):
+    """Activity records split across shards, each guarded by its own lock"""
+
+    def __init__(self, shard_count: int = 16):
+        self.shard_count = max(1, shard_count)
+        self.shards: List[Dict[str, UserActivity]] = [{} for _ in range(self.shard_count)]
+        self.locks: List[asyncio.Lock] = [asyncio.Lock() for _ in range(self.shard_count)]
+
+    def shard_index(self, user_id: str) -> int:
+        return hash(user_id) % self.shard_count
+
+    def shard_for(self, user_id: str) -> Dict[str, UserActivity]:
+        return self.shards[self.shard_index(user_id)]
+
+    def lock_for(self, user_id: str) -> asyncio.Lock:
+        return self.locks[self.shard_index(user_id)]
+
+    def __getitem__(self, user_id: str) -> UserActivity:
+        return self.shard_for(user_id)[user_id]
+
+    def __setitem__(self, user_id: str, activity: UserActivity):
+        self.shard_for(user_id)[user_id] = activity
+
+    def __delitem__(self, user_id: str):
+        del self.shard_for(user_id)[user_id]
+
+    def __contains__(self, user_id) -> bool:
+        return user_id in self.shard_for(user_id)
+
+    def __iter__(self) -> Iterator[str]:
+        for shard in self.shards:
+            yield from list(shard)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+UPSERT_USER = text("""
+    INSERT INTO users (
+        twitch_id, username, first_seen, last_seen, 
+        is_subscriber, is_moderator
+    ) VALUES (
+        :user_id, :username, :first_seen, :last_seen,
+        :is_subscriber, :is_moderator
+    )
+    ON CONFLICT (twitch_id) DO UPDATE SET
+        username = :username,
+        last_seen = :last_seen,
+        is_subscriber = :is_subscriber,
+        is_moderator = :is_moderator
+""")
 
 class UserTracker:
-    def __init__(self, bot):
+    def __init__(self, bot, write_behind: bool = False,
+                 flush_interval_ms: int = 2000, flush_max_rows: int = 500,
+                 shard_count: int = 16, retain_messages: bool = False):
         self.bot = bot
-        self.active_users: Dict[str, UserActivity] = {}
+        # Message bodies are only kept when something (e.g. moderation) needs them
+        self.retain_messages = retain_messages
+        self.active_users = ShardedActivityStore(shard_count)
         self.session_start = datetime.now(timezone.utc)
         self.first_time_chatters: set = set()
         self.returning_users: set = set()
-        self._lock = asyncio.Lock()
+
+        # Every twitch_id known to the users table, loaded once at startup
+        self.known_users: set = set()
+        self.known_users_loaded = False
+
+        # Write-behind settings: dirty users are coalesced and flushed in batches
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_max_rows = flush_max_rows
+        self._dirty: Dict[str, Dict] = {}
+        self._pending_messages = 0
+        self._flush_needed = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self.flush_stats = {
+            'flushes': 0,
+            'rows_written': 0,
+            'messages_coalesced': 0,
+            'last_flush_rows': 0,
+            'last_flush_coalesced': 0,
+            'failed_flushes': 0
+        }
 
     async def track_user_message(self, message) -> bool:
         """Track a user's message and return whether they're a first-time chatter"""
@@ -38,43 +156,91 @@ class UserTracker:
         username = message.author.name
         is_first_time = False
 
-        async with self._lock:
-            try:
-                # Check if user exists in database
-                is_first_time = await self._is_first_time_chatter(user_id)
+        try:
+            # Only this user's shard is locked, and never across the upsert
+            async with self.active_users.lock_for(user_id):
+                # A user already active this session is never a first-time chatter
+                if user_id in self.active_users:
+                    is_first_time = False
+                else:
+                    is_first_time = await self._is_first_time_chatter(user_id)
                 
                 # Update or create activity record
+                now = time.monotonic()
                 if user_id not in self.active_users:
                     self.active_users[user_id] = UserActivity(
-                        first_seen=datetime.now(timezone.utc),
-                        last_seen=datetime.now(timezone.utc),
                         is_subscriber=message.author.is_subscriber,
-                        is_moderator=message.author.is_mod
+                        is_moderator=message.author.is_mod,
+                        now=now
                     )
                     if is_first_time:
                         self.first_time_chatters.add(user_id)
                     else:
                         self.returning_users.add(user_id)
+                    self.known_users.add(sys.intern(user_id))
 
                 # Update activity
                 activity = self.active_users[user_id]
-                activity.last_seen = datetime.now(timezone.utc)
+                activity.last_seen_mono = now
                 activity.message_count += 1
-                activity.last_message = message.content
+                if self.retain_messages:
+                    activity.last_message = message.content
                 activity.is_subscriber = message.author.is_subscriber
                 activity.is_moderator = message.author.is_mod
+                activity.custom_badges = intern_badges(getattr(message.author, 'badges', None))
 
-                # Update database
-                await self._update_user_db(user_id, username, activity)
-                
-                return is_first_time
-                
-            except Exception as e:
-                logger.error(f"Error tracking user message: {e}")
-                return False
+                if self.write_behind:
+                    self._mark_dirty(user_id, username, activity)
+                    return is_first_time
+                row = self._user_row(user_id, username, activity)
+
+            # Update database
+            await self._write_user_row(row)
+            return is_first_time
+            
+        except Exception as e:
+            logger.error(f"Error tracking user message: {e}")
+            return False
+
+    async def load_known_users(self, chunk_size: int = 10000) -> int:
+        """Load every known twitch_id into memory in bounded chunks"""
+        known = set()
+        last_id = 0
+        try:
+            while True:
+                async with self.bot.db.session_scope(readonly=True) as session:
+                    result = await session.execute(
+                        text("""
+                            SELECT id, twitch_id FROM users
+                            WHERE id > :last_id
+                            ORDER BY id
+                            LIMIT :chunk_size
+                        """),
+                        {'last_id': last_id, 'chunk_size': chunk_size}
+                    )
+                    rows = result.all()
+
+                for _, twitch_id in rows:
+                    known.add(sys.intern(str(twitch_id)))
+                if len(rows) < chunk_size:
+                    break
+                last_id = rows[-1][0]
+        except Exception as e:
+            logger.error(f"Error loading known users: {e}")
+            return 0
+
+        # Keep ids added by messages that arrived while loading
+        known.update(self.known_users)
+        self.known_users = known
+        self.known_users_loaded = True
+        logger.info(f"Loaded {len(known)} known users")
+        return len(known)
 
     async def _is_first_time_chatter(self, user_id: str) -> bool:
         """Check if this is a user's first time chatting"""
+        if self.known_users_loaded:
+            return user_id not in self.known_users
+
         try:
             async with self.bot.db.session_scope() as session:
                 stmt = text("SELECT first_seen FROM users WHERE twitch_id = :user_id")
@@ -85,48 +251,104 @@ class UserTracker:
             logger.error(f"Error checking first time chatter: {e}")
             return False
 
+    @staticmethod
+    def _user_row(user_id: str, username: str, activity: UserActivity) -> Dict:
+        """Build the upsert parameters for a user"""
+        return {
+            'user_id': user_id,
+            'username': username,
+            'first_seen': activity.first_seen,
+            'last_seen': activity.last_seen,
+            'is_subscriber': activity.is_subscriber,
+            'is_moderator': activity.is_moderator
+        }
+
     async def _update_user_db(self, user_id: str, username: str, activity: UserActivity):
         """Update user information in database"""
+        await self._write_user_row(self._user_row(user_id, username, activity))
+
+    async def _write_user_row(self, row: Dict):
+        """Upsert a single prepared user row"""
         try:
             async with self.bot.db.session_scope() as session:
-                stmt = text("""
-                    INSERT INTO users (
-                        twitch_id, username, first_seen, last_seen, 
-                        is_subscriber, is_moderator
-                    ) VALUES (
-                        :user_id, :username, :first_seen, :last_seen,
-                        :is_subscriber, :is_moderator
-                    )
-                    ON CONFLICT (twitch_id) DO UPDATE SET
-                        username = :username,
-                        last_seen = :last_seen,
-                        is_subscriber = :is_subscriber,
-                        is_moderator = :is_moderator
-                """)
-                
-                await session.execute(stmt, {
-                    'user_id': user_id,
-                    'username': username,
-                    'first_seen': activity.first_seen,
-                    'last_seen': activity.last_seen,
-                    'is_subscriber': activity.is_subscriber,
-                    'is_moderator': activity.is_moderator
-                })
+                await session.execute(UPSERT_USER, row)
         except Exception as e:
             logger.error(f"Error updating user database: {e}")
 
+    def _mark_dirty(self, user_id: str, username: str, activity: UserActivity):
+        """Queue a user row for the next batched flush"""
+        self._dirty[user_id] = self._user_row(user_id, username, activity)
+        self._pending_messages += 1
+        if len(self._dirty) >= self.flush_max_rows:
+            self._flush_needed.set()
+
+    async def flush(self) -> int:
+        """Write all dirty users in a single batched upsert, returns rows written"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return 0
+
+            rows = list(self._dirty.values())
+            messages = self._pending_messages
+            self._dirty = {}
+            self._pending_messages = 0
+            self._flush_needed.clear()
+
+            try:
+                async with self.bot.db.session_scope() as session:
+                    await session.execute(UPSERT_USER, rows)
+            except asyncio.CancelledError:
+                self._requeue(rows, messages)
+                raise
+            except Exception as e:
+                logger.error(f"Error flushing {len(rows)} users to database: {e}")
+                self.flush_stats['failed_flushes'] += 1
+                self._requeue(rows, messages)
+                return 0
+
+            coalesced = messages - len(rows)
+            self.flush_stats['flushes'] += 1
+            self.flush_stats['rows_written'] += len(rows)
+            self.flush_stats['messages_coalesced'] += coalesced
+            self.flush_stats['last_flush_rows'] = len(rows)
+            self.flush_stats['last_flush_coalesced'] = coalesced
+            logger.debug("Flushed %d users (%d messages coalesced)", len(rows), coalesced)
+            return len(rows)
+
+    def _requeue(self, rows: List[Dict], messages: int):
+        """Put unflushed rows back unless a newer version was queued meanwhile"""
+        for row in rows:
+            self._dirty.setdefault(row['user_id'], row)
+        self._pending_messages += messages
+
+    async def run_flusher(self):
+        """Background task flushing dirty users every interval or when the batch fills up"""
+        if not self.write_behind:
+            return
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._flush_needed.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                await self.flush()
+        except asyncio.CancelledError:
+            logger.info("User flusher task was cancelled.")
+            raise
+
     async def update_watch_time(self):
         """Update watch time for active users"""
-        async with self._lock:
-            current_time = datetime.now(timezone.utc)
-            for user_id, activity in self.active_users.items():
-                if (current_time - activity.last_seen) < timedelta(minutes=10):
-                    activity.time_watched += 1
+        active_since = time.monotonic() - 600  # seen in the last 10 minutes
+        for shard, lock in zip(self.active_users.shards, self.active_users.locks):
+            async with lock:
+                for activity in shard.values():
+                    if activity.last_seen_mono > active_since:
+                        activity.time_watched += 1
 
     async def get_user_stats(self, user_id: str) -> Optional[Dict]:
         """Get comprehensive stats for a user"""
         try:
-            async with self.bot.db.session_scope() as session:
+            async with self.bot.db.session_scope(readonly=True) as session:
                 stmt = text("""
                     SELECT 
                         username, first_seen, last_seen,
@@ -157,17 +379,17 @@ class UserTracker:
 
     async def cleanup_inactive_users(self):
         """Remove users who haven't been active for a while"""
-        async with self._lock:
-            current_time = datetime.now(timezone.utc)
-            inactive_threshold = timedelta(minutes=30)
-            
-            inactive_users = [
-                user_id for user_id, activity in self.active_users.items()
-                if (current_time - activity.last_seen) > inactive_threshold
-            ]
-            
-            for user_id in inactive_users:
-                del self.active_users[user_id]
+        inactive_before = time.monotonic() - 1800  # 30 minutes without messages
+
+        for shard, lock in zip(self.active_users.shards, self.active_users.locks):
+            async with lock:
+                inactive_users = [
+                    user_id for user_id, activity in shard.items()
+                    if activity.last_seen_mono < inactive_before
+                ]
+                
+                for user_id in inactive_users:
+                    del shard[user_id]
 
     async def get_session_stats(self) -> Dict:
         """Get statistics for the current session"""
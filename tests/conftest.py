@@ -40,7 +40,7 @@ async def db():
             self.Session = async_session
         
         @asynccontextmanager
-        async def session_scope(self):
+        async def session_scope(self, readonly: bool = False):
             """Provide a transactional scope around a series of operations."""
             session = self.Session()
             try:
@@ -0,0 +1,89 @@
+import pytest
+import asyncio
+import time
+from core.chat_queue import ChatQueue, TokenBucket, PRIORITY_HIGH, PRIORITY_LOW
+
+class Recorder:
+    def __init__(self):
+        self.sent = []
+
+    async def __call__(self, message):
+        self.sent.append(message)
+
+def test_token_bucket_stays_within_twitch_window():
+    """Burst plus refill over one window never exceeds the limit"""
+    bucket = TokenBucket(20, 30.0)
+    assert bucket.burst + bucket.rate * 30.0 <= 20
+    sent = sum(1 for _ in range(50) if bucket.try_acquire())
+    assert sent == int(bucket.burst)
+    assert bucket.time_until_available() > 0
+
+@pytest.mark.asyncio
+async def test_high_priority_messages_go_first():
+    """Queued raid-critical messages overtake normal and low ones"""
+    recorder = Recorder()
+    queue = ChatQueue(recorder)
+    queue.enqueue("flavor", priority=PRIORITY_LOW)
+    queue.enqueue("reply")
+    queue.enqueue("raid launched", priority=PRIORITY_HIGH)
+
+    assert await queue.drain(timeout=1) == 0
+    assert recorder.sent == ["raid launched", "reply", "flavor"]
+
+@pytest.mark.asyncio
+async def test_deduplicated_status_lines_are_sent_once():
+    """A status line opted into dedup is dropped while an identical one is queued"""
+    recorder = Recorder()
+    queue = ChatQueue(recorder)
+    assert queue.enqueue("⚠️ One more crew member needed!", dedup=True) is True
+    assert queue.enqueue("⚠️ One more crew member needed!", dedup=True) is False
+
+    await queue.drain(timeout=1)
+    assert recorder.sent == ["⚠️ One more crew member needed!"]
+    metrics = queue.get_metrics()
+    assert metrics['deduplicated'] == 1
+    assert metrics['sent'] == 1
+
+@pytest.mark.asyncio
+async def test_repeats_are_sent_unless_deduplicated():
+    """Identical replies or mod commands are all sent without dedup"""
+    recorder = Recorder()
+    queue = ChatQueue(recorder)
+    assert queue.enqueue("/emoteonlyoff") is True
+    assert queue.enqueue("/emoteonlyoff") is True
+    assert queue.enqueue("/emoteonlyoff", dedup=True) is False
+
+    await queue.drain(timeout=1)
+    assert recorder.sent == ["/emoteonlyoff", "/emoteonlyoff"]
+
+@pytest.mark.asyncio
+async def test_full_queue_sheds_low_priority_first():
+    """When full, low-priority messages are dropped to make room for higher ones"""
+    queue = ChatQueue(Recorder(), max_depth=2)
+    queue.enqueue("low 1", priority=PRIORITY_LOW)
+    queue.enqueue("low 2", priority=PRIORITY_LOW)
+
+    assert queue.enqueue("critical", priority=PRIORITY_HIGH) is True
+    assert queue.enqueue("low 3", priority=PRIORITY_LOW) is False
+    assert queue.get_metrics()['lanes'] == {'high': 1, 'normal': 0, 'low': 1}
+    assert queue.stats['dropped'] == 2
+
+@pytest.mark.asyncio
+async def test_worker_paces_sends():
+    """The worker sends the burst immediately and then waits for tokens"""
+    recorder = Recorder()
+    queue = ChatQueue(recorder)
+    queue.bucket = TokenBucket(limit=8, period=1.0, burst_fraction=0.25)
+    for i in range(4):
+        queue.enqueue(f"message {i}")
+
+    worker = asyncio.create_task(queue.run())
+    start = time.monotonic()
+    while len(recorder.sent) < 4 and time.monotonic() - start < 2:
+        await asyncio.sleep(0.01)
+    elapsed = time.monotonic() - start
+    queue.stop()
+    await worker
+
+    assert recorder.sent == [f"message {i}" for i in range(4)]
+    assert elapsed >= 0.25
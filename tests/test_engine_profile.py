@@ -0,0 +1,103 @@
+import pytest
+import asyncio
+from sqlalchemy import text
+from database.engine_profile import EngineProfile
+from database.manager import DatabaseManager
+
+@pytest.fixture
+async def file_db(tmp_path):
+    """Create a file-backed database manager with the tuned profile"""
+    manager = DatabaseManager(f"sqlite+aiosqlite:///{tmp_path / 'bot.db'}", profile=EngineProfile())
+    async with manager.session_scope() as session:
+        await session.execute(text('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)'))
+    yield manager
+    await manager.close()
+
+async def pragma(session, name):
+    return (await session.execute(text(f'PRAGMA {name}'))).scalar()
+
+@pytest.mark.asyncio
+async def test_pragmas_applied_per_connection(file_db):
+    """Writer and reader connections both get the profile PRAGMAs"""
+    async with file_db.session_scope() as session:
+        assert await pragma(session, 'journal_mode') == 'wal'
+        assert await pragma(session, 'synchronous') == 1  # NORMAL
+        assert await pragma(session, 'busy_timeout') == 5000
+        assert await pragma(session, 'query_only') == 0
+
+    async with file_db.session_scope(readonly=True) as session:
+        assert await pragma(session, 'cache_size') == -16384
+        assert await pragma(session, 'query_only') == 1
+
+@pytest.mark.asyncio
+async def test_readers_do_not_wait_for_the_writer(file_db):
+    """A reader sees committed data while a write transaction is still open"""
+    async with file_db.session_scope() as session:
+        await session.execute(text("INSERT INTO items (name) VALUES ('committed')"))
+
+    async with file_db.session_scope() as writer:
+        await writer.execute(text("INSERT INTO items (name) VALUES ('pending')"))
+        async with file_db.session_scope(readonly=True) as reader:
+            rows = (await reader.execute(text('SELECT name FROM items'))).all()
+            assert [row[0] for row in rows] == ['committed']
+
+@pytest.mark.asyncio
+async def test_nested_writer_scope_joins_outer_transaction(file_db):
+    """Nested writes in one task share the single writer connection instead of deadlocking"""
+    async with file_db.session_scope() as outer:
+        await outer.execute(text("INSERT INTO items (name) VALUES ('outer')"))
+        async with file_db.session_scope() as inner:
+            assert inner is outer
+            await inner.execute(text("INSERT INTO items (name) VALUES ('inner')"))
+
+    async def write(name):
+        async with file_db.session_scope() as session:
+            await session.execute(text('INSERT INTO items (name) VALUES (:name)'), {'name': name})
+
+    await asyncio.gather(*(write(f'item{i}') for i in range(10)))
+    async with file_db.session_scope(readonly=True) as session:
+        assert (await session.execute(text('SELECT COUNT(*) FROM items'))).scalar() == 12
+
+@pytest.mark.asyncio
+async def test_memory_database_shares_one_engine():
+    """In-memory databases cannot be split across connections"""
+    manager = DatabaseManager('sqlite+aiosqlite:///:memory:', profile=EngineProfile())
+    try:
+        assert manager.read_engine is manager.engine
+        async with manager.session_scope() as session:
+            await session.execute(text('CREATE TABLE items (id INTEGER PRIMARY KEY)'))
+        async with manager.session_scope(readonly=True) as session:
+            assert (await session.execute(text('SELECT COUNT(*) FROM items'))).scalar() == 0
+    finally:
+        await manager.close()
+
+@pytest.mark.asyncio
+async def test_child_task_waits_for_parent_writer(tmp_path, caplog):
+    """A task started inside a writer scope gets its own writer session and waits for the parent"""
+    manager = DatabaseManager(
+        f"sqlite+aiosqlite:///{tmp_path / 'bot.db'}", profile=EngineProfile(pool_timeout=0.2)
+    )
+    try:
+        async def write(name):
+            async with manager.session_scope() as session:
+                await session.execute(text('INSERT INTO items (name) VALUES (:name)'), {'name': name})
+                return session
+
+        async with manager.session_scope() as outer:
+            await outer.execute(text('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)'))
+            child = asyncio.create_task(write('child'))
+            await asyncio.sleep(0.05)
+            assert not child.done()
+        assert await child is not outer
+        assert 'waits on the writer' in caplog.text
+
+        # Awaiting the child from inside the scope can only time out on the single writer
+        with pytest.raises(Exception, match='QueuePool limit'):
+            async with manager.session_scope():
+                await asyncio.create_task(write('stalled'))
+
+        async with manager.session_scope(readonly=True) as session:
+            rows = (await session.execute(text('SELECT name FROM items'))).all()
+            assert [row[0] for row in rows] == ['child']
+    finally:
+        await manager.close()
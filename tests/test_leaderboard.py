@@ -0,0 +1,118 @@
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import text
+from features.points.points_manager import PointsManager
+
+@pytest.fixture
+async def points_manager(db):
+    """Create a points manager with a few named users"""
+    bot = MagicMock()
+    bot.db = db
+    manager = PointsManager(bot)
+    await manager.setup()
+    async with db.session_scope() as session:
+        await session.execute(
+            text('INSERT INTO users (twitch_id, username) VALUES (:id, :name)'),
+            [{'id': str(i), 'name': f'user{i}'} for i in range(1, 8)]
+        )
+    return manager
+
+@pytest.mark.asyncio
+async def test_leaderboard_seeds_from_database(points_manager, db):
+    """Balances written before load are picked up from user_points"""
+    async with db.session_scope() as session:
+        await session.execute(
+            text('INSERT INTO user_points (user_id, points) VALUES (:id, :points)'),
+            [{'id': '1', 'points': 50}, {'id': '2', 'points': 300}, {'id': '3', 'points': 120}]
+        )
+
+    assert await points_manager.leaderboard.load() == 3
+    assert await points_manager.leaderboard.top(2) == [('user2', 300), ('user3', 120)]
+    assert await points_manager.leaderboard.get_rank('1') == (3, 50)
+    assert await points_manager.leaderboard.get_rank('7') is None
+
+@pytest.mark.asyncio
+async def test_leaderboard_follows_points_writes(points_manager):
+    """Credits, debits, transfers and bulk awards reorder the leaderboard without a reload"""
+    leaderboard = points_manager.leaderboard
+    await leaderboard.load()
+
+    await points_manager.add_points('1', 100)
+    await points_manager.add_points('2', 200)
+    await points_manager.transfer_points('2', '3', 150)
+    await points_manager.remove_points('1', 40)
+    await points_manager.add_points_bulk([{'user_id': '4', 'amount': 80}, {'user_id': '1', 'amount': 5}])
+    await points_manager.set_points('user5', 10)
+
+    assert await leaderboard.top(5) == [
+        ('user3', 150), ('user4', 80), ('user1', 65), ('user2', 50), ('user5', 10)
+    ]
+    assert leaderboard.rank('2') == (4, 50)
+
+    report = await leaderboard.verify()
+    assert report['consistent'] is True
+    assert report['checked'] == 5
+
+@pytest.mark.asyncio
+async def test_leaderboard_skips_unknown_users(points_manager):
+    """Balances without a users row are ranked but not shown on !top"""
+    await points_manager.leaderboard.load()
+    await points_manager.add_points('ghost', 1000)
+    await points_manager.add_points('1', 10)
+
+    assert await points_manager.leaderboard.top(5) == [('user1', 10)]
+    assert points_manager.leaderboard.rank('ghost') == (1, 1000)
+
+@pytest.mark.asyncio
+async def test_late_users_row_is_picked_up(points_manager, db):
+    """A users row written after the first !top shows up once the miss is retried"""
+    leaderboard = points_manager.leaderboard
+    await leaderboard.load()
+    await points_manager.add_points('late', 500)
+    assert await leaderboard.top(1) == []
+
+    async with db.session_scope() as session:
+        await session.execute(text("INSERT INTO users (twitch_id, username) VALUES ('late', 'latecomer')"))
+    assert await leaderboard.top(1) == []
+
+    leaderboard.name_retry_seconds = 0
+    assert await leaderboard.top(1) == [('latecomer', 500)]
+
+@pytest.mark.asyncio
+async def test_verify_detects_and_repairs_drift(points_manager, db):
+    """Changes made behind the manager's back are reported and repaired"""
+    await points_manager.leaderboard.load()
+    await points_manager.add_points('1', 100)
+    async with db.session_scope() as session:
+        await session.execute(text("UPDATE user_points SET points = 999 WHERE user_id = '1'"))
+        await session.execute(text("INSERT INTO user_points (user_id, points) VALUES ('2', 5)"))
+
+    report = await points_manager.leaderboard.verify(repair=True)
+    assert report['mismatched'] == 1
+    assert report['missing'] == 1
+    assert report['repaired'] is True
+    assert (await points_manager.leaderboard.verify())['consistent'] is True
+    assert points_manager.leaderboard.rank('1') == (1, 999)
+
+@pytest.mark.asyncio
+async def test_lookups_are_chunked(points_manager, db):
+    """Reloading and resolving more users than one IN list holds reads them all"""
+    leaderboard = points_manager.leaderboard
+    await leaderboard.load()
+    user_ids = [f'bulk{i}' for i in range(1000)]
+    async with db.session_scope() as session:
+        await session.execute(
+            text('INSERT INTO user_points (user_id, points) VALUES (:id, :points)'),
+            [{'id': user_id, 'points': i} for i, user_id in enumerate(user_ids)]
+        )
+        await session.execute(
+            text('INSERT INTO users (twitch_id, username) VALUES (:id, :name)'),
+            [{'id': user_id, 'name': user_id} for user_id in user_ids]
+        )
+
+    await leaderboard._reload_balances(user_ids)
+    await leaderboard._resolve_names(user_ids)
+
+    assert len(leaderboard) == 1000
+    assert leaderboard.rank('bulk0') == (1000, 0)
+    assert await leaderboard.top(1) == [('bulk999', 999)]
@@ -0,0 +1,45 @@
+import pytest
+import asyncio
+import time
+from unittest.mock import MagicMock, AsyncMock
+from utils.alert_system import AlertManager, AlertSeverity
+from utils.loop_monitor import LoopMonitor
+
+async def blocking_handler():
+    time.sleep(0.12)
+
+@pytest.mark.asyncio
+async def test_lag_and_slow_callbacks_are_recorded():
+    """A blocking coroutine shows up as loop lag and as a named slow callback"""
+    original_run = asyncio.events.Handle._run
+    monitor = LoopMonitor(interval_ms=10, slow_callback_ms=50, track_callbacks=True)
+    task = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.05)
+
+    await asyncio.create_task(blocking_handler())
+    await asyncio.sleep(0.05)
+    monitor.stop()
+    await task
+
+    metrics = monitor.get_metrics()
+    assert metrics['lag_ms']['max'] >= 80
+    assert any('blocking_handler' in entry['name'] for entry in metrics['slow_callbacks'])
+    assert asyncio.events.Handle._run is original_run
+
+@pytest.mark.asyncio
+async def test_loop_lag_alert_names_culprits():
+    """Lag above the critical threshold raises a critical alert"""
+    manager = AlertManager(MagicMock())
+    handler = AsyncMock()
+    manager.add_alert_handler(handler)
+
+    await manager.check_event_loop({'lag_ms': {'p95': 20}, 'top_slow_callbacks': []})
+    handler.assert_not_called()
+
+    await manager.check_event_loop({
+        'lag_ms': {'p95': 800},
+        'top_slow_callbacks': [('Task-5:RewardHandlers.handle_reward', 3)]
+    })
+    alert = handler.call_args.args[0]
+    assert alert['severity'] == AlertSeverity.CRITICAL
+    assert 'RewardHandlers.handle_reward' in alert['message']
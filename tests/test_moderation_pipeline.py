@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from features.moderation.moderator import ModerationManager
+from features.moderation.pipeline import ModerationPipeline
+from features.moderation.timeout_manager import TimeoutManager
+
+channel = SimpleNamespace(send=AsyncMock(), timeout=AsyncMock())
+
+def make_message(content, user_id=1, name='viewer', is_mod=False, badges=None):
+    author = SimpleNamespace(
+        id=user_id, name=name, is_mod=is_mod, is_broadcaster=False, badges=badges or {}
+    )
+    return SimpleNamespace(id=f"msg-{content}", content=content, author=author, channel=channel)
+
+@pytest.fixture
+def pipeline():
+    channel.send = AsyncMock()
+    channel.timeout = AsyncMock()
+    bot = MagicMock()
+    bot.send_chat_message = AsyncMock()
+    bot.timeout_manager = TimeoutManager()
+    moderation = ModerationManager(bot)
+    moderation.phrase_matcher.set_phrases(['free vbucks'])
+    moderation.phrase_matcher.compile()
+    return ModerationPipeline(moderation, min_length=3, trusted_users=['Regular'])
+
+def sent_lines(pipeline):
+    return [call.args[0] for call in pipeline.moderation.bot.send_chat_message.await_args_list]
+
+@pytest.mark.asyncio
+async def test_prefilter_skips_without_scanning(pipeline):
+    """Mods, VIPs, trusted users and short messages never reach the scan"""
+    pipeline.moderation.scan = MagicMock()
+    assert pipeline.process(make_message('FREE VBUCKS HERE', is_mod=True)) is None
+    assert pipeline.process(make_message('FREE VBUCKS HERE', badges={'vip': '1'})) is None
+    assert pipeline.process(make_message('FREE VBUCKS HERE', name='regular')) is None
+    assert pipeline.process(make_message('gg')) is None
+
+    pipeline.moderation.scan.assert_not_called()
+    assert pipeline.hits == {'skipped_mod': 1, 'skipped_trusted': 2, 'skipped_short': 1}
+
+@pytest.mark.asyncio
+async def test_violation_is_enforced_in_the_background(pipeline):
+    """process returns before the delete and timeout are sent"""
+    violation = pipeline.process(make_message('get free vbucks now', name='spammer'))
+    assert violation == "banned phrase"
+    assert sent_lines(pipeline) == []
+
+    await pipeline.drain()
+    channel.send.assert_awaited_once_with("/delete msg-get free vbucks now")
+    channel.timeout.assert_awaited_once_with('spammer', 300, "AutoMod: banned phrase (Warning #1)")
+    lines = sent_lines(pipeline)
+    assert len(lines) == 1
+    assert lines[0].startswith("@spammer message deleted for banned phrase")
+    assert await pipeline.moderation.bot.timeout_manager.get_remaining_timeout('spammer') in (299, 300)
+    assert pipeline.hits['enforced'] == 1
+
+@pytest.mark.asyncio
+async def test_fused_scan_rules(pipeline):
+    """Caps and spam come from the same scan, repeated commands aren't spam"""
+    assert pipeline.process(make_message('WHY IS EVERYONE SHOUTING')) == "excessive caps"
+    for _ in range(3):
+        assert pipeline.process(make_message('!join 100', user_id=2)) is None
+    results = [pipeline.process(make_message('follow my channel pls', user_id=3)) for _ in range(3)]
+    assert results == [None, None, "spam"]
+    await pipeline.drain()
+
+    metrics = pipeline.get_metrics()
+    assert metrics['hits']['scanned'] == 7
+    assert metrics['hits']['spam'] == 1
+    assert metrics['stages']['scan']['count'] == 7
+    assert metrics['stages']['enforce']['count'] == 2
+
+@pytest.mark.asyncio
+async def test_escalating_warnings(pipeline):
+    pipeline.process(make_message('free vbucks'))
+    await pipeline.drain()
+    pipeline.process(make_message('free vbucks again'))
+    await pipeline.drain()
+
+    assert pipeline.moderation.user_warnings['1'] == 2
+    assert [info.duration for info in pipeline.moderation.timeout_history['1']] == [300, 600]
+
+@pytest.mark.asyncio
+async def test_failed_timeout_is_not_announced_or_persisted(pipeline):
+    """Nothing is announced, counted or stored unless the timeout went through"""
+    channel.timeout = AsyncMock(side_effect=RuntimeError("not a moderator"))
+    pipeline.process(make_message('free vbucks'))
+    await pipeline.drain()
+
+    assert pipeline.hits['enforce_errors'] == 1
+    assert sent_lines(pipeline) == []
+    assert pipeline.moderation.user_warnings.get('1') is None
+    assert pipeline.moderation.timeout_history == {}
+    assert not await pipeline.moderation.bot.timeout_manager.is_timeout('viewer')
@@ -0,0 +1,70 @@
+import random
+import pytest
+
+from features.moderation.phrase_matcher import PhraseMatcher
+
+def naive(phrases, content):
+    return any(phrase in content for phrase in phrases)
+
+def test_matches_like_substring_search():
+    """The compiled matcher agrees with a plain substring scan"""
+    rng = random.Random(7)
+    words = [''.join(rng.choices('abcde', k=rng.randint(1, 4))) for _ in range(200)]
+    phrases = {' '.join(rng.sample(words, rng.randint(1, 2))) for _ in range(300)}
+    matcher = PhraseMatcher(phrases)
+
+    for _ in range(500):
+        content = ' '.join(rng.choices(words, k=rng.randint(1, 8)))
+        found = matcher.search(content)
+        assert (found is not None) == naive(phrases, content)
+        if found:
+            assert found in content and found in phrases
+
+def test_prefixes_and_regex_characters():
+    """Phrases that prefix others, and regex metacharacters, match literally"""
+    matcher = PhraseMatcher(['free', 'free v-bucks', 'c++', 'a.b', 'Spam'])
+
+    assert matcher.search('get free stuff') == 'free'
+    assert matcher.search('i love c++') == 'c++'
+    assert matcher.search('axb') is None
+    assert matcher.search('a.b') == 'a.b'
+    assert matcher.search('spam') == 'spam'
+    assert PhraseMatcher().search('anything') is None
+
+def test_incremental_changes_apply_on_compile():
+    """Adds and removes edit the trie in place and take effect when compiled"""
+    matcher = PhraseMatcher(['ab', 'abc'])
+    assert matcher.add('xyz') is True
+    assert matcher.add('XYZ ') is False
+    assert matcher.is_stale
+    assert matcher.search('xyz') is None
+
+    matcher.compile()
+    assert matcher.search('xyz') == 'xyz'
+
+    assert matcher.remove('ab') is True
+    assert matcher.remove('missing') is False
+    matcher.compile()
+    assert matcher.search('zab') is None
+    assert matcher.search('zabc') == 'abc'
+    assert matcher.phrases == ['abc', 'xyz']
+
+    matcher.remove('abc')
+    matcher.remove('xyz')
+    matcher.compile()
+    assert matcher.search('abc xyz') is None
+
+@pytest.mark.asyncio
+async def test_rebuild_swaps_only_newer_patterns():
+    """A rebuild compiles off the loop and never replaces a newer pattern"""
+    matcher = PhraseMatcher(['one'])
+    matcher.add('two')
+    await matcher.rebuild()
+    assert matcher.search('two') == 'two'
+    assert not matcher.is_stale
+
+    stale = matcher.compiled_revision
+    matcher.add('three')
+    matcher.compile()
+    matcher._swap(stale, None)
+    assert matcher.search('three') == 'three'
@@ -0,0 +1,163 @@
+import pytest
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from unittest.mock import MagicMock
+from sqlalchemy import text
+from features.points.points_manager import PointsManager
+from features.tracking.user_tracker import UserActivity
+
+@pytest.fixture
+async def points_manager(db):
+    """Create a points manager backed by the test database"""
+    bot = MagicMock()
+    bot.db = db
+    manager = PointsManager(bot)
+    await manager.setup()
+    return manager
+
+@pytest.mark.asyncio
+async def test_watch_time_accrual_is_batched(points_manager, db):
+    """Every active viewer is credited in one tick, inactive viewers are skipped"""
+    now = time.monotonic()
+    chatter = UserActivity(now=now)
+    chatter.message_count = 2
+    lurker = UserActivity(is_subscriber=True, now=now)
+    idle = UserActivity(now=now - 3600)
+    points_manager.bot.user_tracker.active_users = {'1': chatter, '2': lurker, '3': idle}
+
+    stats = await points_manager.update_watch_time_points(record_transactions=True)
+
+    assert stats['users'] == 2
+    assert stats['success'] is True
+    assert await points_manager.get_points('1') == 20
+    assert await points_manager.get_points('2') == 15
+    assert await points_manager.get_points('3') == 0
+
+    async with db.session_scope() as session:
+        result = await session.execute(text('SELECT COUNT(*) FROM points_transactions'))
+        assert result.scalar() == 2
+
+@pytest.mark.asyncio
+async def test_remove_points_is_conditional(points_manager):
+    """A debit only succeeds when the balance covers it"""
+    await points_manager.add_points('1', 500)
+
+    assert await points_manager.remove_points('1', 300) is True
+    assert await points_manager.remove_points('1', 300) is False
+    assert await points_manager.remove_points('unknown', 1) is False
+    assert await points_manager.get_points('1') == 200
+
+@pytest.mark.asyncio
+async def test_concurrent_debits_never_overdraw(points_manager):
+    """Concurrent debits cannot spend the same points twice"""
+    await points_manager.add_points('1', 1000)
+    results = await asyncio.gather(*(points_manager.remove_points('1', 300) for _ in range(5)))
+
+    assert sum(results) == 3
+    assert await points_manager.get_points('1') == 100
+
+@pytest.mark.asyncio
+async def test_transfer_points(points_manager):
+    """Transfers debit the sender and credit the target atomically"""
+    await points_manager.add_points('1', 100)
+
+    assert await points_manager.transfer_points('1', '2', 60) is True
+    assert await points_manager.transfer_points('1', '2', 60) is False
+    assert await points_manager.get_points('1') == 40
+    assert await points_manager.get_points('2') == 60
+
+@pytest.mark.asyncio
+async def test_balance_cache_is_updated_in_place(points_manager):
+    """Reads after writes are served from the cache and stay exact"""
+    await points_manager.add_points('1', 500)
+    await points_manager.remove_points('1', 200)
+    await points_manager.add_points_bulk([{'user_id': '1', 'amount': 50}])
+
+    misses = points_manager.cache_stats['misses']
+    assert await points_manager.get_points('1') == 350
+    assert points_manager.cache_stats['misses'] == misses
+    assert points_manager.cache_stats['hits'] >= 1
+
+class GatedDatabase:
+    """Holds writers before their first statement and readers after theirs"""
+
+    def __init__(self, db):
+        self.db = db
+        self.write_gate = asyncio.Event()
+        self.read_gate = asyncio.Event()
+        self.read_done = asyncio.Event()
+
+    @asynccontextmanager
+    async def session_scope(self, readonly: bool = False):
+        async with self.db.session_scope(readonly) as session:
+            if not readonly:
+                await self.write_gate.wait()
+            yield session
+            if readonly:
+                self.read_done.set()
+                await self.read_gate.wait()
+
+@pytest.mark.asyncio
+async def test_read_overlapping_a_write_is_not_cached(points_manager, db):
+    """A read that started while a write was running must not cache its stale result"""
+    await points_manager.add_points('1', 100)
+    points_manager._balances.clear()
+    gated = GatedDatabase(db)
+    points_manager.bot.db = gated
+
+    writer = asyncio.create_task(points_manager.add_points('1', 50))
+    await asyncio.sleep(0)
+    reader = asyncio.create_task(points_manager.get_points('1'))
+    await gated.read_done.wait()
+
+    # The write commits and caches 150, then the older read finishes
+    gated.write_gate.set()
+    assert await writer is True
+    gated.read_gate.set()
+    assert await reader == 100
+
+    assert await points_manager.get_points('1') == 150
+
+@pytest.mark.asyncio
+async def test_balance_cache_evicts_least_recently_used(points_manager):
+    """The cache never grows beyond its configured size"""
+    points_manager.cache_max_entries = 2
+    for user_id in ('1', '2', '3'):
+        await points_manager.add_points(user_id, 10)
+
+    assert len(points_manager._balances) == 2
+    assert '1' not in points_manager._balances
+    assert points_manager.cache_stats['evictions'] == 1
+    assert await points_manager.get_points('1') == 10
+
+@pytest.mark.asyncio
+async def test_set_points_by_username(points_manager, db):
+    """Setting points updates both the database and the cache"""
+    async with db.session_scope() as session:
+        await session.execute(
+            text('INSERT INTO users (twitch_id, username) VALUES (:id, :name)'),
+            {'id': '1', 'name': 'Alice'}
+        )
+
+    assert await points_manager.set_points('alice', 750) is True
+    assert await points_manager.set_points('nobody', 750) is False
+    assert points_manager._balances['1'] == 750
+    points_manager._balances.clear()
+    assert await points_manager.get_points('1') == 750
+
+@pytest.mark.asyncio
+async def test_remove_points_bulk_debits_only_affordable_users(points_manager):
+    """A bulk debit applies each affordable row and reports the rest as None"""
+    await points_manager.add_points_bulk([{'user_id': str(i), 'amount': 100 * i} for i in range(1, 4)])
+
+    balances = await points_manager.remove_points_bulk([
+        {'user_id': '1', 'amount': 150},
+        {'user_id': '2', 'amount': 150},
+        {'user_id': '3', 'amount': 300},
+        {'user_id': 'unknown', 'amount': 1}
+    ])
+
+    assert balances == [None, 50, 0, None]
+    assert await points_manager.get_points('1') == 100
+    assert await points_manager.get_points('2') == 50
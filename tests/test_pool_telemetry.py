@@ -0,0 +1,88 @@
+import pytest
+import asyncio
+from unittest.mock import MagicMock, AsyncMock
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from database.engine_profile import EngineProfile
+from database.manager import DatabaseManager
+from utils.alert_system import AlertManager, AlertSeverity
+from utils.histogram import LatencyHistogram
+
+@pytest.fixture
+async def file_db(tmp_path):
+    """Create a file-backed database manager with small pools"""
+    profile = EngineProfile(read_pool_size=2, read_max_overflow=0, pool_timeout=0.2)
+    manager = DatabaseManager(f"sqlite+aiosqlite:///{tmp_path / 'bot.db'}", profile=profile)
+    yield manager
+    await manager.close()
+
+def test_histogram_percentiles():
+    """Percentiles land in the right bucket and stay within the observed range"""
+    histogram = LatencyHistogram()
+    for value in range(1, 101):
+        histogram.record(float(value))
+
+    assert histogram.count == 100
+    assert histogram.mean == pytest.approx(50.5)
+    assert 45 <= histogram.percentile(50) <= 60
+    assert 90 <= histogram.percentile(95) <= 100
+    assert histogram.percentile(100) == 100
+
+@pytest.mark.asyncio
+async def test_pool_status_reports_checkouts(file_db):
+    """Checkouts, checkins and wait times are reported per pool"""
+    for _ in range(3):
+        async with file_db.session_scope() as session:
+            await session.execute(text('SELECT 1'))
+    async with file_db.session_scope(readonly=True) as session:
+        await session.execute(text('SELECT 1'))
+        status = await file_db.get_pool_status()
+        assert status['pools']['reader']['checkedout'] == 1
+
+    status = await file_db.get_pool_status()
+    writer = status['pools']['writer']
+    assert writer['capacity'] == 1
+    assert writer['checkouts'] == 3 and writer['checkins'] == 3
+    assert writer['wait_ms']['count'] == 3
+    assert status['capacity'] == 3
+    assert status['checkedout'] == 0
+
+@pytest.mark.asyncio
+async def test_pool_timeouts_are_counted(file_db):
+    """Starving the reader pool raises and is counted as a timeout"""
+    release = asyncio.Event()
+
+    async def hold():
+        async with file_db.session_scope(readonly=True) as session:
+            await session.execute(text('SELECT 1'))
+            await release.wait()
+
+    holders = [asyncio.create_task(hold()) for _ in range(2)]
+    await asyncio.sleep(0.05)
+    with pytest.raises(PoolTimeoutError):
+        async with file_db.session_scope(readonly=True) as session:
+            await session.execute(text('SELECT 1'))
+    release.set()
+    await asyncio.gather(*holders)
+
+    status = await file_db.get_pool_status()
+    assert status['pools']['reader']['timeouts'] == 1
+    assert status['max_wait_p95_ms'] >= 150
+
+@pytest.mark.asyncio
+async def test_alerts_consume_pool_status():
+    """Saturation, slow checkouts and timeouts raise alerts without dividing by zero"""
+    bot = MagicMock()
+    manager = AlertManager(bot)
+    handler = AsyncMock()
+    manager.add_alert_handler(handler)
+
+    await manager.check_connection_pool({'size': 0, 'checkedout': 0})
+    handler.assert_not_called()
+
+    await manager.check_connection_pool({
+        'capacity': 10, 'checkedout': 10, 'max_wait_p95_ms': 1500, 'timeouts': 2
+    })
+    alerts = [call.args[0] for call in handler.call_args_list]
+    assert {alert['type'] for alert in alerts} == {'connection_pool', 'pool_wait'}
+    assert all(alert['severity'] == AlertSeverity.CRITICAL for alert in alerts)
@@ -0,0 +1,60 @@
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+from sqlalchemy import text
+from database.engine_profile import EngineProfile
+from database.manager import DatabaseManager
+from utils.alert_system import AlertManager
+from utils.query_profiler import fingerprint_sql
+
+@pytest.fixture
+async def file_db(tmp_path):
+    """Create a file-backed database manager with a low slow-query threshold"""
+    manager = DatabaseManager(
+        f"sqlite+aiosqlite:///{tmp_path / 'bot.db'}", profile=EngineProfile(), slow_query_ms=50
+    )
+    async with manager.session_scope() as session:
+        await session.execute(text('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)'))
+    yield manager
+    await manager.close()
+
+def test_fingerprint_normalizes_literals():
+    """Statements differing only in literals, params or list length share a fingerprint"""
+    assert fingerprint_sql("SELECT * FROM users WHERE id = 5 AND name = 'bob'") == \
+        fingerprint_sql("SELECT *\n  FROM users WHERE id = :id AND name = :name -- lookup")
+    assert fingerprint_sql("SELECT 1 FROM t WHERE id IN (:a, :b)") == \
+        fingerprint_sql("SELECT 1 FROM t WHERE id IN (1, 2, 3, 4)")
+
+@pytest.mark.asyncio
+async def test_statements_are_aggregated_per_fingerprint(file_db):
+    """Every statement is timed and grouped with its row counts"""
+    for i in range(5):
+        async with file_db.session_scope() as session:
+            await session.execute(text('INSERT INTO items (name) VALUES (:name)'), {'name': f'item{i}'})
+    async with file_db.session_scope(readonly=True) as session:
+        await session.execute(text('SELECT name FROM items WHERE id = :id'), {'id': 1})
+
+    metrics = await file_db.get_performance_metrics()
+    insert = metrics['query_metrics']['INSERT INTO items (name) VALUES (?)']
+    assert insert['total_queries'] == 5
+    assert insert['rows'] == 5
+    assert insert['latency_ms']['count'] == 5
+    assert 'SELECT name FROM items WHERE id = ?' in metrics['query_metrics']
+    assert 'cpu_avg' in metrics['resource_usage']
+
+@pytest.mark.asyncio
+async def test_slow_query_alert_fires_once_per_cooldown(file_db):
+    """Slow statements reach AlertManager through get_performance_metrics"""
+    file_db.performance.record_query('SELECT slow', 700)
+
+    bot = MagicMock()
+    bot.db = file_db
+    manager = AlertManager(bot)
+    handler = AsyncMock()
+    manager.add_alert_handler(handler)
+
+    await manager.check_all_metrics()
+    await manager.check_all_metrics()
+
+    alerts = [call.args[0] for call in handler.call_args_list if call.args[0]['type'] == 'query_performance']
+    assert len(alerts) == 1
+    assert 'SELECT slow' in alerts[0]['message']
@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from core.raid_errors import ErrorCode, LedgerError
+from core.raid_ledger import RaidLedger
+from core.raid_manager import RaidManager, RaidState
+from core.raid_messages import RaidMessageHandler
+from features.points.points_manager import PointsManager
+
+@pytest.fixture
+async def raid(db):
+    """A recruiting raid backed by the test database"""
+    bot = MagicMock()
+    bot.db = db
+    bot.send_chat_message = AsyncMock()
+    bot.get_viewer_count = AsyncMock(return_value=500)
+    bot.points_manager = PointsManager(bot)
+    bot.raid_messages = RaidMessageHandler(bot, join_interval=0.05)
+    await bot.points_manager.setup()
+
+    manager = RaidManager(bot)
+    assert await manager.start_raid()
+    yield manager
+    await manager._force_reset()
+
+@pytest.mark.asyncio
+async def test_concurrent_joins_share_debit_transactions(raid):
+    """Hundreds of joins all land, and their debits are batched"""
+    points = raid.bot.points_manager
+    await points.add_points_bulk([{'user_id': str(i), 'amount': 500} for i in range(200)])
+
+    results = await asyncio.gather(*(raid.join_raid(str(i), f"user{i}", 100) for i in range(200)))
+
+    assert all(ok for ok, _ in results)
+    assert len(raid.participants) == 200
+    assert raid.ledger.stats['batches'] < 10
+    assert await points.get_points('7') == 400
+    assert not raid._reservations
+
+@pytest.mark.asyncio
+async def test_duplicate_and_unaffordable_joins_are_rejected(raid):
+    """A user joining twice at once is debited once, a user without points is not added"""
+    await raid.bot.points_manager.add_points('1', 500)
+
+    results = await asyncio.gather(
+        raid.join_raid('1', 'alice', 200),
+        raid.join_raid('1', 'alice', 200),
+        raid.join_raid('2', 'bob', 200)
+    )
+
+    assert [ok for ok, _ in results] == [True, False, False]
+    assert list(raid.participants) == ['1']
+    assert await raid.bot.points_manager.get_points('1') == 300
+
+@pytest.mark.asyncio
+async def test_join_refunded_when_raid_resets_during_debit(raid):
+    """A debit that completes after the raid reset is refunded"""
+    points = raid.bot.points_manager
+    await points.add_points('1', 500)
+
+    join = asyncio.create_task(raid.join_raid('1', 'alice', 200))
+    await asyncio.sleep(0)
+    await raid._force_reset()
+    ok, _ = await join
+
+    assert ok is False
+    assert raid.state == RaidState.INACTIVE
+    assert not raid.participants
+    assert await points.get_points('1') == 500
+
+@pytest.mark.asyncio
+async def test_failed_debit_is_not_reported_as_insufficient_points(raid):
+    """A database error during the debit gets its own message and leaves the balance alone"""
+    points = raid.bot.points_manager
+    await points.add_points('1', 500)
+    points.debit_in_session = AsyncMock(side_effect=RuntimeError("database is locked"))
+
+    ok, message = await raid.join_raid('1', 'alice', 200)
+
+    assert ok is False
+    assert message == ErrorCode.DEBIT_FAILED.value
+    assert not raid.participants
+    assert not raid._reservations
+    assert await points.get_points('1') == 500
+
+@pytest.mark.asyncio
+async def test_cancelled_ledger_fails_waiting_debits(db):
+    """Stopping the flusher mid-commit fails every waiting debit instead of hanging"""
+    stalled = asyncio.Event()
+    async def stall(session, debits):
+        stalled.set()
+        await asyncio.Event().wait()
+
+    bot = MagicMock()
+    bot.db = db
+    bot.points_manager.debit_in_session = stall
+    ledger = RaidLedger(bot)
+
+    first = asyncio.create_task(ledger.debit('1', 100))
+    await stalled.wait()
+    second = asyncio.create_task(ledger.debit('2', 100))
+    await asyncio.sleep(0)
+    ledger._flusher.cancel()
+
+    for debit in (first, second):
+        with pytest.raises(LedgerError):
+            await asyncio.wait_for(debit, 1)
+    bot.points_manager.debits_failed.assert_called_once()
+    assert ledger.get_stats()['pending'] == 0
@@ -0,0 +1,122 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy import text
+
+from core.raid_journal import RaidReplay
+from core.raid_manager import RaidManager
+from core.raid_messages import RaidMessageHandler
+from core.raid_recovery import RaidRecoveryManager
+from features.points.points_manager import PointsManager
+from utils.timer_wheel import TimerService
+
+@pytest.fixture
+async def bot(db):
+    bot = MagicMock()
+    bot.db = db
+    bot.send_chat_message = AsyncMock()
+    bot.get_viewer_count = AsyncMock(return_value=50)
+    # Never driven, so the recruitment timers stay pending
+    bot.timers = TimerService()
+    bot.points_manager = PointsManager(bot)
+    bot.raid_messages = RaidMessageHandler(bot, join_interval=0.05)
+    await bot.points_manager.setup()
+    await bot.points_manager.add_points_bulk([{'user_id': str(i), 'amount': 1000} for i in range(6)])
+    return bot
+
+async def start_crewed_raid(bot, crew=6):
+    raid = RaidManager(bot)
+    bot.raid_manager = raid
+    assert await raid.start_raid()
+    for i in range(crew):
+        ok, _ = await raid.join_raid(str(i), f"user{i}", 100 + i * 100)
+        assert ok
+    assert bot.timers.get('raid:recruitment') is not None
+    bot.raid_messages.discard_crew_joins()
+    return raid
+
+async def crash_and_recover(bot):
+    """Drop the in-memory raid and recover with a fresh manager, as after a restart"""
+    bot.raid_manager = RaidManager(bot)
+    assert await RaidRecoveryManager(bot).recover_from_crash()
+    return bot.raid_manager
+
+async def events(db):
+    async with db.session_scope() as session:
+        result = await session.execute(text('SELECT event FROM raid_journal ORDER BY id'))
+        return [row[0] for row in result.all()]
+
+@pytest.mark.asyncio
+async def test_joins_are_journaled_with_their_debit(bot, db):
+    """Start and every successful join are durable as soon as they happen"""
+    await start_crewed_raid(bot)
+    ok, _ = await bot.raid_manager.join_raid('broke', 'broke', 100)
+
+    assert ok is False
+    journal = await events(db)
+    assert journal[0] == 'start'
+    assert journal.count('join') == 6
+    assert 'milestone' in journal
+
+@pytest.mark.asyncio
+async def test_recovery_refunds_recruiting_raid(bot, db):
+    """A raid that crashed while recruiting is refunded in bulk and closed"""
+    await start_crewed_raid(bot)
+    assert await bot.points_manager.get_points('5') == 400
+
+    manager = await crash_and_recover(bot)
+
+    assert await bot.points_manager.get_points('5') == 1000
+    assert await bot.points_manager.get_points('0') == 1000
+    assert (await events(db))[-1] == 'cancel'
+    assert await manager.journal.open_raids() == []
+
+@pytest.mark.asyncio
+async def test_recovery_settles_launched_raid(bot, db):
+    """A raid that crashed after launching is paid out with its last multiplier"""
+    raid = await start_crewed_raid(bot)
+    multiplier = raid.raid_multiplier
+    await raid._journal('launch')
+
+    await crash_and_recover(bot)
+
+    assert await bot.points_manager.get_points('0') == 900 + int(100 * multiplier)
+    async with db.session_scope() as session:
+        result = await session.execute(text('SELECT final_crew FROM raid_history'))
+        assert result.scalar() == 6
+    assert (await events(db))[-1] == 'settle'
+
+def test_replay_refunds_only_the_refunded_amount():
+    """A refunded increase keeps the raider in the crew, a refunded join removes them"""
+    replay = RaidReplay('raid')
+    replay.apply('join', '1', 100, {'username': 'one'})
+    replay.apply('join', '2', 200, {'username': 'two'})
+    replay.apply('invest', '1', 50, {})
+    replay.apply('refund', '1', 50, {})
+    replay.apply('refund', '2', 200, {})
+
+    assert replay.investments == {'1': 100}
+
+@pytest.mark.asyncio
+async def test_recovery_settles_raider_whose_increase_was_refunded(bot, db):
+    """An increase refunded after the milestone window closed doesn't drop the raider"""
+    raid = await start_crewed_raid(bot)
+    multiplier = raid.raid_multiplier
+    await raid.journal.append(raid.raid_key, 'invest', '0', 50)
+    await raid.journal.append(raid.raid_key, 'refund', '0', 50, reason="Raid closed - refund")
+    await raid._journal('launch')
+
+    await crash_and_recover(bot)
+
+    assert await bot.points_manager.get_points('0') == 900 + int(100 * multiplier)
+
+@pytest.mark.asyncio
+async def test_settled_raid_is_not_recovered(bot, db):
+    """Settlement closes the raid in the same transaction as the payout"""
+    raid = await start_crewed_raid(bot)
+    await raid._distribute_rewards()
+    balance = await bot.points_manager.get_points('0')
+
+    await crash_and_recover(bot)
+
+    assert await bot.points_manager.get_points('0') == balance
+    assert (await events(db)).count('settle') == 1
@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from core.raid_messages import RaidMessageHandler
+
+@pytest.fixture
+def handler():
+    bot = MagicMock()
+    bot.send_chat_message = AsyncMock()
+    return RaidMessageHandler(bot, join_interval=0.05)
+
+def sent_lines(handler):
+    return [call.args[0] for call in handler.bot.send_chat_message.await_args_list]
+
+@pytest.mark.asyncio
+async def test_join_burst_becomes_one_summary(handler):
+    """Hundreds of joins within an interval are announced as one line with the latest count"""
+    for i in range(1, 301):
+        handler.record_crew_join(f"user{i}", i, 400, 100)
+    assert handler.bot.send_chat_message.await_count == 0
+
+    await asyncio.sleep(0.1)
+    lines = sent_lines(handler)
+    assert len(lines) == 1
+    assert lines[0].startswith("⚔️ user1, user2")
+    assert "292 more" in lines[0]
+    assert lines[0].endswith("(300/400)")
+
+@pytest.mark.asyncio
+async def test_joins_after_a_flush_start_a_new_interval(handler):
+    """Each interval sends its own summary, a single join keeps its flavor text"""
+    handler.record_crew_join("alice", 1, 5, 100)
+    await asyncio.sleep(0.1)
+    handler.record_crew_join("bob", 2, 5, 200)
+    handler.record_crew_join("carol", 3, 5, 300)
+    await asyncio.sleep(0.1)
+
+    lines = sent_lines(handler)
+    assert len(lines) == 2
+    assert "alice" in lines[0] and "100" in lines[0]
+    assert lines[1] == "⚔️ bob, carol joined the crew! (3/5)"
+
+@pytest.mark.asyncio
+async def test_flush_adds_urgency_and_discard_drops_pending(handler):
+    """An explicit flush sends immediately, discarded joins are never announced"""
+    handler.record_crew_join("alice", 3, 5, 100)
+    handler.record_crew_join("bob", 4, 5, 100)
+    assert await handler.flush_crew_joins() == 2
+    assert sent_lines(handler)[-1] == "⚠️ One more crew member needed!"
+
+    handler.bot.send_chat_message.reset_mock()
+    handler.record_crew_join("carol", 5, 5, 100)
+    handler.discard_crew_joins()
+    await asyncio.sleep(0.1)
+    assert handler.bot.send_chat_message.await_count == 0
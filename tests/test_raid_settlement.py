@@ -0,0 +1,66 @@
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+from sqlalchemy import text
+
+from core.raid_rewards import RaidRewardManager
+from features.points.points_manager import PointsManager
+
+@pytest.fixture
+async def rewards(db):
+    bot = MagicMock()
+    bot.db = db
+    bot.points_manager = PointsManager(bot)
+    await bot.points_manager.setup()
+    return RaidRewardManager(bot)
+
+def raid(multiplier=2.0):
+    return {
+        'start_time': datetime.now(timezone.utc),
+        'ship_type': 'Trade Galleon',
+        'viewer_count': 1000,
+        'required_crew': 100,
+        'multiplier': multiplier
+    }
+
+def crew(count, investment=100):
+    return {
+        str(i): {'username': f"user{i}", 'initial_investment': investment, 'total_investment': investment}
+        for i in range(count)
+    }
+
+async def scalar(db, sql):
+    async with db.session_scope() as session:
+        return (await session.execute(text(sql))).scalar()
+
+@pytest.mark.asyncio
+async def test_settlement_writes_everything_in_one_pass(rewards, db):
+    """History, participants, stats and credits are all written for a large crew"""
+    points = rewards.bot.points_manager
+    await points.add_points('7', 50)
+    assert await points.get_points('7') == 50
+
+    assert await rewards.settle_raid(raid(), crew(500)) == 500 * 200
+    assert await rewards.settle_raid(raid(1.5), crew(10, investment=200)) == 10 * 300
+
+    assert await scalar(db, 'SELECT COUNT(*) FROM raid_history') == 2
+    assert await scalar(db, 'SELECT COUNT(*) FROM raid_participants') == 510
+    assert await scalar(db, "SELECT total_raids FROM player_raid_stats WHERE user_id = '7'") == 2
+    assert await scalar(db, "SELECT total_invested FROM player_raid_stats WHERE user_id = '7'") == 300
+    assert await scalar(db, "SELECT biggest_reward FROM player_raid_stats WHERE user_id = '7'") == 300
+    assert await scalar(db, "SELECT total_plunder FROM player_raid_stats WHERE user_id = '7'") == 500
+    # The cached balance follows the committed credit
+    assert await points.get_points('7') == 550
+    assert await points.get_points('499') == 200
+
+@pytest.mark.asyncio
+async def test_failed_settlement_pays_nothing(rewards, db):
+    """A failure mid-settlement rolls back the history row and every credit"""
+    participants = crew(3)
+    participants['2'] = {'username': 'broken', 'total_investment': 100}
+
+    with pytest.raises(KeyError):
+        await rewards.settle_raid(raid(), participants)
+
+    assert await scalar(db, 'SELECT COUNT(*) FROM raid_history') == 0
+    assert await rewards.bot.points_manager.get_points('0') == 0
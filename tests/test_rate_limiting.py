@@ -1,8 +1,8 @@
 # tests/test_rate_limiting.py
 import pytest
 import asyncio
-from datetime import datetime, timedelta, timezone
-from utils.rate_limiter import RateLimiter
+from types import SimpleNamespace
+from utils.rate_limiter import RateLimiter, RolePolicy, parse_role_policies, role_for
 
 @pytest.mark.asyncio
 async def test_basic_rate_limiting():
@@ -84,23 +84,23 @@ async def test_edge_cases():
 
 @pytest.mark.asyncio
 async def test_cooldown_cleanup():
-    """Test cleanup of old cooldowns"""
-    limiter = RateLimiter()
+    """Expired keys are dropped lazily by later checks"""
+    now = [1000.0]
+    limiter = RateLimiter(clock=lambda: now[0])
     
     # Add some cooldowns
     await limiter.can_execute("test_command", "user1", cooldown=5)
+    assert ("test_command", "user1") in limiter.user_tats
     
-    # Manually set old time
-    old_time = datetime.now(timezone.utc) - timedelta(minutes=6)
-    limiter.command_cooldowns["test_command"]["user1"] = old_time
-    limiter.global_cooldowns["test_command"] = old_time
+    # Move past the cooldown
+    now[0] += 6
     
     # Trigger cleanup by making a new request
     await limiter.can_execute("other_command", "user2", cooldown=5)
     
     # Verify old cooldowns were cleaned up
-    assert "test_command" not in limiter.command_cooldowns, "Old user cooldown not cleaned"
-    assert "test_command" not in limiter.global_cooldowns, "Old global cooldown not cleaned"
+    assert ("test_command", "user1") not in limiter.user_tats, "Old user cooldown not cleaned"
+    assert limiter.get_stats()['expired'] == 1
 
 @pytest.mark.asyncio
 async def test_case_insensitivity():
@@ -128,8 +128,7 @@ async def test_reset_cooldown():
     assert wait1 is None, "First execution should have no wait time"
     
     # Verify cooldown is set
-    assert command_name in limiter.command_cooldowns, "Command cooldown not set"
-    assert user_id in limiter.command_cooldowns[command_name], "User cooldown not set"
+    assert (command_name, user_id) in limiter.user_tats, "User cooldown not set"
     
     # Second execution should fail (on cooldown)
     can_execute2, wait2 = await limiter.can_execute(command_name, user_id, cooldown=5, global_cooldown=0)
@@ -140,9 +139,82 @@ async def test_reset_cooldown():
     await limiter.reset_cooldown(command_name, user_id)
     
     # Verify cooldown is cleared
-    assert command_name not in limiter.command_cooldowns or user_id not in limiter.command_cooldowns.get(command_name, {}), "Cooldown not properly reset"
+    assert (command_name, user_id) not in limiter.user_tats, "Cooldown not properly reset"
     
     # Should be able to execute again after reset
     can_execute3, wait3 = await limiter.can_execute(command_name, user_id, cooldown=5, global_cooldown=0)
     assert can_execute3 is True, "Should work after cooldown reset"
-    assert wait3 is None, "Should have no wait time after reset"
\ No newline at end of file
+    assert wait3 is None, "Should have no wait time after reset"
+
+@pytest.mark.asyncio
+async def test_burst_allowance():
+    """A burst of uses is allowed, then one more per cooldown"""
+    now = [0.0]
+    limiter = RateLimiter(clock=lambda: now[0])
+    results = [await limiter.can_execute("points", "user1", cooldown=10, global_cooldown=0, burst=3) for _ in range(4)]
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    assert results[-1][1] == 10
+
+    now[0] += 10
+    assert (await limiter.can_execute("points", "user1", cooldown=10, global_cooldown=0, burst=3))[0]
+    assert not (await limiter.can_execute("points", "user1", cooldown=10, global_cooldown=0, burst=3))[0]
+
+@pytest.mark.asyncio
+async def test_role_policies():
+    now = [0.0]
+    limiter = RateLimiter(
+        role_policies={'vip': RolePolicy(cooldown_scale=0.5), 'moderator': RolePolicy(exempt=True)},
+        clock=lambda: now[0]
+    )
+    for _ in range(5):
+        assert (await limiter.can_execute("raid", "mod", cooldown=10, global_cooldown=0, role='moderator'))[0]
+
+    assert (await limiter.can_execute("raid", "vip", cooldown=10, global_cooldown=0, role='vip'))[0]
+    allowed, wait = await limiter.can_execute("raid", "vip", cooldown=10, global_cooldown=0, role='vip')
+    assert not allowed and wait == 5
+
+    author = SimpleNamespace(is_broadcaster=False, is_mod=False, badges={'vip': '1', 'subscriber': '12'})
+    assert role_for(author) == 'vip'
+
+@pytest.mark.asyncio
+async def test_roles_are_neutral_unless_configured():
+    limiter = RateLimiter()
+    assert (await limiter.can_execute("raid", "vip", cooldown=10, global_cooldown=0, role='vip'))[0]
+    allowed, wait = await limiter.can_execute("raid", "vip", cooldown=10, global_cooldown=0, role='vip')
+    assert not allowed and wait > 9
+
+    assert parse_role_policies("vip=0.5:1, subscriber=1:1,moderator=exempt,bad=x") == {
+        'vip': RolePolicy(cooldown_scale=0.5, extra_burst=1),
+        'subscriber': RolePolicy(extra_burst=1),
+        'moderator': RolePolicy(exempt=True)
+    }
+
+@pytest.mark.asyncio
+async def test_expiry_only_touches_expired_keys():
+    """Checks pop expired keys off the heap without scanning live ones"""
+    now = [0.0]
+    limiter = RateLimiter(clock=lambda: now[0])
+    for i in range(100):
+        now[0] = i
+        await limiter.can_execute("hug", f"user{i}", cooldown=10, global_cooldown=0)
+
+    now[0] = 104.5
+    await limiter.can_execute("hug", "late", cooldown=10, global_cooldown=0)
+    stats = limiter.get_stats()
+    assert stats['expired'] == 95
+    assert stats['tracked_keys'] == 6
+
+@pytest.mark.asyncio
+async def test_long_cooldown_does_not_block_expiry():
+    """A long cooldown used first does not keep shorter ones behind it alive"""
+    now = [0.0]
+    limiter = RateLimiter(clock=lambda: now[0])
+    await limiter.can_execute("raid", "early", cooldown=3600, global_cooldown=0)
+    for i in range(10):
+        await limiter.can_execute("hug", f"user{i}", cooldown=5, global_cooldown=0)
+
+    now[0] = 6
+    await limiter.can_execute("hug", "late", cooldown=5, global_cooldown=0)
+    stats = limiter.get_stats()
+    assert stats['expired'] == 10
+    assert set(limiter.user_tats) == {("raid", "early"), ("hug", "late")}
@@ -1,8 +1,10 @@
 # tests/test_rewards.py
+import asyncio
 import pytest
 from unittest.mock import MagicMock, AsyncMock, patch
 from features.rewards.handlers import RewardHandlers
 from features.rewards.base_handler import BaseRewardHandler
+from utils.timer_wheel import TimerService
 
 @pytest.fixture
 def mock_ctx():
@@ -75,12 +77,22 @@ async def test_emote_only_reward(mock_bot, mock_ctx):
     """Test emote-only mode reward"""
     handlers = RewardHandlers(mock_bot)
 
+    now = [0.0]
+    mock_bot.timers = TimerService(tick=1.0, clock=lambda: now[0])
+
     await handlers.handle_emote_only(mock_ctx, "user", None)
 
-    assert mock_ctx.send.call_count == 3
+    # Turning the mode off is left to the shared timer
+    assert mock_ctx.send.call_count == 2
     assert "/emoteonly" in str(mock_ctx.send.call_args_list[0][0][0])
     assert "emote-only mode" in str(mock_ctx.send.call_args_list[1][0][0])
 
+    now[0] = 5.0
+    assert mock_bot.timers.run_due() == 1
+    await asyncio.sleep(0)
+    assert mock_ctx.send.call_count == 3
+    assert mock_ctx.send.call_args_list[2][0][0] == "/emoteonlyoff"
+
 @pytest.mark.asyncio
 async def test_base_reward_handler():
     """Test base reward handler functionality"""
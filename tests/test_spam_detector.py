@@ -0,0 +1,83 @@
+import random
+import pytest
+
+from features.moderation.spam_detector import SpamDetector, gram_hash, normalize, simhash
+
+def naive_simhash(text):
+    grams = [text[i:i + 3] for i in range(len(text) - 2)]
+    hashes = [gram_hash(gram) for gram in grams]
+    return sum(
+        1 << bit for bit in range(64)
+        if sum(h >> bit & 1 for h in hashes) > len(hashes) // 2
+    )
+
+def test_simhash_matches_column_counts():
+    """Summing spread lanes agrees with counting each column separately"""
+    rng = random.Random(3)
+    for _ in range(200):
+        text = ''.join(rng.choices('abcdefgh ', k=rng.randint(3, 80)))
+        assert simhash(text) == naive_simhash(text)
+
+def test_exact_repeats_flag_on_threshold():
+    """The third identical message is spam, like the old list check"""
+    detector = SpamDetector(spam_threshold=3)
+    assert detector.check('1', 'hello chat', now=0) is False
+    assert detector.check('1', 'hello chat', now=1) is False
+    assert detector.check('2', 'hello chat', now=1) is False
+    assert detector.check('1', 'hello chat', now=2) is True
+    assert detector.get_stats()['spam'] == 1
+
+def test_near_duplicates_are_spam():
+    """Case, punctuation, leetspeak and stretched letters don't dodge the check"""
+    detector = SpamDetector(spam_threshold=3)
+    assert normalize('FREE v-bucks at sc4m.com!!!') == normalize('free vbucks at scam.com')
+
+    assert detector.check('1', 'buy cheap followers at example dot com', now=0) is False
+    assert detector.check('1', 'BUY CHEAP FOLLOWERS AT EXAMPLE DOT C0M!!', now=1) is False
+    assert detector.check('1', 'buy cheap followers at example dot cm', now=2) is True
+    assert detector.get_stats()['near_duplicates'] == 1
+
+def test_single_token_repeats_are_not_spam():
+    """Emote spam like "LUL" three times is normal chat"""
+    detector = SpamDetector(spam_threshold=3)
+    assert [detector.check('1', 'LUL', now=i) for i in range(5)] == [False] * 5
+    assert detector.get_stats()['exempt'] == 5
+    assert len(detector) == 0
+
+def test_unrelated_messages_pass():
+    detector = SpamDetector(spam_threshold=3)
+    for i, content in enumerate([
+        'what game is this',
+        'that was a great play',
+        'how long have you been streaming today',
+        'gg',
+        'lol',
+        'see you tomorrow everyone'
+    ]):
+        assert detector.check('1', content, now=i) is False
+
+def test_ring_forgets_old_messages():
+    """Only the last history_size messages count towards a repeat"""
+    detector = SpamDetector(history_size=3, spam_threshold=3)
+    detector.check('1', 'spam me', now=0)
+    detector.check('1', 'spam me', now=1)
+    for i in range(3):
+        detector.check('1', f'filler message number {i}', now=2 + i)
+    assert detector.check('1', 'spam me', now=5) is False
+
+def test_idle_users_are_evicted():
+    detector = SpamDetector(idle_seconds=60, max_users=2)
+    detector.check('1', 'hi chat', now=0)
+    detector.check('2', 'hi chat', now=30)
+    detector.check('1', 'hi chat', now=50)
+    assert len(detector) == 2
+
+    # User 2 was seen at 30, user 1 at 50
+    detector.check('3', 'hi chat', now=95)
+    assert len(detector) == 2
+    assert detector.get_stats()['evicted'] == 1
+
+    # Over max_users the least recently seen user goes
+    detector.check('4', 'hi chat', now=96)
+    assert len(detector) == 2
+    assert detector.get_stats()['evicted'] == 2
@@ -0,0 +1,75 @@
+import pytest
+from unittest.mock import MagicMock
+
+from features.moderation import timeout_manager as module
+from features.moderation.timeout_manager import TimeoutManager
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(module.time, 'time', lambda: now[0])
+    return now
+
+@pytest.mark.asyncio
+async def test_timeouts_expire(clock):
+    manager = TimeoutManager()
+    await manager.add_timeout('alice', 60)
+    assert await manager.is_timeout('alice')
+    assert await manager.get_remaining_timeout('alice') == 60
+
+    clock[0] += 60
+    assert not await manager.is_timeout('alice')
+    assert await manager.get_remaining_timeout('alice') is None
+    assert manager.get_stats()['expired'] == 1
+
+@pytest.mark.asyncio
+async def test_expire_only_pops_ended_timeouts(clock):
+    """Each check pops just the expired heap entries, not a scan of every user"""
+    manager = TimeoutManager()
+    for i in range(100):
+        await manager.add_timeout(f"user{i}", 10 + i)
+
+    clock[0] += 15
+    assert manager.expire() == 6
+    assert len(manager.timeout_users) == 94
+    assert manager.get_stats()['heap_size'] == 94
+
+@pytest.mark.asyncio
+async def test_readding_or_removing_leaves_stale_entries_behind(clock):
+    """A later timeout replaces an earlier one, the old heap entry doesn't expire it"""
+    manager = TimeoutManager()
+    await manager.add_timeout('alice', 10)
+    await manager.add_timeout('alice', 100)
+    await manager.add_timeout('bob', 10)
+    await manager.remove_timeout('bob')
+
+    clock[0] += 20
+    assert manager.expire() == 0
+    assert await manager.get_remaining_timeout('alice') == 80
+    assert not await manager.is_timeout('bob')
+
+@pytest.mark.asyncio
+async def test_heap_is_compacted(clock):
+    manager = TimeoutManager()
+    for _ in range(200):
+        await manager.add_timeout('alice', 600)
+    stats = manager.get_stats()
+    assert stats['compactions'] >= 1
+    assert stats['heap_size'] <= 2 * stats['active'] + 64
+
+@pytest.mark.asyncio
+async def test_timeouts_survive_a_restart(db, clock):
+    bot = MagicMock()
+    bot.db = db
+    manager = TimeoutManager(bot, persist=True)
+    await manager.add_timeout('alice', 60)
+    await manager.add_timeout('bob', 5)
+    await manager.add_timeout('carol', 60)
+    await manager.remove_timeout('carol')
+
+    clock[0] += 10
+    restarted = TimeoutManager(bot, persist=True)
+    assert await restarted.load() == 1
+    assert await restarted.get_remaining_timeout('alice') == 50
+    assert not await restarted.is_timeout('bob')
+    assert not await restarted.is_timeout('carol')
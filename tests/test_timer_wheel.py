@@ -0,0 +1,133 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from core.raid_manager import RaidManager, RaidState
+from utils.timer_wheel import TimerService
+
+@pytest.fixture
+def clock():
+    return [100.0]
+
+@pytest.fixture
+def timers(clock):
+    return TimerService(tick=0.5, slots=8, clock=lambda: clock[0])
+
+def test_timers_fire_in_order_and_not_early(timers, clock):
+    fired = []
+    timers.call_later(3.0, fired.append, 'b')
+    timers.call_later(1.2, fired.append, 'a')
+    # Wraps the 8 slot wheel more than once
+    timers.call_later(10.0, fired.append, 'c')
+
+    clock[0] += 1.0
+    assert timers.run_due() == 0
+    clock[0] += 0.5
+    assert timers.run_due() == 1
+    clock[0] += 2.0
+    timers.run_due()
+    assert fired == ['a', 'b']
+
+    clock[0] += 7.0
+    timers.run_due()
+    assert fired == ['a', 'b', 'c']
+    assert len(timers) == 0
+
+def test_named_timers_replace_and_cancel(timers, clock):
+    fired = []
+    first = timers.call_later(1.0, fired.append, 'first', name='job')
+    timers.call_later(2.0, fired.append, 'second', name='job')
+    assert first.cancelled
+    assert timers.get('job').remaining == 2.0
+    assert [handle.name for handle in timers.timers()] == ['job']
+
+    assert timers.cancel('job')
+    assert not timers.cancel('job')
+    clock[0] += 5.0
+    timers.run_due()
+    assert fired == []
+    assert timers.get_stats()['cancelled'] == 2
+
+def test_repeating_timer_keeps_its_name(timers, clock):
+    fired = []
+    handle = timers.call_every(1.0, fired.append, 'tick', name='ticker')
+    for _ in range(3):
+        clock[0] += 1.0
+        timers.run_due()
+    assert fired == ['tick'] * 3
+    assert timers.get('ticker') is handle
+
+    handle.cancel()
+    clock[0] += 5.0
+    timers.run_due()
+    assert len(fired) == 3
+
+@pytest.mark.asyncio
+async def test_repeating_coroutine_waits_for_the_previous_run(timers, clock):
+    """A slow job is rescheduled after it finishes, runs never overlap"""
+    release = asyncio.Event()
+    runs = []
+
+    async def job():
+        runs.append(clock[0])
+        await release.wait()
+
+    timers.call_every(1.0, job, name='slow')
+    clock[0] += 1.0
+    timers.run_due()
+    await asyncio.sleep(0)
+    clock[0] += 5.0
+    timers.run_due()
+    assert len(runs) == 1
+    assert timers.get_stats()['running'] == 1
+
+    release.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    clock[0] += 1.0
+    timers.run_due()
+    await asyncio.sleep(0)
+    assert len(runs) == 2
+
+@pytest.mark.asyncio
+async def test_run_loop_drives_real_time():
+    timers = TimerService(tick=0.01)
+    runner = asyncio.create_task(timers.run())
+    try:
+        started = asyncio.get_running_loop().time()
+        await timers.sleep(0.05, name='nap')
+        assert asyncio.get_running_loop().time() - started >= 0.05
+        assert timers.get('nap') is None
+    finally:
+        runner.cancel()
+
+@pytest.mark.asyncio
+async def test_raid_recruitment_runs_on_named_timers(clock):
+    timers = TimerService(tick=1.0, clock=lambda: clock[0])
+    bot = MagicMock()
+    bot.timers = timers
+    bot.get_viewer_count = AsyncMock(return_value=50)
+    raid = RaidManager(bot)
+    raid.journal.append = AsyncMock()
+    raid._announce_raid_start = AsyncMock()
+    raid._announce_time_remaining = AsyncMock()
+    raid._handle_raid_completion = AsyncMock()
+
+    assert await raid.start_raid()
+    assert [handle.name for handle in timers.timers()] == [
+        'raid:recruitment_60s', 'raid:recruitment_30s', 'raid:recruitment'
+    ]
+
+    clock[0] += 60
+    timers.run_due()
+    await asyncio.sleep(0)
+    raid._announce_time_remaining.assert_awaited_once_with(60)
+
+    # A reset cancels the rest, the raid is never completed
+    await raid._force_reset()
+    assert raid.state == RaidState.INACTIVE
+    assert timers.timers() == []
+    clock[0] += 120
+    timers.run_due()
+    await asyncio.sleep(0)
+    raid._handle_raid_completion.assert_not_awaited()
@@ -0,0 +1,58 @@
+import pytest
+import asyncio
+import json
+from sqlalchemy import text
+from database.engine_profile import EngineProfile
+from database.manager import DatabaseManager
+from utils.tracing import Tracer, tracer
+
+@pytest.mark.asyncio
+async def test_concurrent_traces_keep_their_own_spans():
+    """Stages are attached to the trace of the task that ran them"""
+    local = Tracer()
+    traces = {}
+
+    async def handle(command: str, delay: float):
+        with local.trace('message') as trace:
+            local.set_attribute('command', command)
+            with local.span('command'):
+                await asyncio.sleep(delay)
+            with local.span('send'):
+                await asyncio.sleep(0)
+            traces[command] = trace
+
+    await asyncio.gather(handle('points', 0.02), handle('top', 0.01))
+
+    assert [span[0] for span in traces['points'].spans] == ['command', 'send']
+    assert traces['points'].spans[0][2] >= 15
+    metrics = local.get_metrics()
+    assert set(metrics['commands']) == {'points', 'top'}
+    assert metrics['stages']['command']['count'] == 2
+    assert metrics['messages']['count'] == 2
+
+@pytest.mark.asyncio
+async def test_sampled_traces_are_dumped_as_jsonl(tmp_path):
+    """Sampled traces are appended to the trace file on flush"""
+    path = tmp_path / 'traces.jsonl'
+    local = Tracer(sample_rate=1.0, trace_file=str(path))
+    for _ in range(3):
+        with local.trace('message', user_id='1'):
+            local.record('receive', 12.5)
+
+    assert await local.flush() == 3
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == 3
+    assert lines[0]['attributes'] == {'user_id': '1'}
+    assert lines[0]['spans'][0]['stage'] == 'receive'
+
+@pytest.mark.asyncio
+async def test_database_scopes_are_traced():
+    """DatabaseManager sessions show up as db stages inside the current trace"""
+    db = DatabaseManager('sqlite+aiosqlite:///:memory:', profile=EngineProfile())
+    try:
+        with tracer.trace('message') as trace:
+            async with db.session_scope() as session:
+                await session.execute(text('SELECT 1'))
+        assert [span[0] for span in trace.spans] == ['db']
+    finally:
+        await db.close()
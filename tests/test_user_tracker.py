@@ -0,0 +1,88 @@
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import text
+from features.tracking.user_tracker import UserTracker
+
+def make_message(user_id: str, name: str, content: str = "hello"):
+    message = MagicMock()
+    message.author.id = user_id
+    message.author.name = name
+    message.author.is_subscriber = False
+    message.author.is_mod = False
+    message.content = content
+    return message
+
+@pytest.fixture
+async def tracker(db):
+    """Create a write-behind tracker backed by the test database"""
+    async with db.session_scope() as session:
+        await session.execute(text('ALTER TABLE users ADD COLUMN is_moderator BOOLEAN DEFAULT FALSE'))
+
+    bot = MagicMock()
+    bot.db = db
+    return UserTracker(bot, write_behind=True, flush_interval_ms=50, flush_max_rows=100)
+
+async def count_users(db) -> int:
+    async with db.session_scope() as session:
+        result = await session.execute(text('SELECT COUNT(*) FROM users'))
+        return result.scalar()
+
+@pytest.mark.asyncio
+async def test_write_behind_defers_database_writes(tracker, db):
+    """Messages update memory immediately and reach the database on flush"""
+    assert await tracker.track_user_message(make_message('1', 'alice')) is True
+    assert '1' in tracker.active_users
+    assert await count_users(db) == 0
+
+    assert await tracker.flush() == 1
+    assert await count_users(db) == 1
+
+@pytest.mark.asyncio
+async def test_flush_coalesces_repeat_messages(tracker, db):
+    """Repeated messages from the same user become a single row per flush"""
+    for _ in range(5):
+        await tracker.track_user_message(make_message('1', 'alice'))
+    await tracker.track_user_message(make_message('2', 'bob'))
+
+    assert await tracker.flush() == 2
+    assert tracker.flush_stats['last_flush_rows'] == 2
+    assert tracker.flush_stats['last_flush_coalesced'] == 4
+    assert tracker.active_users['1'].message_count == 5
+
+@pytest.mark.asyncio
+async def test_second_message_is_not_first_time(tracker):
+    """A user already seen this session is not reported as a first-time chatter"""
+    assert await tracker.track_user_message(make_message('1', 'alice')) is True
+    assert await tracker.track_user_message(make_message('1', 'alice')) is False
+    assert tracker.first_time_chatters == {'1'}
+
+@pytest.mark.asyncio
+async def test_known_users_index_loads_in_chunks(tracker, db):
+    """Known ids are streamed from the users table and used for first-time checks"""
+    async with db.session_scope() as session:
+        await session.execute(
+            text('INSERT INTO users (twitch_id, username) VALUES (:id, :name)'),
+            [{'id': str(i), 'name': f'user{i}'} for i in range(25)]
+        )
+
+    assert await tracker.load_known_users(chunk_size=10) == 25
+    assert await tracker.track_user_message(make_message('3', 'user3')) is False
+    assert await tracker.track_user_message(make_message('99', 'newbie')) is True
+    assert '99' in tracker.known_users
+
+@pytest.mark.asyncio
+async def test_sharded_store_cleanup(tracker):
+    """Inactive users are removed from every shard"""
+    from datetime import datetime, timedelta, timezone
+
+    for i in range(40):
+        await tracker.track_user_message(make_message(str(i), f'user{i}'))
+    assert len(tracker.active_users) == 40
+
+    stale = datetime.now(timezone.utc) - timedelta(hours=1)
+    for user_id in [str(i) for i in range(0, 40, 2)]:
+        tracker.active_users[user_id].last_seen = stale
+
+    await tracker.cleanup_inactive_users()
+    assert len(tracker.active_users) == 20
+    assert '0' not in tracker.active_users and '1' in tracker.active_users
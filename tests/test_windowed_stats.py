@@ -0,0 +1,51 @@
+import pytest
+import random
+from utils.performance_monitor import PerformanceTracker
+from utils.windowed_stats import WindowedStats
+
+def test_window_matches_brute_force():
+    """Running aggregates agree with a full rescan of the window at every step"""
+    rng = random.Random(42)
+    stats = WindowedStats(50, threshold=100, tail_size=10)
+    samples = []
+    for _ in range(500):
+        value = rng.expovariate(1 / 40)
+        stats.append(value)
+        samples.append(value)
+        window = samples[-50:]
+
+        assert stats.count == len(window)
+        assert stats.sum == pytest.approx(sum(window))
+        assert stats.min == min(window)
+        assert stats.max == max(window)
+        assert stats.above_threshold == sum(1 for v in window if v > 100)
+        assert stats.tail_mean == pytest.approx(sum(window[-10:]) / len(window[-10:]))
+
+def test_windowed_percentiles_are_bucket_accurate():
+    """Quantiles come from the current window only, within one log bucket"""
+    stats = WindowedStats(100)
+    for _ in range(100):
+        stats.append(1000.0)
+    for value in range(1, 101):
+        stats.append(float(value))
+
+    assert stats.max == 100
+    assert 80 <= stats.percentile(95) <= 100 * 10 ** 0.1
+    assert 40 <= stats.percentile(50) <= 50 * 10 ** 0.1
+
+@pytest.mark.asyncio
+async def test_tracker_degradation_and_slow_counts():
+    """Degradation compares the last 10 samples with the rest of the window"""
+    tracker = PerformanceTracker(history_size=100, alert_threshold_ms=100)
+    for _ in range(40):
+        tracker.record_query('SELECT ?', 10)
+    for _ in range(10):
+        tracker.record_query('SELECT ?', 150)
+
+    report = await tracker.get_performance_report()
+    assert report['query_metrics']['SELECT ?']['slow_queries'] == 10
+    assert report['query_metrics']['SELECT ?']['avg_time'] == pytest.approx(38)
+
+    degradation = tracker._detect_degradation()['SELECT ?']
+    assert degradation['recent_avg'] == pytest.approx(150)
+    assert degradation['historical_avg'] == pytest.approx(10)
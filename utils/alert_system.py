@@ -8,6 +8,9 @@ from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+# Alerts fit for public chat, query, pool and loop alerts expose internals like SQL fingerprints
+CHAT_ALERT_TYPES = frozenset({'cpu_usage'})
+
 class AlertSeverity(Enum):
     INFO = "info"
     WARNING = "warning"
@@ -33,7 +36,11 @@ class AlertManager:
             'memory_usage': AlertThreshold(warning=80, critical=95, cooldown=600),
             'error_rate': AlertThreshold(warning=5, critical=15, cooldown=300),
             'connection_pool': AlertThreshold(warning=80, critical=95, cooldown=300),
+            'pool_wait': AlertThreshold(warning=250, critical=1000, cooldown=300),  # ms, recent p95
+            'loop_lag': AlertThreshold(warning=100, critical=500, cooldown=300),  # ms, windowed p95
         }
+        self.default_cooldown = 300
+        self._last_pool_timeouts = 0
 
     async def start_monitoring(self):
         """Start alert monitoring"""
@@ -47,27 +54,39 @@ class AlertManager:
 
     async def check_all_metrics(self):
         """Check all monitored metrics"""
+        try:
+            pool_status = await self.bot.db.get_pool_status()
+            await self.check_connection_pool(pool_status)
+        except Exception as e:
+            logger.error(f"Error checking connection pool: {e}")
+
+        try:
+            await self.check_event_loop(self.bot.monitor.get_metrics()['event_loop'])
+        except Exception as e:
+            logger.error(f"Error checking event loop: {e}")
+
         try:
             # Get current metrics
             performance_metrics = await self.bot.db.get_performance_metrics()
-            pool_status = await self.bot.db.get_pool_status()
 
             # Check query performance
             for query_name, metrics in performance_metrics['query_metrics'].items():
-                if await self._should_alert('query_time', query_name):
+                if await self._should_alert('query_performance', query_name):
                     if metrics['avg_time'] > self.thresholds['query_time'].critical:
                         await self.trigger_alert(
                             'query_performance',
                             f"Critical query performance: {query_name} ({metrics['avg_time']:.2f}ms)",
                             AlertSeverity.CRITICAL,
-                            metrics
+                            metrics,
+                            key=query_name
                         )
                     elif metrics['avg_time'] > self.thresholds['query_time'].warning:
                         await self.trigger_alert(
                             'query_performance',
                             f"Slow query detected: {query_name} ({metrics['avg_time']:.2f}ms)",
                             AlertSeverity.WARNING,
-                            metrics
+                            metrics,
+                            key=query_name
                         )
 
             # Check resource usage
@@ -77,40 +96,93 @@ class AlertManager:
                     'cpu_usage',
                     f"Critical CPU usage: {cpu_usage:.1f}%",
                     AlertSeverity.CRITICAL,
-                    {'cpu_usage': cpu_usage}
+                    {'cpu_usage': cpu_usage},
+                    key='critical'
                 )
             elif cpu_usage > self.thresholds['cpu_usage'].warning:
                 await self.trigger_alert(
                     'cpu_usage',
                     f"High CPU usage: {cpu_usage:.1f}%",
                     AlertSeverity.WARNING,
-                    {'cpu_usage': cpu_usage}
+                    {'cpu_usage': cpu_usage},
+                    key='warning'
                 )
 
-            # Check connection pool
-            pool_usage = (pool_status['checkedout'] / pool_status['size']) * 100
+        except Exception as e:
+            logger.error(f"Error in alert monitoring: {e}")
+
+    async def check_event_loop(self, loop_metrics: Dict):
+        """Alert when the event loop is stalled, naming the slowest recent callbacks"""
+        lag_p95 = loop_metrics['lag_ms']['p95']
+        if lag_p95 > self.thresholds['loop_lag'].critical:
+            severity, label, key = AlertSeverity.CRITICAL, "Critical event loop lag", 'critical'
+        elif lag_p95 > self.thresholds['loop_lag'].warning:
+            severity, label, key = AlertSeverity.WARNING, "High event loop lag", 'warning'
+        else:
+            return
+
+        message = f"{label}: p95 {lag_p95:.0f}ms"
+        culprits = [name for name, _ in loop_metrics.get('top_slow_callbacks', [])[:3]]
+        if culprits:
+            message += f" (slow: {', '.join(culprits)})"
+        await self.trigger_alert('loop_lag', message, severity, loop_metrics, key=key)
+
+    async def check_connection_pool(self, pool_status: Dict):
+        """Alert on pool saturation, slow checkouts and checkout timeouts"""
+        capacity = pool_status.get('capacity') or pool_status.get('size') or 0
+        if capacity > 0:
+            pool_usage = (pool_status['checkedout'] / capacity) * 100
             if pool_usage > self.thresholds['connection_pool'].critical:
                 await self.trigger_alert(
                     'connection_pool',
                     f"Critical connection pool usage: {pool_usage:.1f}%",
                     AlertSeverity.CRITICAL,
-                    pool_status
+                    pool_status,
+                    key='usage_critical'
                 )
             elif pool_usage > self.thresholds['connection_pool'].warning:
                 await self.trigger_alert(
                     'connection_pool',
                     f"High connection pool usage: {pool_usage:.1f}%",
                     AlertSeverity.WARNING,
-                    pool_status
+                    pool_status,
+                    key='usage_warning'
                 )
 
-        except Exception as e:
-            logger.error(f"Error in alert monitoring: {e}")
+        wait_p95 = pool_status.get('max_wait_p95_ms', 0)
+        if wait_p95 > self.thresholds['pool_wait'].critical:
+            await self.trigger_alert(
+                'pool_wait',
+                f"Connection pool starvation: p95 checkout wait {wait_p95:.0f}ms",
+                AlertSeverity.CRITICAL,
+                pool_status,
+                key='wait_critical'
+            )
+        elif wait_p95 > self.thresholds['pool_wait'].warning:
+            await self.trigger_alert(
+                'pool_wait',
+                f"Slow connection checkouts: p95 wait {wait_p95:.0f}ms",
+                AlertSeverity.WARNING,
+                pool_status,
+                key='wait_warning'
+            )
+
+        timeouts = pool_status.get('timeouts', 0)
+        if timeouts > self._last_pool_timeouts:
+            await self.trigger_alert(
+                'pool_wait',
+                f"Connection pool checkout timed out {timeouts - self._last_pool_timeouts} time(s)",
+                AlertSeverity.CRITICAL,
+                pool_status,
+                key='timeouts'
+            )
+        self._last_pool_timeouts = timeouts
 
     async def trigger_alert(self, alert_type: str, message: str, 
-                          severity: AlertSeverity, context: Dict):
-        """Trigger an alert with given severity and context"""
-        if not await self._should_alert(alert_type, message):
+                          severity: AlertSeverity, context: Dict, key: Optional[str] = None):
+        """Trigger an alert with given severity and context, repeats of the same key respect the cooldown"""
+        key = key or message
+        if not await self._should_alert(alert_type, key):
             return
 
         alert = {
@@ -138,7 +210,7 @@ class AlertManager:
                 logger.error(f"Error in alert handler: {e}")
 
         # Update alert history
-        self.alert_history[f"{alert_type}:{message}"] = datetime.now(timezone.utc)
+        self.alert_history[f"{alert_type}:{key}"] = datetime.now(timezone.utc)
 
     async def _should_alert(self, alert_type: str, key: str) -> bool:
         """Check if we should trigger an alert based on cooldown"""
@@ -147,7 +219,8 @@ class AlertManager:
             return True
 
         last_alert = self.alert_history[history_key]
-        cooldown = self.thresholds[alert_type].cooldown
+        threshold = self.thresholds.get(alert_type)
+        cooldown = threshold.cooldown if threshold else self.default_cooldown
         return (datetime.now(timezone.utc) - last_alert).total_seconds() > cooldown
 
     def add_alert_handler(self, handler: Callable):
@@ -5,6 +5,8 @@ from typing import Type, Union, Callable
 import traceback
 from datetime import datetime, timezone
 
+from utils.rate_limiter import role_for
+
 logger = logging.getLogger(__name__)
 
 def error_boundary(error_types: Union[Type[Exception], tuple] = Exception,
@@ -50,12 +52,13 @@ def error_boundary(error_types: Union[Type[Exception], tuple] = Exception,
         return wrapper
     return decorator
 
-def rate_limited(cooldown: int = 3, global_cooldown: int = 1, mod_bypass: bool = True):
+def rate_limited(cooldown: int = 3, global_cooldown: int = 1, mod_bypass: bool = True, burst: int = 1):
     """
     Decorator to apply rate limiting to commands.
     cooldown: per-user cooldown in seconds
     global_cooldown: global cooldown in seconds
     mod_bypass: whether moderators bypass cooldowns
+    burst: uses a user may make back to back before the cooldown applies
     """
     def decorator(func):
         @functools.wraps(func)
@@ -68,7 +71,9 @@ def rate_limited(cooldown: int = 3, global_cooldown: int = 1, mod_bypass: bool =
                 func.__name__,
                 str(ctx.author.id),
                 cooldown,
-                global_cooldown
+                global_cooldown,
+                burst=burst,
+                role=role_for(ctx.author)
             )
 
             if not can_execute:
@@ -0,0 +1,69 @@
+# utils/histogram.py
+from bisect import bisect_left
+from typing import Dict, List, Optional
+import math
+
+def log_buckets(low: float = 0.05, high: float = 60000.0, per_decade: int = 10) -> List[float]:
+    """Log-spaced bucket upper bounds from low to high"""
+    decades = math.log10(high / low)
+    count = int(math.ceil(decades * per_decade))
+    return [low * 10 ** (i / per_decade) for i in range(count + 1)]
+
+DEFAULT_BUCKETS = log_buckets()
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with O(log buckets) inserts and approximate percentiles"""
+    __slots__ = ('bounds', 'counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self, bounds: Optional[List[float]] = None):
+        self.bounds = bounds or DEFAULT_BUCKETS
+        # One extra bucket catches everything above the last bound
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the pct-th value, clamped to the observed range"""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * pct / 100))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                bound = self.bounds[index] if index < len(self.bounds) else self.max
+                return min(max(bound, self.min), self.max)
+        return self.max
+
+    def reset(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def snapshot(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99)
+        }
@@ -0,0 +1,101 @@
+# utils/loop_monitor.py
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Dict, Optional
+import asyncio
+import logging
+import time
+
+from utils.windowed_stats import WindowedStats
+
+logger = logging.getLogger(__name__)
+
+def describe_callback(handle) -> str:
+    """Best-effort name for what an event loop handle runs"""
+    callback = getattr(handle, '_callback', None)
+    owner = getattr(callback, '__self__', None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        name = getattr(coro, '__qualname__', None) or repr(coro)
+        return f"{owner.get_name()}:{name}"
+    return getattr(callback, '__qualname__', None) or repr(callback)
+
+class LoopMonitor:
+    """Samples event loop scheduling lag and optionally records slow callbacks"""
+
+    def __init__(self, interval_ms: int = 500, slow_callback_ms: float = 100,
+                 track_callbacks: bool = False, history_size: int = 600):
+        self.interval = interval_ms / 1000
+        self.slow_callback_ms = slow_callback_ms
+        self.track_callbacks = track_callbacks
+        self.lag_ms = WindowedStats(history_size)
+        self.slow_callbacks: deque = deque(maxlen=50)
+        self.slow_callback_counts: Counter = Counter()
+        self.is_running = False
+        self._original_run = None
+
+    async def run(self):
+        """Measure how late a fixed-interval sleep wakes up, forever"""
+        if self.is_running:
+            return
+        self.is_running = True
+        if self.track_callbacks:
+            self.install_callback_hook()
+
+        try:
+            while self.is_running:
+                expected = time.monotonic() + self.interval
+                await asyncio.sleep(self.interval)
+                self.lag_ms.append(max(0.0, (time.monotonic() - expected) * 1000))
+        finally:
+            self.is_running = False
+            self.remove_callback_hook()
+
+    def stop(self):
+        self.is_running = False
+
+    def install_callback_hook(self):
+        """Time every loop callback by wrapping asyncio.Handle._run"""
+        if self._original_run is not None:
+            return
+        original_run = asyncio.events.Handle._run
+        threshold = self.slow_callback_ms / 1000
+        monitor = self
+
+        def timed_run(handle):
+            start = time.perf_counter()
+            try:
+                return original_run(handle)
+            finally:
+                elapsed = time.perf_counter() - start
+                if elapsed > threshold:
+                    monitor._record_slow_callback(handle, elapsed * 1000)
+
+        self._original_run = original_run
+        asyncio.events.Handle._run = timed_run
+
+    def remove_callback_hook(self):
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+
+    def _record_slow_callback(self, handle, duration_ms: float):
+        name = describe_callback(handle)
+        self.slow_callback_counts[name] += 1
+        self.slow_callbacks.append({
+            'name': name,
+            'duration_ms': duration_ms,
+            'timestamp': datetime.now(timezone.utc)
+        })
+        logger.warning(f"Slow event loop callback: {name} blocked for {duration_ms:.1f}ms")
+
+    def get_metrics(self) -> Dict:
+        """Lag percentiles in ms and the most recent slow callbacks"""
+        return {
+            'lag_ms': self.lag_ms.snapshot(),
+            'current_lag_ms': self.lag_ms.last,
+            'slow_callback_threshold_ms': self.slow_callback_ms,
+            'slow_callbacks': list(self.slow_callbacks)[-10:],
+            'top_slow_callbacks': self.slow_callback_counts.most_common(5),
+            'tracking_callbacks': self._original_run is not None
+        }
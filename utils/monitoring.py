@@ -4,27 +4,30 @@ import logging
 import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
-from collections import deque
 import psutil
-import statistics
+
+from utils.loop_monitor import LoopMonitor
+from utils.tracing import tracer
+from utils.windowed_stats import WindowedStats
 
 logger = logging.getLogger(__name__)
 
 class PerformanceMonitor:
-    def __init__(self, bot, history_size: int = 1000):
+    def __init__(self, bot, history_size: int = 1000, loop_monitor: Optional[LoopMonitor] = None):
         self.bot = bot
         self.is_running = False
         self.history_size = history_size
         
         # Performance metrics storage
-        self.command_timings: Dict[str, deque] = {}
-        self.db_query_times: deque = deque(maxlen=history_size)
-        self.event_processing_times: deque = deque(maxlen=history_size)
-        self.memory_usage: deque = deque(maxlen=history_size)
-        self.cpu_usage: deque = deque(maxlen=history_size)
+        self.command_timings: Dict[str, WindowedStats] = {}
+        self.db_query_times = WindowedStats(history_size)
+        self.event_processing_times = WindowedStats(history_size)
+        self.memory_usage = WindowedStats(history_size)
+        self.cpu_usage = WindowedStats(history_size)
         
         # Process info for resource monitoring
         self.process = psutil.Process()
+        self.loop_monitor = loop_monitor or LoopMonitor()
 
     async def start_monitoring(self):
         """Start the monitoring loop"""
@@ -48,10 +51,10 @@ class PerformanceMonitor:
             self.cpu_usage.append(self.process.cpu_percent())
             
             # Log if resource usage is high
-            if self.memory_usage[-1] > 500:  # Warning if over 500MB
-                logger.warning(f"High memory usage: {self.memory_usage[-1]:.2f}MB")
-            if self.cpu_usage[-1] > 70:  # Warning if over 70%
-                logger.warning(f"High CPU usage: {self.cpu_usage[-1]}%")
+            if self.memory_usage.last > 500:  # Warning if over 500MB
+                logger.warning(f"High memory usage: {self.memory_usage.last:.2f}MB")
+            if self.cpu_usage.last > 70:  # Warning if over 70%
+                logger.warning(f"High CPU usage: {self.cpu_usage.last}%")
                 
         except Exception as e:
             logger.error(f"Error collecting metrics: {e}")
@@ -59,7 +62,7 @@ class PerformanceMonitor:
     async def record_command_timing(self, command_name: str, execution_time: float):
         """Record command execution time"""
         if command_name not in self.command_timings:
-            self.command_timings[command_name] = deque(maxlen=self.history_size)
+            self.command_timings[command_name] = WindowedStats(self.history_size)
         self.command_timings[command_name].append(execution_time)
 
     async def record_db_query(self, query_time: float):
@@ -78,32 +81,41 @@ class PerformanceMonitor:
         """Get current performance metrics summary"""
         return {
             'memory_usage': {
-                'current': self.memory_usage[-1] if self.memory_usage else 0,
-                'average': statistics.mean(self.memory_usage) if self.memory_usage else 0,
-                'peak': max(self.memory_usage) if self.memory_usage else 0
+                'current': self.memory_usage.last,
+                'average': self.memory_usage.mean,
+                'peak': self.memory_usage.max
             },
             'cpu_usage': {
-                'current': self.cpu_usage[-1] if self.cpu_usage else 0,
-                'average': statistics.mean(self.cpu_usage) if self.cpu_usage else 0,
-                'peak': max(self.cpu_usage) if self.cpu_usage else 0
+                'current': self.cpu_usage.last,
+                'average': self.cpu_usage.mean,
+                'peak': self.cpu_usage.max
             },
             'command_performance': {
                 name: {
-                    'average': statistics.mean(times) if times else 0,
-                    'max': max(times) if times else 0,
-                    'count': len(times)
+                    'average': times.mean,
+                    'max': times.max,
+                    'count': times.count,
+                    'p95': times.percentile(95)
                 } for name, times in self.command_timings.items()
             },
             'database_performance': {
-                'average_query_time': statistics.mean(self.db_query_times) if self.db_query_times else 0,
-                'max_query_time': max(self.db_query_times) if self.db_query_times else 0,
-                'total_queries': len(self.db_query_times)
+                'average_query_time': self.db_query_times.mean,
+                'max_query_time': self.db_query_times.max,
+                'total_queries': self.db_query_times.count,
+                'p95_query_time': self.db_query_times.percentile(95)
             },
             'event_processing': {
-                'average_time': statistics.mean(self.event_processing_times) if self.event_processing_times else 0,
-                'max_time': max(self.event_processing_times) if self.event_processing_times else 0,
-                'total_events': len(self.event_processing_times)
-            }
+                'average_time': self.event_processing_times.mean,
+                'max_time': self.event_processing_times.max,
+                'total_events': self.event_processing_times.count
+            },
+            'event_loop': self.loop_monitor.get_metrics(),
+            'message_path': tracer.get_metrics(),
+            'chat_queue': self.bot.chat_queue.get_metrics() if hasattr(self.bot, 'chat_queue') else None,
+            'moderation': (
+                self.bot.moderation_pipeline.get_metrics() if hasattr(self.bot, 'moderation_pipeline') else None
+            ),
+            'rate_limiter': self.bot.rate_limiter.get_stats() if hasattr(self.bot, 'rate_limiter') else None
         }
 
 class TimingContext:
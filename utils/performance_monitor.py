@@ -8,6 +8,8 @@ from collections import deque
 from typing import Dict, List, Optional
 from dataclasses import dataclass
 
+from utils.windowed_stats import WindowedStats
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -25,53 +27,79 @@ class PerformanceTracker:
         self.alert_threshold_ms = alert_threshold_ms
         
         # Query performance tracking
-        self.query_history: Dict[str, deque] = {}
+        self.query_history: Dict[str, WindowedStats] = {}
         self.query_metrics: Dict[str, QueryMetrics] = {}
+        self.query_rows: Dict[str, int] = {}
+        self._last_slow_query: Dict[str, datetime] = {}
+        self._stale_metrics = set()
         
         # Resource tracking
-        self.cpu_usage = deque(maxlen=history_size)
-        self.memory_usage = deque(maxlen=history_size)
+        self.cpu_usage = WindowedStats(history_size, threshold=80)
+        self.memory_usage = WindowedStats(history_size, threshold=85)
+        self.recent_cpu = WindowedStats(10, threshold=70)
         self.io_counters = deque(maxlen=history_size)
         
         # Bottleneck detection
-        self.bottleneck_points: List[Dict] = []
+        self.bottleneck_points: deque = deque(maxlen=100)
         self.process = psutil.Process()
 
     async def track_query(self, query_name: str, execution_time: float):
         """Record query execution time and check for bottlenecks"""
-        if query_name not in self.query_history:
-            self.query_history[query_name] = deque(maxlen=self.history_size)
-        
-        self.query_history[query_name].append(execution_time)
-        await self._update_query_metrics(query_name)
-        
+        self.record_query(query_name, execution_time)
+
+    def record_query(self, query_name: str, execution_time: float, rows: Optional[int] = None):
+        """Record one statement's execution time in ms, cheap enough to call per statement"""
+        history = self.query_history.get(query_name)
+        if history is None:
+            history = self.query_history[query_name] = WindowedStats(
+                self.history_size, threshold=self.alert_threshold_ms, tail_size=10
+            )
+            self.query_rows[query_name] = 0
+
+        history.append(execution_time)
+        if rows:
+            self.query_rows[query_name] += rows
+        # Summaries are rebuilt when a report is requested, not on every statement
+        self._stale_metrics.add(query_name)
+
         if execution_time > self.alert_threshold_ms:
-            await self._record_bottleneck(query_name, execution_time)
+            self._last_slow_query[query_name] = datetime.now(timezone.utc)
+            self._record_bottleneck(query_name, execution_time, rows)
+
+    def sample_resources(self):
+        """Take one CPU and memory sample for the resource averages"""
+        cpu = self.process.cpu_percent()
+        self.cpu_usage.append(cpu)
+        self.recent_cpu.append(cpu)
+        self.memory_usage.append(self.process.memory_percent())
+
+    def _refresh_metrics(self):
+        for query_name in self._stale_metrics:
+            self._update_query_metrics(query_name)
+        self._stale_metrics.clear()
 
-    async def _update_query_metrics(self, query_name: str):
+    def _update_query_metrics(self, query_name: str):
         """Update query performance metrics"""
-        times = list(self.query_history[query_name])
-        if not times:
+        stats = self.query_history[query_name]
+        if not stats:
             return
 
         self.query_metrics[query_name] = QueryMetrics(
-            total_time=sum(times),
-            count=len(times),
-            avg_time=sum(times) / len(times),
-            max_time=max(times),
-            min_time=min(times),
-            last_slow_query=datetime.now(timezone.utc) if times[-1] > self.alert_threshold_ms else None
+            total_time=stats.sum,
+            count=stats.count,
+            avg_time=stats.mean,
+            max_time=stats.max,
+            min_time=stats.min,
+            last_slow_query=self._last_slow_query.get(query_name)
         )
 
-    async def _record_bottleneck(self, query_name: str, execution_time: float):
-        """Record performance bottleneck with context"""
+    def _record_bottleneck(self, query_name: str, execution_time: float, rows: Optional[int] = None):
+        """Record performance bottleneck, system context is attached to the report instead"""
         bottleneck = {
             'timestamp': datetime.now(timezone.utc),
             'query_name': query_name,
             'execution_time': execution_time,
-            'cpu_usage': self.process.cpu_percent(),
-            'memory_usage': self.process.memory_info().rss / 1024 / 1024,
-            'context': await self._get_system_context()
+            'rows': rows
         }
         
         self.bottleneck_points.append(bottleneck)
@@ -88,27 +116,31 @@ class PerformanceTracker:
 
     async def get_performance_report(self) -> Dict:
         """Generate comprehensive performance report"""
+        self._refresh_metrics()
         return {
             'query_metrics': {
                 name: {
                     'avg_time': metrics.avg_time,
                     'max_time': metrics.max_time,
                     'total_queries': metrics.count,
-                    'slow_queries': sum(1 for t in self.query_history[name] if t > self.alert_threshold_ms)
+                    'slow_queries': self.query_history[name].above_threshold,
+                    'rows': self.query_rows.get(name, 0),
+                    'latency_ms': self.query_history[name].snapshot()
                 }
                 for name, metrics in self.query_metrics.items()
             },
             'resource_usage': {
-                'cpu_avg': sum(self.cpu_usage) / len(self.cpu_usage) if self.cpu_usage else 0,
-                'memory_avg': sum(self.memory_usage) / len(self.memory_usage) if self.memory_usage else 0,
+                'cpu_avg': self.cpu_usage.mean,
+                'memory_avg': self.memory_usage.mean,
             },
-            'bottlenecks': self.bottleneck_points[-10:],  # Last 10 bottlenecks
+            'bottlenecks': list(self.bottleneck_points)[-10:],  # Last 10 bottlenecks
             'system_health': await self._get_system_context()
         }
 
     async def analyze_trends(self) -> Dict:
         """Analyze performance trends and provide recommendations"""
         recommendations = []
+        self._refresh_metrics()
         
         # Analyze query patterns
         for query_name, metrics in self.query_metrics.items():
@@ -121,7 +153,7 @@ class PerformanceTracker:
                 })
 
         # Analyze resource usage
-        if any(cpu > 80 for cpu in self.cpu_usage):
+        if self.cpu_usage.above_threshold:
             recommendations.append({
                 'type': 'resource_optimization',
                 'target': 'cpu',
@@ -141,14 +173,13 @@ class PerformanceTracker:
         """Detect performance degradation patterns"""
         degradation = {}
         for query_name, history in self.query_history.items():
-            if len(history) < 10:
+            # Last 10 samples against the rest of the window
+            if len(history) <= history.tail_size:
                 continue
             
-            recent = list(history)[-10:]
-            older = list(history)[:-10]
-            if recent and older:
-                recent_avg = sum(recent) / len(recent)
-                older_avg = sum(older) / len(older)
+            recent_avg = history.tail_mean
+            older_avg = history.head_mean
+            if older_avg > 0:
                 if recent_avg > older_avg * 1.2:  # 20% degradation
                     degradation[query_name] = {
                         'recent_avg': recent_avg,
@@ -161,15 +192,14 @@ class PerformanceTracker:
     def _analyze_resource_pressure(self) -> Dict:
         """Analyze resource usage patterns"""
         return {
-            'cpu_pressure': any(cpu > 80 for cpu in self.cpu_usage),
-            'memory_pressure': any(mem > 85 for mem in self.memory_usage),
+            'cpu_pressure': self.cpu_usage.above_threshold > 0,
+            'memory_pressure': self.memory_usage.above_threshold > 0,
             'sustained_high_load': self._check_sustained_load()
         }
 
     def _check_sustained_load(self) -> bool:
         """Check for sustained high resource usage"""
-        if len(self.cpu_usage) < 10:
+        if len(self.recent_cpu) < 10:
             return False
             
-        recent_cpu = list(self.cpu_usage)[-10:]
-        return sum(cpu > 70 for cpu in recent_cpu) >= 7  # 70% high load for 7 out of 10 samples
\ No newline at end of file
+        return self.recent_cpu.above_threshold >= 7  # 70% high load for 7 out of 10 samples
\ No newline at end of file
@@ -1,9 +1,12 @@
 # utils/query_profiler.py
+import re
 import time
 import logging
-from functools import wraps
+from functools import lru_cache, wraps
 from typing import Optional
 
+from sqlalchemy import event
+
 logger = logging.getLogger(__name__)
 
 def profile_query(threshold_ms: Optional[int] = 100):
@@ -30,4 +33,54 @@ def profile_query(threshold_ms: Optional[int] = 100):
                 )
                 raise
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
+_COMMENT = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAM = re.compile(r':\w+|\?|%\(\w+\)s')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_VALUES_LIST = re.compile(r'(VALUES\s*\([^()]*\))(?:\s*,\s*\([^()]*\))+', re.I)
+_WHITESPACE = re.compile(r'\s+')
+
+@lru_cache(maxsize=2048)
+def fingerprint_sql(statement: str) -> str:
+    """Normalize SQL so statements differing only in literals share one fingerprint"""
+    sql = _COMMENT.sub(' ', statement)
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PARAM.sub('?', sql)
+    sql = _WHITESPACE.sub(' ', sql).strip()
+    sql = _IN_LIST.sub('(?+)', sql)
+    sql = _VALUES_LIST.sub(r'\1, ...', sql)
+    return sql
+
+class QueryProfiler:
+    """Times every statement through engine cursor events and feeds a PerformanceTracker"""
+
+    def __init__(self, tracker, max_name_length: int = 160):
+        self.tracker = tracker
+        self.max_name_length = max_name_length
+
+    def attach(self, engine):
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, 'before_cursor_execute', self._before_execute)
+        event.listen(sync_engine, 'after_cursor_execute', self._after_execute)
+        event.listen(sync_engine, 'handle_error', self._on_error)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('query_start')
+        if not starts:
+            return
+        execution_time = (time.perf_counter() - starts.pop()) * 1000
+        rows = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+        name = fingerprint_sql(statement)[:self.max_name_length]
+        self.tracker.record_query(name, execution_time, rows)
+
+    def _on_error(self, exception_context):
+        starts = exception_context.connection.info.get('query_start') if exception_context.connection else None
+        if starts:
+            starts.pop()
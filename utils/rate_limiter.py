@@ -1,113 +1,170 @@
 # utils/rate_limiter.py
-import asyncio
-from datetime import datetime, timedelta, timezone
-from typing import Dict, Optional, Tuple
+import heapq
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
-class RateLimiter:
-    def __init__(self):
-        self.command_cooldowns: Dict[str, Dict[str, datetime]] = {}
-        self.global_cooldowns: Dict[str, datetime] = {}
-        self._lock = asyncio.Lock()
-
-    def _get_now(self) -> datetime:
-        return datetime.now(timezone.utc)
+@dataclass(frozen=True)
+class RolePolicy:
+    """How a chat role changes a command's limits, exempt roles are never limited"""
+    cooldown_scale: float = 1.0
+    extra_burst: int = 0
+    exempt: bool = False
+
+def parse_role_policies(spec: str) -> Dict[str, RolePolicy]:
+    """Parse "role=cooldown_scale:extra_burst" pairs, "role=exempt" never limits that role"""
+    policies = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        role, _, value = item.partition('=')
+        try:
+            if value.strip().lower() == 'exempt':
+                policies[role.strip()] = RolePolicy(exempt=True)
+                continue
+            scale, _, burst = value.partition(':')
+            policies[role.strip()] = RolePolicy(float(scale), int(burst or 0))
+        except ValueError:
+            logger.error(f"Ignoring invalid rate limit role policy: {item}")
+    return policies
+
+def role_for(author) -> str:
+    """Highest role of a chat author, as used to pick a RolePolicy"""
+    if getattr(author, 'is_broadcaster', False):
+        return 'broadcaster'
+    if getattr(author, 'is_mod', False):
+        return 'moderator'
+    badges = getattr(author, 'badges', None) or {}
+    if 'vip' in badges:
+        return 'vip'
+    if getattr(author, 'is_subscriber', False) or 'subscriber' in badges:
+        return 'subscriber'
+    return 'viewer'
 
-    async def can_execute(
+class RateLimiter:
+    """Per-user and per-command limits using GCRA (a token bucket kept as one float).
+
+    Each key stores its theoretical arrival time (TAT) on the monotonic
+    clock: the moment its bucket is full again. A use is allowed while
+    the TAT is less than burst * cooldown ahead of now, and pushes it one
+    cooldown further. With burst=1 this is a plain cooldown.
+
+    User keys live in a dict keyed by (command, user), with a min-heap of
+    (TAT, key) entries beside it, like the TimeoutManager's expiries. Each
+    allowed use pushes a new entry instead of searching the heap, outdated
+    entries are skipped when they reach the top, and each check only pops
+    the keys that have actually expired, whatever mix of cooldowns and
+    bursts produced them. A key whose TAT has passed behaves exactly like
+    a missing key, so popping it late is safe.
+    """
+
+    def __init__(self, role_policies: Optional[Dict[str, RolePolicy]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        # Every role gets the command's own limits unless a policy is configured
+        self.role_policies = dict(role_policies or {})
+        self.clock = clock
+        self.user_tats: Dict[Tuple[str, str], float] = {}
+        self._heap: List[Tuple[float, Tuple[str, str]]] = []
+        self.global_tats: Dict[str, float] = {}
+        self.stats = {'allowed': 0, 'limited': 0, 'expired': 0, 'compactions': 0}
+
+    def check(
         self,
         command_name: str,
         user_id: str,
-        cooldown: int = 3,
-        global_cooldown: int = 1,
+        cooldown: float = 3,
+        global_cooldown: float = 1,
+        burst: int = 1,
+        role: Optional[str] = None
     ) -> Tuple[bool, Optional[float]]:
+        """Decide and record one use, returns (allowed, seconds to wait if not)"""
         if not command_name or not user_id:
             return True, None
 
+        policy = self.role_policies.get(role) if role is not None else None
+        if policy is not None:
+            if policy.exempt:
+                return True, None
+            cooldown *= policy.cooldown_scale
+            burst += policy.extra_burst
+
         if cooldown <= 0 and global_cooldown <= 0:
             return True, None
 
-        now = self._get_now()
+        now = self.clock()
         command_key = command_name.lower()
+        self._expire(now)
+
+        # Global limit is a plain cooldown shared by everyone
+        if global_cooldown > 0:
+            global_tat = self.global_tats.get(command_key, now)
+            if global_tat > now:
+                self.stats['limited'] += 1
+                return False, global_tat - now
+
+        if cooldown > 0:
+            key = (command_key, user_id)
+            tat = self.user_tats.get(key, now)
+            if tat < now:
+                tat = now
+            new_tat = tat + cooldown
+            wait = new_tat - burst * cooldown - now
+            if wait > 0:
+                self.stats['limited'] += 1
+                return False, wait
+            self.user_tats[key] = new_tat
+            heapq.heappush(self._heap, (new_tat, key))
+            self._compact()
+
+        if global_cooldown > 0:
+            self.global_tats[command_key] = now + global_cooldown
+        self.stats['allowed'] += 1
+        return True, None
 
-        async with self._lock:
-            # Clean up old cooldowns first
-            self._cleanup_old_cooldowns(now)
-
-            # Check global cooldown first
-            if global_cooldown > 0 and command_key in self.global_cooldowns:
-                time_since_last = (now - self.global_cooldowns[command_key]).total_seconds()
-                logger.debug(f"Global cooldown check: {time_since_last} < {global_cooldown}")
-                if time_since_last < global_cooldown:
-                    return False, global_cooldown - time_since_last
-
-            # Check user-specific cooldown
-            if cooldown > 0:
-                if command_key in self.command_cooldowns and user_id in self.command_cooldowns[command_key]:
-                    time_since_last = (now - self.command_cooldowns[command_key][user_id]).total_seconds()
-                    logger.debug(f"User cooldown check: {time_since_last} < {cooldown}")
-                    if time_since_last < cooldown:
-                        return False, cooldown - time_since_last
-
-            # If we get here, update cooldowns and allow execution
-            if global_cooldown > 0:
-                self.global_cooldowns[command_key] = now
-            if cooldown > 0:
-                if command_key not in self.command_cooldowns:
-                    self.command_cooldowns[command_key] = {}
-                self.command_cooldowns[command_key][user_id] = now
-
-            return True, None
+    async def can_execute(
+        self,
+        command_name: str,
+        user_id: str,
+        cooldown: float = 3,
+        global_cooldown: float = 1,
+        burst: int = 1,
+        role: Optional[str] = None
+    ) -> Tuple[bool, Optional[float]]:
+        # check() never awaits, so it is atomic on the event loop without a lock
+        return self.check(command_name, user_id, cooldown, global_cooldown, burst, role)
+
+    def _expire(self, now: float):
+        """Pop the keys whose TAT has passed, O(k log n) for k expired heap entries"""
+        heap = self._heap
+        user_tats = self.user_tats
+        while heap and heap[0][0] <= now:
+            tat, key = heapq.heappop(heap)
+            if user_tats.get(key) == tat:
+                del user_tats[key]
+                self.stats['expired'] += 1
+
+    def _compact(self):
+        # Repeat uses and resets leave stale entries, rebuild once they dominate the heap
+        if len(self._heap) > 2 * len(self.user_tats) + 64:
+            self._heap = [(tat, key) for key, tat in self.user_tats.items()]
+            heapq.heapify(self._heap)
+            self.stats['compactions'] += 1
 
     async def reset_cooldown(self, command_name: str, user_id: Optional[str] = None) -> None:
         command_key = command_name.lower()
-        
-        async with self._lock:
-            logger.debug(f"Resetting cooldown for command: {command_key}, user: {user_id}")
-            logger.debug(f"Before reset - Global cooldowns: {self.global_cooldowns}")
-            logger.debug(f"Before reset - Command cooldowns: {self.command_cooldowns}")
-            
-            # Always reset global cooldown for the command
-            if command_key in self.global_cooldowns:
-                del self.global_cooldowns[command_key]
-            
-            # Reset user-specific cooldown if user_id provided
-            if user_id is not None:
-                if command_key in self.command_cooldowns:
-                    self.command_cooldowns[command_key].pop(user_id, None)
-                    if not self.command_cooldowns[command_key]:
-                        del self.command_cooldowns[command_key]
-            else:
-                # Reset all cooldowns for this command
-                self.command_cooldowns.pop(command_key, None)
-
-            logger.debug(f"After reset - Global cooldowns: {self.global_cooldowns}")
-            logger.debug(f"After reset - Command cooldowns: {self.command_cooldowns}")
-
-    def _cleanup_old_cooldowns(self, now: Optional[datetime] = None) -> None:
-        if now is None:
-            now = self._get_now()
-
-        cutoff = now - timedelta(minutes=5)
-        logger.debug(f"Cleaning up cooldowns before: {cutoff}")
-
-        # Clean up global cooldowns
-        expired_globals = [
-            cmd for cmd, time in self.global_cooldowns.items()
-            if time <= cutoff
-        ]
-        for cmd in expired_globals:
-            del self.global_cooldowns[cmd]
-
-        # Clean up user cooldowns
-        for cmd in list(self.command_cooldowns.keys()):
-            expired_users = [
-                user for user, time in self.command_cooldowns[cmd].items()
-                if time <= cutoff
-            ]
-            for user in expired_users:
-                del self.command_cooldowns[cmd][user]
-            
-            if not self.command_cooldowns[cmd]:
-                del self.command_cooldowns[cmd]
\ No newline at end of file
+        self.global_tats.pop(command_key, None)
+
+        if user_id is not None:
+            self.user_tats.pop((command_key, user_id), None)
+        else:
+            # Rare mod action, a scan of the keys is fine here
+            for key in [key for key in self.user_tats if key[0] == command_key]:
+                del self.user_tats[key]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            **self.stats,
+            'tracked_keys': len(self.user_tats),
+            'tracked_commands': len(self.global_tats)
+        }
@@ -0,0 +1,228 @@
+# utils/timer_wheel.py
+import asyncio
+import inspect
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class TimerHandle:
+    """A scheduled callback, cancel() stops it from firing (again, if repeating)"""
+    __slots__ = ('name', 'deadline', 'interval', 'callback', 'args', 'cancelled', 'running', '_service')
+
+    def __init__(self, service: 'TimerService', name: Optional[str], deadline: int,
+                 interval: Optional[float], callback: Callable, args: tuple):
+        self._service = service
+        self.name = name
+        self.deadline = deadline
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self.running = False
+
+    def cancel(self):
+        if not self.cancelled:
+            self.cancelled = True
+            self._service._remove(self)
+
+    @property
+    def remaining(self) -> float:
+        """Seconds until the callback fires"""
+        return self._service.remaining(self)
+
+    def __repr__(self) -> str:
+        label = self.name or getattr(self.callback, '__qualname__', repr(self.callback))
+        return f"<TimerHandle {label} in {self.remaining:.1f}s>"
+
+class TimerService:
+    """Hashed timer wheel shared by every delayed and periodic job.
+
+    Timers hash into `slots` buckets by their deadline tick, so scheduling
+    and cancelling are O(1) and a tick only looks at one bucket. A single
+    loop task advances the wheel; it sleeps until something is scheduled
+    when the wheel is empty.
+
+    Callbacks may be plain functions or coroutine functions. Coroutines run
+    as tasks, and a repeating coroutine job is rescheduled when it
+    finishes, so slow jobs never overlap like the sleep loops they replace.
+    Named timers are unique, scheduling a name again replaces the old timer.
+    """
+
+    def __init__(self, tick: float = 0.25, slots: int = 512,
+                 clock: Callable[[], float] = time.monotonic):
+        self.tick = tick
+        self.slots = slots
+        self.clock = clock
+        self._wheel: List[Set[TimerHandle]] = [set() for _ in range(slots)]
+        self._origin = clock()
+        self._current = 0  # Last tick whose bucket has been processed
+        self._count = 0
+        self._named: Dict[str, TimerHandle] = {}
+        self._running: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self.stats = {'scheduled': 0, 'fired': 0, 'cancelled': 0, 'errors': 0, 'ticks': 0}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def call_later(self, delay: float, callback: Callable, *args, name: Optional[str] = None) -> TimerHandle:
+        """Run callback(*args) once after delay seconds"""
+        return self._schedule(delay, None, callback, args, name)
+
+    def call_every(self, interval: float, callback: Callable, *args, name: Optional[str] = None,
+                   delay: Optional[float] = None) -> TimerHandle:
+        """Run callback(*args) every interval seconds, first after delay (default interval)"""
+        return self._schedule(interval if delay is None else delay, interval, callback, args, name)
+
+    async def sleep(self, delay: float, name: Optional[str] = None):
+        """asyncio.sleep on the shared wheel, shows up in timers() while waiting"""
+        future = asyncio.get_running_loop().create_future()
+        handle = self.call_later(delay, self._wake, future, name=name)
+        try:
+            await future
+        finally:
+            handle.cancel()
+
+    def get(self, name: str) -> Optional[TimerHandle]:
+        return self._named.get(name)
+
+    def cancel(self, name: str) -> bool:
+        """Cancel a named timer, returns False if there was none"""
+        handle = self._named.get(name)
+        if handle is None:
+            return False
+        handle.cancel()
+        return True
+
+    def remaining(self, handle: TimerHandle) -> float:
+        return max(0.0, self._origin + handle.deadline * self.tick - self.clock())
+
+    def timers(self) -> List[TimerHandle]:
+        """Pending timers, soonest first"""
+        pending = [handle for bucket in self._wheel for handle in bucket]
+        return sorted(pending, key=lambda handle: handle.deadline)
+
+    def _schedule(self, delay: float, interval: Optional[float], callback: Callable,
+                  args: tuple, name: Optional[str]) -> TimerHandle:
+        if name is not None and name in self._named:
+            self._named[name].cancel()
+        handle = TimerHandle(self, name, self._deadline(delay), interval, callback, args)
+        self._insert(handle)
+        if name is not None:
+            self._named[name] = handle
+        self.stats['scheduled'] += 1
+        return handle
+
+    def _deadline(self, delay: float) -> int:
+        # Never earlier than the next unprocessed tick, so a timer can't fire early
+        ticks = math.ceil((self.clock() + max(0.0, delay) - self._origin) / self.tick)
+        return max(ticks, self._current + 1)
+
+    def _insert(self, handle: TimerHandle):
+        self._wheel[handle.deadline % self.slots].add(handle)
+        self._count += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _remove(self, handle: TimerHandle):
+        bucket = self._wheel[handle.deadline % self.slots]
+        if handle in bucket:
+            bucket.discard(handle)
+            self._count -= 1
+            self.stats['cancelled'] += 1
+        if handle.name is not None and self._named.get(handle.name) is handle:
+            del self._named[handle.name]
+
+    def run_due(self) -> int:
+        """Fire every timer whose tick has passed, returns how many fired"""
+        now_tick = int((self.clock() - self._origin) / self.tick)
+        if now_tick <= self._current:
+            return 0
+
+        # After a stall longer than a full turn every bucket is due once
+        start = max(self._current + 1, now_tick - self.slots + 1)
+        due = []
+        for tick in range(start, now_tick + 1):
+            bucket = self._wheel[tick % self.slots]
+            if bucket:
+                ready = [handle for handle in bucket if handle.deadline <= now_tick]
+                bucket.difference_update(ready)
+                due.extend(ready)
+        self._current = now_tick
+        self.stats['ticks'] += now_tick - start + 1
+
+        self._count -= len(due)
+        due.sort(key=lambda handle: handle.deadline)
+        for handle in due:
+            # An earlier callback in this batch may have cancelled it
+            if not handle.cancelled:
+                self._fire(handle)
+        return len(due)
+
+    def _fire(self, handle: TimerHandle):
+        if handle.interval is None and handle.name is not None and self._named.get(handle.name) is handle:
+            del self._named[handle.name]
+        self.stats['fired'] += 1
+        try:
+            result = handle.callback(*handle.args)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Timer {handle.name or handle.callback} failed: {e}")
+            result = None
+
+        if inspect.isawaitable(result):
+            handle.running = True
+            task = asyncio.ensure_future(result)
+            self._running.add(task)
+            task.add_done_callback(lambda task: self._finished(handle, task))
+        elif handle.interval is not None:
+            self._reschedule(handle)
+
+    def _finished(self, handle: TimerHandle, task: asyncio.Task):
+        self._running.discard(task)
+        handle.running = False
+        if not task.cancelled() and task.exception() is not None:
+            self.stats['errors'] += 1
+            logger.error(f"Timer {handle.name or handle.callback} failed: {task.exception()}")
+        if handle.interval is not None:
+            self._reschedule(handle)
+
+    def _reschedule(self, handle: TimerHandle):
+        if handle.cancelled:
+            return
+        handle.deadline = self._deadline(handle.interval)
+        self._insert(handle)
+
+    @staticmethod
+    def _wake(future: asyncio.Future):
+        if not future.done():
+            future.set_result(None)
+
+    async def run(self):
+        """Drive the wheel, the only task that sleeps on behalf of the timers"""
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                if not self._count:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                self._wakeup.clear()
+                next_tick = self._origin + (self._current + 1) * self.tick
+                await asyncio.sleep(max(0.0, next_tick - self.clock()))
+                self.run_due()
+        finally:
+            for task in list(self._running):
+                task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'pending': self._count,
+            'named': len(self._named),
+            'running': len(self._running),
+            'largest_bucket': max(len(bucket) for bucket in self._wheel)
+        }
@@ -0,0 +1,157 @@
+# utils/tracing.py
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+import asyncio
+import itertools
+import json
+import logging
+import random
+import time
+
+from utils.windowed_stats import WindowedStats
+
+logger = logging.getLogger(__name__)
+
+class Trace:
+    """One message's trip through the bot, as a list of timed stages"""
+    __slots__ = ('trace_id', 'name', 'start', 'wall_start', 'attributes', 'spans')
+
+    def __init__(self, trace_id: int, name: str, attributes: Dict):
+        self.trace_id = trace_id
+        self.name = name
+        self.start = time.perf_counter()
+        self.wall_start = time.time()
+        self.attributes = attributes
+        self.spans: List[tuple] = []
+
+    def to_dict(self, duration_ms: float) -> Dict:
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'timestamp': self.wall_start,
+            'duration_ms': round(duration_ms, 3),
+            'attributes': self.attributes,
+            'spans': [
+                {'stage': stage, 'offset_ms': round(offset, 3), 'duration_ms': round(duration, 3)}
+                for stage, offset, duration in self.spans
+            ]
+        }
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar('current_trace', default=None)
+
+class Tracer:
+    """Per-stage and per-command latency for the message path, with sampled JSONL dumps"""
+
+    def __init__(self, sample_rate: float = 0.0, trace_file: Optional[str] = None,
+                 history_size: int = 1000):
+        self.sample_rate = sample_rate
+        self.trace_file = trace_file
+        self.history_size = history_size
+        self.stage_stats: Dict[str, WindowedStats] = {}
+        self.command_stats: Dict[str, WindowedStats] = {}
+        self.trace_stats = WindowedStats(history_size)
+        self.dumped = 0
+        self._pending: List[str] = []
+        self._ids = itertools.count(1)
+
+    def configure(self, sample_rate: Optional[float] = None, trace_file: Optional[str] = None):
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if trace_file is not None:
+            self.trace_file = trace_file
+
+    @staticmethod
+    def current() -> Optional[Trace]:
+        return _current_trace.get()
+
+    @contextmanager
+    def trace(self, name: str, **attributes):
+        """Root span for one message, stages recorded inside it are attached to it"""
+        trace = Trace(next(self._ids), name, attributes)
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+            duration_ms = (time.perf_counter() - trace.start) * 1000
+            self.trace_stats.append(duration_ms)
+            command = trace.attributes.get('command')
+            if command:
+                self._stats(self.command_stats, command).append(duration_ms)
+            if self.sample_rate and self.trace_file and random.random() < self.sample_rate:
+                self._pending.append(json.dumps(trace.to_dict(duration_ms), default=str))
+
+    @contextmanager
+    def span(self, stage: str):
+        """Time one stage, inside or outside a trace"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.record(stage, (end - start) * 1000, start)
+
+    def record(self, stage: str, duration_ms: float, start: Optional[float] = None):
+        """Record a stage measured elsewhere"""
+        self._stats(self.stage_stats, stage).append(duration_ms)
+        trace = _current_trace.get()
+        if trace is not None:
+            offset = ((start if start is not None else time.perf_counter()) - trace.start) * 1000
+            trace.spans.append((stage, offset, duration_ms))
+
+    def set_attribute(self, key: str, value):
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.attributes[key] = value
+
+    def traced(self, stage: str, func):
+        """Wrap a coroutine function so each call is recorded as a stage"""
+        async def wrapper(*args, **kwargs):
+            with self.span(stage):
+                return await func(*args, **kwargs)
+        return wrapper
+
+    def _stats(self, table: Dict[str, WindowedStats], key: str) -> WindowedStats:
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = WindowedStats(self.history_size)
+        return stats
+
+    def get_metrics(self) -> Dict:
+        return {
+            'messages': self.trace_stats.snapshot(),
+            'stages': {stage: stats.snapshot() for stage, stats in self.stage_stats.items()},
+            'commands': {command: stats.snapshot() for command, stats in self.command_stats.items()},
+            'sample_rate': self.sample_rate,
+            'dumped': self.dumped
+        }
+
+    async def flush(self) -> int:
+        """Append sampled traces to the JSONL file off the event loop"""
+        if not self._pending or not self.trace_file:
+            return 0
+        lines, self._pending = self._pending, []
+        try:
+            await asyncio.to_thread(self._write_lines, lines)
+        except Exception as e:
+            logger.error(f"Error writing traces to {self.trace_file}: {e}")
+            return 0
+        self.dumped += len(lines)
+        return len(lines)
+
+    def _write_lines(self, lines: List[str]):
+        with open(self.trace_file, 'a', encoding='utf-8') as handle:
+            handle.write('\n'.join(lines) + '\n')
+
+    async def run_flusher(self, interval: float = 5.0):
+        """Background task writing sampled traces every few seconds"""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                await self.flush()
+        finally:
+            await self.flush()
+
+# Shared tracer, configured by the bot at startup
+tracer = Tracer()
@@ -0,0 +1,164 @@
+# utils/windowed_stats.py
+from bisect import bisect_left
+from collections import deque
+from typing import Dict, List, Optional
+import math
+
+from utils.histogram import DEFAULT_BUCKETS
+
+class WindowedStats:
+    """Sliding-window aggregates over the last `size` samples with O(1) amortized updates.
+
+    Sum and mean come from running totals, min and max from monotonic deques,
+    and quantiles from per-bucket counts that are incremented on insert and
+    decremented on eviction.
+    """
+    __slots__ = (
+        'size', 'bounds', 'threshold', 'tail_size', 'total_count',
+        '_values', '_buckets', '_sum', '_tail_sum', '_above',
+        '_min', '_max', '_index', '_since_resync'
+    )
+
+    def __init__(self, size: int = 1000, threshold: Optional[float] = None,
+                 tail_size: int = 0, bounds: Optional[List[float]] = None):
+        self.size = size
+        self.bounds = bounds or DEFAULT_BUCKETS
+        self.threshold = threshold
+        self.tail_size = tail_size
+        self.total_count = 0
+        self._values = deque()
+        self._buckets = [0] * (len(self.bounds) + 1)
+        self._sum = 0.0
+        self._tail_sum = 0.0
+        self._above = 0
+        # (index, value) pairs, increasing for min and decreasing for max
+        self._min = deque()
+        self._max = deque()
+        self._index = 0
+        self._since_resync = 0
+
+    def append(self, value: float):
+        values = self._values
+        if self.tail_size and len(values) >= self.tail_size:
+            # The sample about to leave the tail is tail_size from the end
+            self._tail_sum -= values[-self.tail_size]
+        if len(values) == self.size:
+            self._evict()
+
+        values.append(value)
+        self._sum += value
+        if self.tail_size:
+            self._tail_sum += value
+        self._buckets[bisect_left(self.bounds, value)] += 1
+        if self.threshold is not None and value > self.threshold:
+            self._above += 1
+
+        index = self._index
+        self._index += 1
+        self.total_count += 1
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((index, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((index, value))
+
+        # Running sums drift with float error, recompute once per window
+        self._since_resync += 1
+        if self._since_resync >= self.size:
+            self._resync()
+
+    def _evict(self):
+        value = self._values.popleft()
+        self._sum -= value
+        self._buckets[bisect_left(self.bounds, value)] -= 1
+        if self.threshold is not None and value > self.threshold:
+            self._above -= 1
+        oldest = self._index - self.size
+        if self._min and self._min[0][0] <= oldest:
+            self._min.popleft()
+        if self._max and self._max[0][0] <= oldest:
+            self._max.popleft()
+
+    def _resync(self):
+        self._since_resync = 0
+        self._sum = math.fsum(self._values)
+        if self.tail_size:
+            tail = len(self._values) - min(self.tail_size, len(self._values))
+            self._tail_sum = math.fsum(self._values[i] for i in range(tail, len(self._values)))
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __bool__(self) -> bool:
+        return bool(self._values)
+
+    @property
+    def count(self) -> int:
+        return len(self._values)
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    @property
+    def mean(self) -> float:
+        return self._sum / len(self._values) if self._values else 0.0
+
+    @property
+    def min(self) -> float:
+        return self._min[0][1] if self._min else 0.0
+
+    @property
+    def max(self) -> float:
+        return self._max[0][1] if self._max else 0.0
+
+    @property
+    def last(self) -> float:
+        return self._values[-1] if self._values else 0.0
+
+    @property
+    def above_threshold(self) -> int:
+        """Samples in the window greater than the configured threshold"""
+        return self._above
+
+    @property
+    def tail_count(self) -> int:
+        return min(self.tail_size, len(self._values))
+
+    @property
+    def tail_mean(self) -> float:
+        """Mean of the most recent tail_size samples"""
+        count = self.tail_count
+        return self._tail_sum / count if count else 0.0
+
+    @property
+    def head_mean(self) -> float:
+        """Mean of the window excluding the tail"""
+        count = len(self._values) - self.tail_count
+        return (self._sum - self._tail_sum) / count if count > 0 else 0.0
+
+    def percentile(self, pct: float) -> float:
+        """Approximate windowed percentile, accurate to one histogram bucket"""
+        count = len(self._values)
+        if not count:
+            return 0.0
+        target = max(1, math.ceil(count * pct / 100))
+        seen = 0
+        for index, bucket_count in enumerate(self._buckets):
+            seen += bucket_count
+            if seen >= target:
+                bound = self.bounds[index] if index < len(self.bounds) else self.max
+                return min(max(bound, self.min), self.max)
+        return self.max
+
+    def snapshot(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99)
+        }